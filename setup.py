@@ -9,9 +9,14 @@ setup(
     packages=find_packages('src'),
     package_dir={'': 'src'},
     install_requires=requirements,
+    extras_require={
+        'columnar': ['pyarrow']
+    },
     entry_points={
         'console_scripts': [
-            'run_scraper=main:main'
+            'run_scraper=main:main',
+            'job_queue=work_queue:main',
+            'job_archive=archive:main'
         ],
     },
     description='Job search results scraper tool designed to parse, filter, and store more relevant job results in a working Excel spreadsheet.',
@@ -0,0 +1,231 @@
+import argparse
+import datetime
+import gzip
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from exporters import load_jobs, save_jobs
+from job_log import JobLog, encode_job_record
+from job_record import JobRecord, JobStore
+
+# Name of the file listing the job keys of every archived job, sorted, in the archive directory
+ARCHIVED_KEYS_FILENAME = 'archived_keys.npy'
+
+class JobArchive:
+    """A directory of compressed files holding the jobs moved out of the saved jobs by the retention policy.
+
+    Each archival writes the archived jobs to a new, numbered, gzip-compressed JSON Lines file, and adds their job
+    keys to a sorted array of every archived job key. The array is memory-mapped, so archived jobs keep counting as
+    already seen when they are found again, without reading the archive files.
+
+    Attributes:
+        directory (str): The path of the archive directory.
+        _archived_keys (np.ndarray): The sorted job keys of the archived jobs.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initializes the JobArchive, creating its directory if needed.
+
+        Args:
+            directory (str): The path of the archive directory.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._archived_keys = self._load_keys()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['JobArchive']:
+        """
+        Creates a JobArchive from the 'retention' settings of the configuration file.
+
+        Args:
+            config (Dict): The configuration dictionary loaded from config.json.
+
+        Returns:
+            Optional[JobArchive]: The archive, or None if no job has been archived yet.
+        """
+        directory = get_archive_directory(config)
+        return cls(directory) if os.path.isfile(os.path.join(directory, ARCHIVED_KEYS_FILENAME)) else None
+
+    def __len__(self) -> int:
+        return len(self._archived_keys)
+
+    def __contains__(self, job_key: object) -> bool:
+        if not isinstance(job_key, int) or not 0 <= job_key < 1 << 64 or not len(self._archived_keys):
+            return False
+        position = int(np.searchsorted(self._archived_keys, np.uint64(job_key)))
+        return position < len(self._archived_keys) and int(self._archived_keys[position]) == job_key
+
+    def keys(self) -> List[int]:
+        """
+        Returns the job keys of the archived jobs.
+
+        Returns:
+            List[int]: The integer job keys, sorted.
+        """
+        return self._archived_keys.tolist()
+
+    def archive(self, job_records: Mapping[int, JobRecord]) -> Optional[str]:
+        """
+        Writes jobs to a new archive file and records their job keys.
+
+        Args:
+            job_records (Mapping[int, JobRecord]): The job records to archive, keyed by the integer job key.
+
+        Returns:
+            Optional[str]: The path of the archive file, or None if there was no job to archive.
+        """
+        if not job_records:
+            return None
+
+        archive_filenames = self._archive_filenames()
+        number = int(archive_filenames[-1].split('_')[1]) + 1 if archive_filenames else 1
+        path = os.path.join(self.directory, f"jobs_{number:06d}_{time.strftime('%Y%m%d')}.jsonl.gz")
+        with gzip.open(f"{path}.tmp", 'wb') as archive_file:
+            for job_key, job_record in job_records.items():
+                archive_file.write(b'{"job_key":%d,"record":%s}\n' % (job_key, encode_job_record(job_record)))
+        os.replace(f"{path}.tmp", path)
+
+        archived_keys = np.union1d(self._archived_keys, np.fromiter(job_records, dtype=np.uint64, count=len(job_records)))
+        keys_path = os.path.join(self.directory, ARCHIVED_KEYS_FILENAME)
+        with open(f"{keys_path}.tmp", 'wb') as keys_file:
+            np.save(keys_file, archived_keys)
+        self._archived_keys = archived_keys  # release the mapping of the file being replaced
+        os.replace(f"{keys_path}.tmp", keys_path)
+        self._archived_keys = self._load_keys()
+        return path
+
+    def iter_jobs(self) -> Iterator[Tuple[int, JobRecord]]:
+        """
+        Reads every archived job, in the order the jobs were archived.
+
+        Yields:
+            Tuple[int, JobRecord]: The integer job key and the record of the next archived job.
+        """
+        for filename in self._archive_filenames():
+            with gzip.open(os.path.join(self.directory, filename), 'rb') as archive_file:
+                for line in archive_file:
+                    archived_job = json.loads(line)
+                    yield archived_job['job_key'], JobRecord.from_encoded(archived_job['record'])
+
+    def _archive_filenames(self) -> List[str]:
+        """Returns the names of the archive files, numbered in the order they were written."""
+        return sorted(filename for filename in os.listdir(self.directory)
+                      if filename.startswith('jobs_') and filename.endswith('.jsonl.gz'))
+
+    def _load_keys(self) -> np.ndarray:
+        """Maps the archived job keys, or returns an empty array if no job has been archived."""
+        keys_path = os.path.join(self.directory, ARCHIVED_KEYS_FILENAME)
+        if not os.path.isfile(keys_path):
+            return np.zeros(0, dtype=np.uint64)
+        return np.load(keys_path, mmap_mode='r')
+
+def get_archive_directory(config: Dict) -> str:
+    """
+    Returns the archive directory of the 'retention.archive_directory' setting.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+
+    Returns:
+        str: The path of the archive directory, 'archive' by default.
+    """
+    return config.get('retention', {}).get('archive_directory') or 'archive'
+
+def get_max_age_days(config: Dict) -> Optional[int]:
+    """
+    Returns the 'retention.max_age_days' setting.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+
+    Returns:
+        Optional[int]: The number of days after their posted date from which jobs are archived, or None if jobs are
+        never archived.
+    """
+    max_age_days = config.get('retention', {}).get('max_age_days')
+    return int(max_age_days) if str(max_age_days or '').strip() else None
+
+def find_expired_jobs(jobs: Mapping[int, JobRecord], max_age_days: int, today: Optional[datetime.date]=None) -> List[int]:
+    """
+    Finds the jobs that the retention policy moves to the archive: jobs posted more than max_age_days ago that have
+    not been applied to. Jobs without a valid posted date are kept.
+
+    Args:
+        jobs (Mapping[int, JobRecord]): The saved job records, keyed by the integer job key.
+        max_age_days (int): The number of days after their posted date from which jobs are archived.
+        today (Optional[datetime.date], optional): The current date. Defaults to today.
+
+    Returns:
+        List[int]: The integer job keys of the expired jobs.
+    """
+    cutoff = (today or datetime.date.today()) - datetime.timedelta(days=max_age_days)
+    return [job_key for job_key, job_record in jobs.items()
+            if isinstance(job_record.posted_date, datetime.date) and job_record.posted_date < cutoff
+            and job_record.applied != 'Yes']
+
+def compact_jobs(config: Dict, today: Optional[datetime.date]=None) -> int:
+    """
+    Moves the expired jobs to the archive, then rewrites the saved jobs without them and compacts the job log.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+        today (Optional[datetime.date], optional): The current date. Defaults to today.
+
+    Returns:
+        int: The number of archived jobs.
+    """
+    jobs = load_jobs(config)
+    max_age_days = get_max_age_days(config)
+    expired_job_keys = find_expired_jobs(jobs, max_age_days, today) if max_age_days is not None else []
+
+    JobArchive(get_archive_directory(config)).archive({job_key: jobs[job_key] for job_key in expired_job_keys})
+    if not isinstance(jobs, JobStore):
+        jobs = JobStore(jobs)
+    for job_key in expired_job_keys:
+        del jobs[job_key]
+    save_jobs(config, jobs)
+
+    job_log = JobLog.from_config(config)
+    if job_log is not None:
+        with job_log:
+            job_log.compact()
+    return len(expired_job_keys)
+
+def main(argv: Optional[List[str]]=None) -> None:
+    """
+    Runs the retention policy from the command line.
+
+    Commands:
+        compact: Moves the jobs older than 'retention.max_age_days' that have not been applied to into the archive,
+            and rewrites the saved jobs without them.
+        status: Prints the number of saved and archived jobs.
+
+    Args:
+        argv (Optional[List[str]], optional): The command line arguments. Defaults to sys.argv.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description='Archive old jobs and compact the saved jobs.')
+    parser.add_argument('command', choices=['compact', 'status'])
+    parser.add_argument('--config', default='config.json', help='Path of the configuration file.')
+    args = parser.parse_args(argv)
+
+    with open(args.config) as config_file:
+        config = json.load(config_file)
+
+    if args.command == 'compact':
+        print(f"Number of archived jobs: {compact_jobs(config)}")
+    elif args.command == 'status':
+        archive = JobArchive.from_config(config)
+        print(f"Number of saved jobs: {len(load_jobs(config))}")
+        print(f"Number of archived jobs: {len(archive) if archive is not None else 0}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,429 @@
+import asyncio
+import logging
+import math
+import threading
+from random import randint
+from typing import Dict, List, Optional, Set, Tuple
+
+from selenium import webdriver
+
+import utils
+from archive import JobArchive
+from enrichment import JobDetailCache, RateLimiter, reject_by_full_descriptions, store_full_description
+from fetchers import BrowserFetcher, FallbackFetcher, Fetcher, HttpFetcher, is_usable_page
+from filters import JobFilter
+from job_cards import evaluate_job_cards, parse_job_cards
+from job_record import JobRecord
+from near_duplicates import NearDuplicateIndex
+from page_cache import PageCache, strip_scripts
+
+class CrawlCoordinator:
+    """Crawls many Indeed searches concurrently on a single asyncio event loop.
+
+    Each search is crawled page by page in its own task, and the full descriptions of the accepted jobs of a page are
+    fetched concurrently. All requests share one fetcher and one rate limiter, and at most max_concurrent_fetches
+    requests are in flight at once. Blocking fetches run in worker threads, while the crawl delay and the rate limiter
+    are awaited on the event loop, so a crawl can be cancelled at any point without waiting for a sleep to finish.
+
+    Attributes:
+        fetcher (Fetcher): Fetches the result pages.
+        detail_fetcher (Fetcher): Fetches the job detail pages.
+        job_filter (JobFilter): The compiled filter rules applied to every extracted job.
+        jobs (Dict[int, JobRecord]): Dictionary of job listings, keyed by the integer job key.
+        csv_headers (List[str]): Headers of the job details.
+        rate_limiter (RateLimiter): The rate limiter shared by all requests.
+        crawl_delay (int): Minimum number of seconds between two result pages of the same search.
+        max_pages (int): Maximum number of result pages crawled per search, or 0 to crawl every page.
+        page_timeout (Optional[float]): Number of seconds a single request may take, or None for no limit.
+        search_timeout (Optional[float]): Number of seconds the crawl of a single search may take, or None for no limit.
+        page_cache (Optional[PageCache]): The on-disk cache of fetched result pages, or None if disabled.
+        replay_from_cache (bool): Whether result pages are only read from the page cache, regardless of their age,
+            instead of the web.
+        detail_cache (Optional[JobDetailCache]): The cache of full job descriptions, or None if enrichment is disabled.
+        near_duplicates (Optional[NearDuplicateIndex]): Finds new jobs that are near duplicates of stored jobs, or None if disabled.
+        archive (Optional[JobArchive]): The jobs moved out of the saved jobs by the retention policy, which are not
+            stored again, or None if no job has been archived.
+        pages_crawled (Dict[str, int]): Number of result pages crawled, keyed by search criteria.
+        num_errored_job_extractions (int): Number of job cards with missing fields.
+        num_rejected_job_cards (Dict[str, int]): Number of job cards rejected by the filters, keyed by filter rule.
+        new_job_keys (Set[int]): The job keys of the jobs first stored during this run, which are the only jobs
+            removed when their full description is rejected.
+        num_timeouts (int): Number of requests and searches that were abandoned after their timeout.
+        date_normalizer (utils.PostDateNormalizer): Resolves the posted dates of the crawl against its start time.
+        logger (logging.Logger): Logger for the coordinator.
+        _fetch_slots (Optional[asyncio.Semaphore]): Bounds the number of requests in flight, created by run.
+        _loop (Optional[asyncio.AbstractEventLoop]): The event loop running the crawl.
+        _tasks (List[asyncio.Task]): The search tasks of the running crawl.
+        _cancelled (threading.Event): Set once the crawl has been cancelled.
+    """
+
+    def __init__(self, fetcher: Fetcher, job_filter: JobFilter, jobs: Dict[int, JobRecord], csv_headers: List[str],
+                 rate_limiter: RateLimiter, crawl_delay: int=0, max_pages: int=0, max_concurrent_fetches: int=4,
+                 page_timeout: Optional[float]=60, search_timeout: Optional[float]=None,
+                 page_cache: Optional[PageCache]=None, detail_cache: Optional[JobDetailCache]=None,
+                 detail_fetcher: Optional[Fetcher]=None, near_duplicates: Optional[NearDuplicateIndex]=None,
+                 archive: Optional[JobArchive]=None, replay_from_cache: bool=False):
+        """
+        Initializes the CrawlCoordinator.
+
+        Args:
+            fetcher (Fetcher): Fetches the result pages.
+            job_filter (JobFilter): The compiled filter rules applied to every extracted job.
+            jobs (Dict[int, JobRecord]): Dictionary of job listings, keyed by the integer job key. Updated in place.
+            csv_headers (List[str]): Headers of the job details.
+            rate_limiter (RateLimiter): The rate limiter shared by all requests.
+            crawl_delay (int, optional): Minimum number of seconds between two result pages of the same search. Defaults to 0.
+            max_pages (int, optional): Maximum number of result pages crawled per search, or 0 to crawl every page. Defaults to 0.
+            max_concurrent_fetches (int, optional): Maximum number of requests in flight. Defaults to 4.
+            page_timeout (Optional[float], optional): Number of seconds a single request may take. Defaults to 60.
+            search_timeout (Optional[float], optional): Number of seconds the crawl of a single search may take. Defaults to None.
+            page_cache (Optional[PageCache], optional): The on-disk cache of fetched result pages. Defaults to None.
+            detail_cache (Optional[JobDetailCache], optional): The cache of full job descriptions. Full descriptions
+                are only fetched if provided. Defaults to None.
+            detail_fetcher (Optional[Fetcher], optional): Fetches the job detail pages. Defaults to the fetcher.
+            near_duplicates (Optional[NearDuplicateIndex], optional): The index of the stored jobs, which flags or
+                skips new jobs that are near duplicates of them. Defaults to None.
+            archive (Optional[JobArchive], optional): The archived jobs, which are not stored again. Defaults to None.
+            replay_from_cache (bool, optional): Whether result pages are only read from the page cache. Defaults to False.
+        """
+        self.fetcher = fetcher
+        self.detail_fetcher = detail_fetcher or fetcher
+        self.job_filter = job_filter
+        self.jobs = jobs
+        self.csv_headers = csv_headers
+        self.rate_limiter = rate_limiter
+        self.crawl_delay = crawl_delay
+        self.max_pages = max_pages
+        self.max_concurrent_fetches = max_concurrent_fetches
+        self.page_timeout = page_timeout
+        self.search_timeout = search_timeout
+        self.page_cache = page_cache
+        self.replay_from_cache = replay_from_cache
+        self.detail_cache = detail_cache
+        self.near_duplicates = near_duplicates
+        self.archive = archive
+        self.pages_crawled = {}
+        self.num_errored_job_extractions = 0
+        self.num_rejected_job_cards = {'invalid_link': 0}
+        self.new_job_keys = set()
+        self.num_timeouts = 0
+        self.date_normalizer = utils.PostDateNormalizer()
+        self.logger = logging.getLogger(__name__)
+        self._fetch_slots = None
+        self._loop = None
+        self._tasks = []
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def from_config(cls, config: Dict, jobs: Dict[int, JobRecord]) -> 'CrawlCoordinator':
+        """
+        Creates a CrawlCoordinator from the configuration file.
+
+        Result pages are fetched over plain HTTP, falling back to the browser when the response is blocked or contains
+        no job cards. Detail pages are fetched over plain HTTP only.
+
+        Args:
+            config (Dict): The configuration dictionary loaded from config.json.
+            jobs (Dict[int, JobRecord]): Dictionary of job listings, keyed by the integer job key.
+
+        Returns:
+            CrawlCoordinator: The coordinator.
+        """
+        settings = config.get('coordinator', {})
+        enrichment_settings = config.get('enrichment', {})
+        fetcher, http_fetcher = create_fetchers()
+        detail_cache = None
+        if enrichment_settings.get('enabled'):
+            detail_cache = JobDetailCache(enrichment_settings.get('cache_directory') or 'job_details')
+        near_duplicates = NearDuplicateIndex.from_config(config)
+        if near_duplicates is not None:
+            near_duplicates.sync(jobs)
+
+        return cls(fetcher, JobFilter.from_config(config), jobs, utils.get_csv_headers(config),
+                   RateLimiter(float(settings.get('requests_per_second') or 1)),
+                   crawl_delay=config['crawl_delay'],
+                   max_pages=config['num_pages_to_scrape'],
+                   max_concurrent_fetches=int(settings.get('max_concurrent_fetches') or 4),
+                   page_timeout=float(settings['page_timeout']) if settings.get('page_timeout') else None,
+                   search_timeout=float(settings['search_timeout']) if settings.get('search_timeout') else None,
+                   page_cache=PageCache.from_config(config),
+                   detail_cache=detail_cache,
+                   detail_fetcher=http_fetcher,
+                   near_duplicates=near_duplicates,
+                   archive=JobArchive.from_config(config),
+                   replay_from_cache=config.get('page_cache', {}).get('replay', False))
+
+    async def run(self, search_urls: Dict[str, str]) -> None:
+        """
+        Crawls all searches concurrently until each one has reached its last page, timed out or been cancelled.
+
+        Args:
+            search_urls (Dict[str, str]): The URL of the first result page of each search, keyed by search criteria.
+
+        Returns:
+            None
+        """
+        self._loop = asyncio.get_running_loop()
+        self._fetch_slots = asyncio.Semaphore(self.max_concurrent_fetches)
+        self._tasks = [asyncio.create_task(self.crawl_search_with_timeout(search_criteria, url))
+                       for search_criteria, url in search_urls.items()]
+
+        if self._cancelled.is_set():
+            self._cancel_tasks()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def cancel(self) -> None:
+        """
+        Cancels the running crawl. Safe to call from any thread.
+
+        Returns:
+            None
+        """
+        self._cancelled.set()
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._cancel_tasks)
+            except RuntimeError:
+                pass  # The crawl has already finished and its event loop is closed
+
+    def _cancel_tasks(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+    async def crawl_search_with_timeout(self, search_criteria: str, url: str) -> None:
+        """
+        Crawls a single search, abandoning it once the search timeout has elapsed.
+
+        Args:
+            search_criteria (str): The search criteria stored with the jobs of the search.
+            url (str): The URL of the first result page of the search.
+
+        Returns:
+            None
+        """
+        try:
+            await asyncio.wait_for(self.crawl_search(search_criteria, url), self.search_timeout)
+        except asyncio.TimeoutError:
+            self.num_timeouts += 1
+            self.logger.warning(f"Search timed out after {self.pages_crawled.get(search_criteria, 0)} pages: {search_criteria}")
+
+    async def crawl_search(self, search_criteria: str, url: str) -> None:
+        """
+        Crawls the result pages of a single search, stopping at the last page, the maximum number of pages or the
+        first page that cannot be fetched.
+
+        Args:
+            search_criteria (str): The search criteria stored with the jobs of the search.
+            url (str): The URL of the first result page of the search.
+
+        Returns:
+            None
+        """
+        self.pages_crawled[search_criteria] = 0
+        previous_page_job_links = None
+
+        while self.max_pages == 0 or self.pages_crawled[search_criteria] < self.max_pages:
+            html, from_cache = await self.fetch_result_page(url)
+            if html is None:
+                break
+
+            job_cards = parse_job_cards(html, url)
+            page_job_links = {job_card['job_link'] for job_card in job_cards}
+
+            # The last page is served again when requesting the page after it
+            if not job_cards or page_job_links == previous_page_job_links:
+                break
+
+            self.pages_crawled[search_criteria] += 1
+            previous_page_job_links = page_job_links
+            added_job_keys = self.process_job_cards(job_cards, search_criteria)
+
+            if self.detail_cache:
+                await self.enrich_jobs(added_job_keys)
+
+            url = utils.get_next_page_url(url)
+            if not from_cache:
+                await asyncio.sleep(randint(self.crawl_delay, math.floor(self.crawl_delay * 1.5)))
+
+    async def fetch_result_page(self, url: str) -> Tuple[Optional[str], bool]:
+        """
+        Fetches a result page, from the page cache when a fresh copy of the page is available. In replay mode, cached
+        pages are read regardless of their age, and pages missing from the cache are not fetched from the web.
+
+        Args:
+            url (str): The URL of the result page.
+
+        Returns:
+            Tuple[Optional[str], bool]: The HTML of the page, or None if it could not be fetched, and whether it was
+            read from the page cache.
+        """
+        if self.page_cache:
+            html = self.page_cache.get(url, ignore_ttl=self.replay_from_cache)
+            if html is not None:
+                return html, True
+        if self.replay_from_cache:
+            self.logger.warning(f"Page not found in the page cache, skipping: {url}")
+            return None, False
+
+        html = await self.fetch(self.fetcher, url)
+        if not is_usable_page(html, is_results_page):
+            self.logger.warning(f"Could not fetch the result page: {url}")
+            return None, False
+
+        if self.page_cache:
+            self.page_cache.put(url, strip_scripts(html))
+        return html, False
+
+    async def fetch(self, fetcher: Fetcher, url: str) -> Optional[str]:
+        """
+        Fetches a page in a worker thread once the rate limiter and a free fetch slot allow it.
+
+        Args:
+            fetcher (Fetcher): The fetcher used for the page.
+            url (str): The URL of the page.
+
+        Returns:
+            Optional[str]: The HTML of the page, or None if it could not be fetched within the page timeout.
+        """
+        async with self._fetch_slots:
+            await self.rate_limiter.acquire_async()
+            try:
+                return await asyncio.wait_for(asyncio.to_thread(fetcher.fetch, url), self.page_timeout)
+            except asyncio.TimeoutError:
+                self.num_timeouts += 1
+                self.logger.warning(f"Request timed out after {self.page_timeout} seconds: {url}")
+                return None
+
+    def process_job_cards(self, job_cards: List[Dict[str, Optional[str]]], search_criteria: str) -> Set[int]:
+        """
+        Filters the job cards of a result page and stores the accepted jobs.
+
+        Args:
+            job_cards (List[Dict[str, Optional[str]]]): The parsed job cards, keyed by header.
+            search_criteria (str): The search criteria stored with the jobs.
+
+        Returns:
+            Set[int]: Set of job keys for the jobs added to the results.
+        """
+        added_job_keys = set()
+
+        for job_key, job_details, reason in evaluate_job_cards(job_cards, self.job_filter, self.csv_headers, search_criteria, self.jobs,
+                                                               self.date_normalizer):
+            if reason == 'errored':
+                self.num_errored_job_extractions += 1
+            elif reason is not None:
+                self.num_rejected_job_cards[reason] = self.num_rejected_job_cards.get(reason, 0) + 1
+            elif self.archive is not None and job_key in self.archive:
+                self.num_rejected_job_cards['archived'] = self.num_rejected_job_cards.get('archived', 0) + 1
+            elif self.near_duplicates is not None and not self.near_duplicates.check(job_key, job_details, self.jobs):
+                self.num_rejected_job_cards['near_duplicate'] = self.num_rejected_job_cards.get('near_duplicate', 0) + 1
+            else:
+                if job_key not in self.jobs:
+                    self.new_job_keys.add(job_key)
+                self.jobs[job_key] = JobRecord.from_dict(job_details)
+                added_job_keys.add(job_key)
+                print('\n'.join([f'{header}: {job_details[header]}' for header in self.csv_headers]), '\n')
+
+        return added_job_keys
+
+    async def enrich_jobs(self, job_keys: Set[int]) -> None:
+        """
+        Fetches the full descriptions of the given jobs concurrently and re-applies the years of experience filter to them.
+
+        Jobs first stored during this run that are rejected by their full description are removed from the results.
+        Saved jobs are never removed: those not applied to yet are marked as "Skip" instead.
+
+        Args:
+            job_keys (Set[int]): The job keys of the accepted jobs to enrich.
+
+        Returns:
+            None
+        """
+        records = [self.jobs[job_key] for job_key in job_keys if job_key in self.jobs]
+        descriptions = await asyncio.gather(*[self.get_full_description(record) for record in records])
+
+        num_rejected = reject_by_full_descriptions(
+            self.jobs, job_keys, {record.hash_id: description for record, description in zip(records, descriptions) if description},
+            self.job_filter.has_valid_years_of_experience, self.new_job_keys)
+        if num_rejected:
+            self.num_rejected_job_cards['full_description'] = self.num_rejected_job_cards.get('full_description', 0) + num_rejected
+
+    async def get_full_description(self, record: JobRecord) -> Optional[str]:
+        """
+        Returns the full description of a job, fetching and caching it if it has not been fetched yet.
+
+        Args:
+            record (JobRecord): The job record.
+
+        Returns:
+            Optional[str]: The full description, or None if it could not be fetched or parsed.
+        """
+        description = self.detail_cache.get(record.hash_id)
+        if description is not None:
+            return description
+
+        return store_full_description(self.detail_cache, record.hash_id,
+                                      await self.fetch(self.detail_fetcher, record.job_link))
+
+    def close(self) -> None:
+        """
+        Closes the fetchers, releasing their connections and quitting the web driver if it was started, and stores the
+        signatures of the near duplicate index.
+
+        Returns:
+            None
+        """
+        self.fetcher.close()
+        if self.detail_fetcher is not self.fetcher:
+            self.detail_fetcher.close()
+        if self.near_duplicates is not None:
+            self.near_duplicates.save()
+
+def create_fetchers() -> Tuple[Fetcher, HttpFetcher]:
+    """
+    Creates the fetchers used to crawl without a Scraper.
+
+    Returns:
+        Tuple[Fetcher, HttpFetcher]: The fetcher of result pages, which falls back to the browser when the HTTP response
+        is blocked or contains no job cards, and the underlying HTTP fetcher, used for detail pages.
+    """
+    http_fetcher = HttpFetcher()
+    fetcher = FallbackFetcher(http_fetcher, BrowserFetcher(webdriver.Chrome), is_complete=is_results_page)
+    return fetcher, http_fetcher
+
+def is_results_page(html: str) -> bool:
+    """
+    Returns True if a page contains job cards.
+
+    Args:
+        html (str): The HTML of the page.
+
+    Returns:
+        bool: True if the page contains at least one job card, False otherwise.
+    """
+    return 'job_seen_beacon' in html
+
+def build_search_urls(config: Dict) -> Dict[str, str]:
+    """
+    Builds the URL of the first result page of every search in the 'searches' setting of the configuration file.
+
+    Each search holds the same fields as 'indeed_criteria'. Fields missing from a search are empty.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+
+    Returns:
+        Dict[str, str]: The URL of each search, keyed by search criteria.
+    """
+    search_urls = {}
+    for search in config.get('searches', []):
+        criteria = {field: search.get(field, '') for field in config['indeed_criteria']}
+        url = utils.build_indeed_url(
+            max_days_posted_ago=criteria['max_days_posted_ago'],
+            position=criteria['position'],
+            experience_level=criteria['experience_level'],
+            job_type=criteria['job_type'],
+            location=criteria['location']
+        )
+        search_urls['|'.join(criteria.values())] = url
+    return search_urls
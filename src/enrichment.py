@@ -0,0 +1,374 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import utils
+from fetchers import Fetcher
+from job_record import JobRecord
+from page_cache import atomic_write
+from text_compression import MIN_DICTIONARY_SAMPLES, TextCodec
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/122.0.0.0 Safari/537.36')
+
+class RateLimiter:
+    """A thread-safe rate limiter that spaces calls evenly over time.
+
+    Attributes:
+        min_interval (float): The minimum number of seconds between two calls.
+        _next_time (float): The earliest time, in seconds of time.monotonic(), at which the next call may proceed.
+        _lock (threading.Lock): The lock guarding _next_time.
+    """
+
+    def __init__(self, requests_per_second: float):
+        """
+        Initializes the RateLimiter.
+
+        Args:
+            requests_per_second (float): The maximum number of calls per second. Calls are not limited if 0.
+        """
+        self.min_interval = 1 / requests_per_second if requests_per_second > 0 else 0
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Reserves the next call slot without waiting.
+
+        Returns:
+            float: The number of seconds to wait before the reserved slot.
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_time)
+            self._next_time = slot + self.min_interval
+            return slot - now
+
+    def acquire(self) -> None:
+        """
+        Blocks until the next call slot.
+
+        Returns:
+            None
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """
+        Waits for the next call slot without blocking the event loop.
+
+        Returns:
+            None
+        """
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class JobDetailCache:
+    """A permanent on-disk cache of full job descriptions, keyed by job key, so each posting is fetched only once.
+
+    Descriptions are stored compressed. The first MIN_DICTIONARY_SAMPLES descriptions are compressed on their own,
+    then a dictionary of their common phrases is trained and stored in the cache directory, and the next descriptions
+    are compressed with it. Descriptions stored uncompressed by earlier versions are still read.
+
+    Attributes:
+        directory (str): The root directory of the cache.
+        codec (TextCodec): Compresses the descriptions, with the dictionary of the cache once it is trained.
+        _samples (Optional[List[str]]): The descriptions stored before the dictionary is trained, or None once it is.
+        _lock (threading.Lock): The lock guarding the training of the dictionary.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initializes the JobDetailCache, creating its directory if needed.
+
+        Args:
+            directory (str): The root directory of the cache.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        codec = TextCodec.load(self._dictionary_path())
+        self.codec = codec or TextCodec()
+        self._samples = [] if codec is None else None
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> Optional[str]:
+        """
+        Returns the cached full description of a job.
+
+        Args:
+            job_id (str): The job key stored in the 'hash_id' column.
+
+        Returns:
+            Optional[str]: The full description, or None if the job has not been fetched yet.
+        """
+        try:
+            with open(self._path(job_id), 'rb') as detail_file:
+                data = detail_file.read()
+        except OSError:
+            data = None
+        if data is not None:
+            try:
+                return self.codec.decompress(data)
+            except ValueError:
+                # Compressed with the dictionary another process trained since this cache was opened
+                codec = TextCodec.load(self._dictionary_path())
+                if codec is None or codec.dictionary_id == self.codec.dictionary_id:
+                    return None
+                self.codec = codec
+                self._samples = None
+                return self.get(job_id)
+        try:
+            with open(self._path(job_id, '.txt'), encoding='utf-8') as detail_file:
+                return detail_file.read()
+        except OSError:
+            return None
+
+    def put(self, job_id: str, description: str) -> None:
+        """
+        Stores the full description of a job.
+
+        Args:
+            job_id (str): The job key stored in the 'hash_id' column.
+            description (str): The full description of the job.
+
+        Returns:
+            None
+        """
+        path = self._path(job_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write(path, self.codec.compress(description))
+
+        if self._samples is not None:
+            with self._lock:
+                if self._samples is not None:
+                    self._samples.append(description)
+                    if len(self._samples) >= MIN_DICTIONARY_SAMPLES:
+                        self.codec = TextCodec.train(self._samples).save(self._dictionary_path())
+                        self._samples = None
+
+    def _path(self, job_id: str, suffix: str='.z') -> str:
+        # Spread files over subdirectories so that no directory grows too large
+        return os.path.join(self.directory, job_id[:2], job_id + suffix)
+
+    def _dictionary_path(self) -> str:
+        return os.path.join(self.directory, 'descriptions.zdict')
+
+class JobDescriptionParser(HTMLParser):
+    """Collects the text of the element with the id 'jobDescriptionText' on a job detail page.
+
+    Attributes:
+        depth (int): The nesting depth within the job description element, or 0 when outside of it.
+        parts (List[str]): The text fragments of the job description.
+    """
+
+    # Elements without a closing tag, which must not change the nesting depth
+    VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+    def __init__(self):
+        super().__init__()
+        self.depth = 0
+        self.parts = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in self.VOID_ELEMENTS:
+            if self.depth and tag == 'br':
+                self.parts.append('\n')
+        elif self.depth:
+            self.depth += 1
+        elif ('id', 'jobDescriptionText') in attrs:
+            self.depth = 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.depth and tag not in self.VOID_ELEMENTS:
+            self.depth -= 1
+            self.parts.append('\n')
+
+    def handle_data(self, data: str) -> None:
+        if self.depth:
+            self.parts.append(data)
+
+def extract_job_description_text(html: str) -> Optional[str]:
+    """
+    Extracts the full job description text from a job detail page.
+
+    Args:
+        html (str): The HTML of the job detail page.
+
+    Returns:
+        Optional[str]: The text of the job description, or None if the page does not contain one.
+    """
+    parser = JobDescriptionParser()
+    parser.feed(html)
+    parser.close()
+
+    lines = [' '.join(line.split()) for line in ''.join(parser.parts).splitlines()]
+    text = '\n'.join(line for line in lines if line)
+    return text or None
+
+def fetch_url(url: str, timeout: float=20) -> Optional[str]:
+    """
+    Fetches a page over plain HTTP.
+
+    Args:
+        url (str): The URL of the page.
+        timeout (float, optional): The number of seconds to wait for the response. Defaults to 20.
+
+    Returns:
+        Optional[str]: The HTML of the page, or None if the request failed.
+    """
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.read().decode(response.headers.get_content_charset() or 'utf-8', errors='replace')
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+class JobEnricher:
+    """Fetches the full description of accepted jobs from their detail pages.
+
+    Detail pages are fetched concurrently by a bounded pool of worker threads, and every request waits for a shared
+    rate limiter. Full descriptions are stored in a permanent cache, so each posting is only fetched once.
+
+    Attributes:
+        cache (JobDetailCache): The cache of full job descriptions.
+        rate_limiter (RateLimiter): The rate limiter shared by all detail page requests.
+        max_workers (int): The maximum number of detail pages fetched concurrently.
+        fetch (Callable[[str], Optional[str]]): The function used to fetch the HTML of a page.
+        logger (logging.Logger): Logger for the enricher.
+    """
+
+    def __init__(self, cache: JobDetailCache, rate_limiter: RateLimiter, max_workers: int=4,
+                 fetch: Callable[[str], Optional[str]]=fetch_url):
+        """
+        Initializes the JobEnricher.
+
+        Args:
+            cache (JobDetailCache): The cache of full job descriptions.
+            rate_limiter (RateLimiter): The rate limiter shared by all detail page requests.
+            max_workers (int, optional): The maximum number of detail pages fetched concurrently. Defaults to 4.
+            fetch (Callable[[str], Optional[str]], optional): The function used to fetch the HTML of a page.
+                Defaults to fetch_url.
+        """
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.max_workers = max_workers
+        self.fetch = fetch
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_config(cls, config: Dict, fetcher: Optional[Fetcher]=None) -> Optional['JobEnricher']:
+        """
+        Creates a JobEnricher from the 'enrichment' settings of the configuration file.
+
+        Args:
+            config (Dict): The configuration dictionary loaded from config.json.
+            fetcher (Optional[Fetcher], optional): The fetcher used for detail pages, so that its connections are
+                shared with the scraper. Defaults to fetch_url.
+
+        Returns:
+            Optional[JobEnricher]: The enricher, or None if enrichment is disabled.
+        """
+        settings = config.get('enrichment', {})
+        if not settings.get('enabled'):
+            return None
+
+        return cls(JobDetailCache(settings.get('cache_directory') or 'job_details'),
+                   RateLimiter(float(settings.get('requests_per_second') or 1)),
+                   int(settings.get('max_workers') or 4),
+                   fetcher.fetch if fetcher else fetch_url)
+
+    def get_full_descriptions(self, job_links: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+        """
+        Returns the full descriptions of several jobs, fetching the ones that are not cached yet.
+
+        Args:
+            job_links (Iterable[Tuple[str, str]]): Pairs of job key and job link.
+
+        Returns:
+            Dict[str, str]: The full descriptions, keyed by job key. Jobs whose detail page could not be fetched or
+            parsed are omitted.
+        """
+        descriptions = {}
+        to_fetch = []
+        for job_id, job_link in job_links:
+            description = self.cache.get(job_id)
+            if description is None:
+                to_fetch.append((job_id, job_link))
+            else:
+                descriptions[job_id] = description
+
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for job_id, description in executor.map(self._fetch_description, to_fetch):
+                    if description is not None:
+                        descriptions[job_id] = description
+        return descriptions
+
+    def _fetch_description(self, job_link: Tuple[str, str]) -> Tuple[str, Optional[str]]:
+        """
+        Fetches, parses and caches the full description of a single job.
+
+        Args:
+            job_link (Tuple[str, str]): The job key and the job link.
+
+        Returns:
+            Tuple[str, Optional[str]]: The job key and its full description, or None if it could not be fetched.
+        """
+        job_id, url = job_link
+        self.rate_limiter.acquire()
+        return job_id, store_full_description(self.cache, job_id, self.fetch(url))
+
+def store_full_description(cache: JobDetailCache, job_id: str, html: Optional[str]) -> Optional[str]:
+    """
+    Parses the full description of a job from its fetched detail page and caches it.
+
+    Args:
+        cache (JobDetailCache): The cache of full job descriptions.
+        job_id (str): The job key.
+        html (Optional[str]): The HTML of the detail page, or None if it could not be fetched.
+
+    Returns:
+        Optional[str]: The full description, or None if the page could not be fetched or parsed.
+    """
+    description = extract_job_description_text(html) if html else None
+    if description is None:
+        logging.getLogger(__name__).warning(f"Could not fetch the full description of job {job_id}")
+    else:
+        cache.put(job_id, description)
+    return description
+
+def reject_by_full_descriptions(jobs: Dict[int, JobRecord], job_keys: Iterable[int], descriptions: Mapping[str, str],
+                                has_valid_description: Callable[[str], bool], new_job_keys: Set[int]) -> int:
+    """
+    Re-applies a filter to the full descriptions of enriched jobs, rejecting the jobs that fail it. Jobs that have
+    been applied to, and jobs without a full description, are kept.
+
+    Args:
+        jobs (Dict[int, JobRecord]): Dictionary of job listings, keyed by the integer job key. Updated in place.
+        job_keys (Iterable[int]): The job keys of the enriched jobs.
+        descriptions (Mapping[str, str]): The full descriptions, keyed by job key.
+        has_valid_description (Callable[[str], bool]): Whether a full description passes the filter.
+        new_job_keys (Set[int]): The job keys of the jobs first stored during the current run, which are removed when
+            rejected. Updated in place.
+
+    Returns:
+        int: The number of rejected jobs.
+    """
+    num_rejected = 0
+    for job_key in list(job_keys):
+        record = jobs.get(job_key)
+        description = descriptions.get(record.hash_id) if record else None
+        if description and record.applied != 'Yes' and not has_valid_description(description):
+            utils.reject_enriched_job(jobs, job_key, new_job_keys)
+            num_rejected += 1
+    return num_rejected
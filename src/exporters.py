@@ -0,0 +1,465 @@
+import csv
+import json
+import os
+from typing import Any, Dict, Iterable, List, TextIO
+
+import partitions
+import utils
+from job_log import JobLog
+from job_record import METRIC_FIELD_TYPES, JobRecord
+from near_duplicates import NearDuplicateIndex
+from search_index import SearchIndex
+from seen_jobs import SeenJobsFilter
+
+# Output formats that can be selected in 'csv_settings.output_formats', in the order they are preferred for reading
+OUTPUT_FORMATS = ['excel', 'csv', 'jsonl', 'parquet', 'arrow']
+
+# File extensions of the output formats, used to derive output paths from the Excel output path
+OUTPUT_EXTENSIONS = {'excel': '.xlsx', 'csv': '.csv', 'jsonl': '.jsonl', 'parquet': '.parquet', 'arrow': '.arrow'}
+
+# Columnar output formats, which require the optional pyarrow package
+COLUMNAR_FORMATS = ['parquet', 'arrow']
+
+# Columns whose values repeat across many jobs and are dictionary-encoded in columnar output
+DICTIONARY_ENCODED_FIELDS = ['applied', 'company', 'location', 'search_criteria']
+
+# Number of rows per Parquet row group
+PARQUET_ROW_GROUP_SIZE = 64 * 1024
+
+# Columns users edit in the output files, copied into the job log when the output was modified after the log
+USER_EDITED_FIELDS = ['posted_date', 'applied']
+
+class JobExporter:
+    """Base class of the streaming job exporters.
+
+    Rows are written to a temporary file as they are produced, so memory use does not depend on the number of jobs.
+    The temporary file replaces the output file when the exporter is closed, so readers never observe a partial file.
+    Exporters can be used as context managers; the output file is left untouched if an exception is raised.
+
+    Attributes:
+        path (str): The path of the output file.
+        headers (List[str]): The headers of the exported columns.
+        num_rows (int): The number of rows written.
+        _temp_path (str): The path of the temporary file being written.
+        _file (TextIO): The temporary file being written.
+    """
+
+    def __init__(self, path: str, headers: List[str]):
+        """
+        Initializes the exporter and opens its temporary file.
+
+        Args:
+            path (str): The path of the output file.
+            headers (List[str]): The headers of the exported columns.
+        """
+        self.path = path
+        self.headers = headers
+        self.num_rows = 0
+        self._temp_path = f"{path}.{os.getpid()}.tmp"
+        self._file = open(self._temp_path, 'w', encoding='utf-8', newline='')
+        self.write_header(self._file)
+
+    def write_header(self, output_file: TextIO) -> None:
+        """
+        Writes the start of the file, before any row.
+
+        Args:
+            output_file (TextIO): The file being written.
+
+        Returns:
+            None
+        """
+
+    def write(self, job_record: JobRecord) -> None:
+        """
+        Writes a single job record.
+
+        Args:
+            job_record (JobRecord): The job record to write.
+
+        Returns:
+            None
+        """
+        raise NotImplementedError
+
+    def write_all(self, job_records: Iterable[JobRecord]) -> None:
+        """
+        Writes several job records in order.
+
+        Args:
+            job_records (Iterable[JobRecord]): The job records to write.
+
+        Returns:
+            None
+        """
+        for job_record in job_records:
+            self.write(job_record)
+
+    def close(self) -> None:
+        """
+        Finishes the temporary file and moves it to the output path.
+
+        Returns:
+            None
+        """
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+    def abort(self) -> None:
+        """
+        Discards the temporary file, leaving the output file untouched.
+
+        Returns:
+            None
+        """
+        self._file.close()
+        os.remove(self._temp_path)
+
+    def __enter__(self) -> 'JobExporter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class CsvExporter(JobExporter):
+    """Streams job records to a CSV file with a header row."""
+
+    def write_header(self, output_file: TextIO) -> None:
+        self._writer = csv.writer(output_file)
+        self._writer.writerow(self.headers)
+
+    def write(self, job_record: JobRecord) -> None:
+        self._writer.writerow(job_record.to_dict(self.headers, as_text=True).values())
+        self.num_rows += 1
+
+class JsonlExporter(JobExporter):
+    """Streams job records to a JSON Lines file, with one JSON object per job."""
+
+    def write(self, job_record: JobRecord) -> None:
+        self._file.write(json.dumps(job_record.to_dict(self.headers, as_text=True), ensure_ascii=False))
+        self._file.write('\n')
+        self.num_rows += 1
+
+# Streaming exporters, keyed by output format
+EXPORTERS = {'csv': CsvExporter, 'jsonl': JsonlExporter}
+
+def get_output_formats(config: Dict) -> List[str]:
+    """
+    Returns the selected output formats.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+
+    Returns:
+        List[str]: The selected output formats, in the order of OUTPUT_FORMATS. Defaults to Excel only.
+    """
+    selected = config['csv_settings'].get('output_formats') or ['excel']
+    unknown = set(selected) - set(OUTPUT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown output formats: {sorted(unknown)}")
+    return [output_format for output_format in OUTPUT_FORMATS if output_format in selected]
+
+def get_output_path(config: Dict, output_format: str) -> str:
+    """
+    Returns the output path of a format.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+        output_format (str): One of OUTPUT_FORMATS.
+
+    Returns:
+        str: The '<format>_output_path' setting, or the Excel output path with the extension of the format.
+    """
+    csv_settings = config['csv_settings']
+    if output_format == 'excel':
+        return csv_settings['excel_output_path']
+    return csv_settings.get(f'{output_format}_output_path') or \
+        os.path.splitext(csv_settings['excel_output_path'])[0] + OUTPUT_EXTENSIONS[output_format]
+
+def export_jobs(output_format: str, path: str, headers: List[str], job_records: Dict[int, JobRecord]) -> int:
+    """
+    Streams job records to a file in output order.
+
+    Args:
+        output_format (str): One of the formats in EXPORTERS.
+        path (str): The path of the output file.
+        headers (List[str]): The headers of the exported columns.
+        job_records (Dict[int, JobRecord]): A dictionary of job records, keyed by the integer job key.
+
+    Returns:
+        int: The number of rows written.
+    """
+    with EXPORTERS[output_format](path, headers) as exporter:
+        exporter.write_all(utils.sort_job_records(job_records))
+    return exporter.num_rows
+
+def save_jobs(config: Dict, job_records: Dict[int, JobRecord]) -> None:
+    """
+    Writes job records to the job log and every selected output format, and synchronizes the search index, the near
+    duplicate index and the seen jobs filter with them if they are enabled.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+        job_records (Dict[int, JobRecord]): A dictionary of job records, keyed by the integer job key.
+
+    Returns:
+        None
+    """
+    # The job log is the primary store, so it is written first
+    job_log = JobLog.from_config(config)
+    if job_log is not None:
+        with job_log:
+            job_log.sync(job_records)
+
+    headers = utils.get_csv_headers(config)
+    for output_format in get_output_formats(config):
+        path = get_output_path(config, output_format)
+        if output_format == 'excel':
+            save_jobs_excel(config, job_records)
+        elif output_format in COLUMNAR_FORMATS:
+            export_jobs_columnar(output_format, path, headers, job_records)
+            print(f"Exported {len(job_records)} jobs to {path}")
+        else:
+            num_rows = export_jobs(output_format, path, headers, job_records)
+            print(f"Exported {num_rows} jobs to {path}")
+
+    # The log is marked as written after the output files, so only later changes to them count as edits by the user
+    if job_log is not None:
+        os.utime(job_log.path)
+
+    search_index = SearchIndex.from_config(config)
+    if search_index:
+        with search_index:
+            search_index.sync(job_records)
+
+    near_duplicates = NearDuplicateIndex.from_config(config)
+    if near_duplicates is not None:
+        near_duplicates.sync(job_records)
+        near_duplicates.save()
+
+    seen_jobs = SeenJobsFilter.from_config(config)
+    if seen_jobs is not None:
+        with seen_jobs:
+            seen_jobs.sync(job_records)
+
+def save_jobs_excel(config: Dict, job_records: Dict[int, JobRecord]) -> None:
+    """
+    Writes job records to the Excel output, as a single sheet or as partitions depending on 'csv_settings.partition_by'.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+        job_records (Dict[int, JobRecord]): A dictionary of job records, keyed by the integer job key.
+
+    Returns:
+        None
+    """
+    if partitions.get_partition_settings(config):
+        partitions.write_partitioned_jobs_excel(config, job_records)
+    else:
+        # Partitions written before partitioning was disabled are replaced by a single sheet
+        partitions.remove_partitions(config)
+        utils.write_jobs_excel(get_output_path(config, 'excel'), job_records, utils.get_csv_headers(config))
+
+def load_jobs(config: Dict) -> Dict[int, JobRecord]:
+    """
+    Reads the saved job records from the job log if it is enabled and has been written, otherwise from the first
+    selected output format, preferring Excel. Edits made to the output files since the log was written are merged
+    into the log first.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+
+    Returns:
+        Dict[int, JobRecord]: A dictionary of job records, keyed by the integer job key.
+    """
+    job_log = JobLog.from_config(config)
+    if job_log is not None:
+        with job_log:
+            if len(job_log):
+                merge_output_edits(config, job_log)
+                return job_log.read_jobs()
+    return read_output_jobs(config)
+
+def read_output_jobs(config: Dict) -> Dict[int, JobRecord]:
+    """
+    Reads the saved job records from the first selected output format, preferring Excel.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+
+    Returns:
+        Dict[int, JobRecord]: A dictionary of job records, keyed by the integer job key.
+    """
+    output_format = get_output_formats(config)[0]
+    path = get_output_path(config, output_format)
+    headers = utils.get_csv_headers(config)
+
+    if output_format == 'excel':
+        return partitions.read_partitioned_jobs_excel(config)
+    if not os.path.isfile(path):
+        return {}
+    if output_format in COLUMNAR_FORMATS:
+        return utils.build_job_records(read_jobs_columnar(output_format, path), headers)
+
+    with open(path, encoding='utf-8', newline='') as input_file:
+        if output_format == 'csv':
+            return utils.build_job_records(csv.DictReader(input_file), headers)
+        return utils.build_job_records((json.loads(line) for line in input_file if line.strip()), headers)
+
+def get_output_modified_time(config: Dict) -> float:
+    """
+    Returns the last time the files of the first selected output format were modified, including the partition files
+    of a partitioned Excel output.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+
+    Returns:
+        float: The latest modification time, in seconds since the epoch, or 0 if the output does not exist.
+    """
+    output_format = get_output_formats(config)[0]
+    path = get_output_path(config, output_format)
+    if not os.path.isfile(path):
+        return 0.0
+
+    paths = [path]
+    if output_format == 'excel' and partitions.get_partition_settings(config):
+        paths.extend(os.path.join(os.path.dirname(path), partition.location)
+                     for partition in partitions.read_output_summary(path) if partitions.is_file_location(partition.location))
+    return max(os.path.getmtime(output_path) for output_path in paths if os.path.isfile(output_path))
+
+def merge_output_edits(config: Dict, job_log: JobLog) -> int:
+    """
+    Copies the posted date and applied status that users changed in the output files into the job log, if the output
+    was modified after the log was last written. The output files stay authoritative for these columns, so edits made
+    in the spreadsheet are not overwritten by the next save.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+        job_log (JobLog): The job log. Updated in place.
+
+    Returns:
+        int: The number of jobs whose record was updated.
+    """
+    if not len(job_log) or get_output_modified_time(config) <= os.path.getmtime(job_log.path):
+        return 0
+
+    fields = [field for field in USER_EDITED_FIELDS if field in utils.get_csv_headers(config)]
+    edited_records = {}
+    for job_key, output_record in read_output_jobs(config).items():
+        job_record = job_log.get(job_key)
+        if job_record is None or all(output_record[field] == job_record[field] for field in fields):
+            continue
+        for field in fields:
+            job_record[field] = output_record[field]
+        edited_records[job_key] = job_record
+
+    job_log.append(edited_records)
+    job_log.flush()
+    os.utime(job_log.path)
+    return len(edited_records)
+
+def import_pyarrow() -> Any:
+    """
+    Imports the optional pyarrow package used by the columnar output formats.
+
+    Returns:
+        module: The pyarrow module.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The 'parquet' and 'arrow' output formats require pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+def build_job_table(headers: List[str], job_records: Dict[int, JobRecord]) -> Any:
+    """
+    Builds an Arrow table of job records in output order.
+
+    The 'posted_date' column is stored as a date, the metric columns as numbers with nulls for missing values, and
+    the columns in DICTIONARY_ENCODED_FIELDS are dictionary-encoded, so each distinct company, location and search
+    criteria string is stored only once.
+
+    Args:
+        headers (List[str]): The headers of the exported columns.
+        job_records (Dict[int, JobRecord]): A dictionary of job records, keyed by the integer job key.
+
+    Returns:
+        pyarrow.Table: The table of job records.
+    """
+    pyarrow = import_pyarrow()
+    sorted_job_records = utils.sort_job_records(job_records)
+    columns = []
+
+    for header in headers:
+        values = [job_record.get(header, '') for job_record in sorted_job_records]
+        if header == 'posted_date':
+            columns.append(pyarrow.array([utils.parse_posted_date(value) for value in values], pyarrow.date32()))
+        elif header in METRIC_FIELD_TYPES:
+            arrow_type = pyarrow.int64() if METRIC_FIELD_TYPES[header] is int else pyarrow.float64()
+            columns.append(pyarrow.array([None if value == '' else value for value in values], arrow_type))
+        elif header in DICTIONARY_ENCODED_FIELDS:
+            columns.append(pyarrow.array([str(value) for value in values], pyarrow.string()).dictionary_encode())
+        else:
+            columns.append(pyarrow.array([str(value) for value in values], pyarrow.string()))
+
+    return pyarrow.Table.from_arrays(columns, names=headers)
+
+def export_jobs_columnar(output_format: str, path: str, headers: List[str], job_records: Dict[int, JobRecord]) -> None:
+    """
+    Writes job records to a Parquet file or an Arrow IPC file, replacing the output file atomically.
+
+    Arrow IPC files can be memory-mapped and queried without parsing, while Parquet files are smaller.
+
+    Args:
+        output_format (str): One of COLUMNAR_FORMATS.
+        path (str): The path of the output file.
+        headers (List[str]): The headers of the exported columns.
+        job_records (Dict[int, JobRecord]): A dictionary of job records, keyed by the integer job key.
+
+    Returns:
+        None
+    """
+    pyarrow = import_pyarrow()
+    table = build_job_table(headers, job_records)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        if output_format == 'parquet':
+            pyarrow.parquet.write_table(table, temp_path, row_group_size=PARQUET_ROW_GROUP_SIZE)
+        else:
+            with pyarrow.ipc.new_file(temp_path, table.schema) as writer:
+                writer.write_table(table)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+
+def read_jobs_columnar(output_format: str, path: str) -> List[Dict[str, Any]]:
+    """
+    Reads the rows of a Parquet file or an Arrow IPC file, with posted dates read as dates.
+
+    Args:
+        output_format (str): One of COLUMNAR_FORMATS.
+        path (str): The path of the file.
+
+    Returns:
+        List[Dict[str, Any]]: The rows, keyed by header.
+    """
+    pyarrow = import_pyarrow()
+    if output_format == 'parquet':
+        table = pyarrow.parquet.read_table(path)
+    else:
+        with pyarrow.memory_map(path) as source:
+            table = pyarrow.ipc.open_file(source).read_all()
+
+    return table.to_pylist()
@@ -0,0 +1,323 @@
+import gzip
+import http.client
+import http.cookiejar
+import logging
+import re
+import threading
+import urllib.request
+import zlib
+from email.message import Message
+from typing import Callable, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+DEFAULT_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                   'Chrome/122.0.0.0 Safari/537.36'),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive'
+}
+
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+# Markers of bot verification and challenge pages served instead of the requested content
+BLOCKED_PAGE_REGEX = re.compile(r'cf-challenge|challenge-platform|Just a moment\.\.\.|Additional Verification Required'
+                                r'|Request Blocked|verify you are human', re.IGNORECASE)
+
+class Fetcher:
+    """Base class of the page fetchers used by the scraper.
+
+    A fetcher returns the HTML of a page, or None if the page could not be fetched.
+    """
+
+    def fetch(self, url: str) -> Optional[str]:
+        """
+        Fetches the HTML of a page.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            Optional[str]: The HTML of the page, or None if the page could not be fetched.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Releases the resources held by the fetcher.
+
+        Returns:
+            None
+        """
+
+class HttpFetcher(Fetcher):
+    """Fetches pages over plain HTTP without rendering them.
+
+    Connections are kept alive and reused from a per-host pool, responses are requested gzip-compressed, and cookies
+    set by the server are kept in a cookie jar and sent with later requests. The fetcher is safe to share between threads.
+
+    Attributes:
+        timeout (float): The number of seconds to wait for a response.
+        max_redirects (int): The maximum number of redirects followed per request.
+        max_idle_connections (int): The maximum number of idle connections kept per host.
+        cookie_jar (http.cookiejar.CookieJar): The cookies set by the servers.
+        _idle_connections (Dict[Tuple[str, str], List[http.client.HTTPConnection]]): Idle connections, keyed by scheme and host.
+        _lock (threading.Lock): The lock guarding the connection pool and the cookie jar.
+        logger (logging.Logger): Logger for the fetcher.
+    """
+
+    def __init__(self, timeout: float=20, max_redirects: int=5, max_idle_connections: int=4):
+        """
+        Initializes the HttpFetcher.
+
+        Args:
+            timeout (float, optional): The number of seconds to wait for a response. Defaults to 20.
+            max_redirects (int, optional): The maximum number of redirects followed per request. Defaults to 5.
+            max_idle_connections (int, optional): The maximum number of idle connections kept per host. Defaults to 4.
+        """
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.max_idle_connections = max_idle_connections
+        self.cookie_jar = http.cookiejar.CookieJar()
+        self._idle_connections = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def fetch(self, url: str) -> Optional[str]:
+        """
+        Fetches the HTML of a page, following redirects.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            Optional[str]: The HTML of the page, or None if the request failed or did not return a successful status.
+        """
+        try:
+            for _ in range(self.max_redirects + 1):
+                status, headers, body = self.request(url)
+
+                if status in REDIRECT_STATUSES and headers.get('Location'):
+                    url = urljoin(url, headers['Location'])
+                elif status == 200:
+                    return body.decode(headers.get_content_charset() or 'utf-8', errors='replace')
+                else:
+                    self.logger.warning(f"HTTP {status} returned for {url}")
+                    return None
+        except (http.client.HTTPException, OSError, ValueError) as e:
+            self.logger.warning(f"HTTP request failed for {url}: {e}")
+        return None
+
+    def request(self, url: str) -> Tuple[int, Message, bytes]:
+        """
+        Sends a single GET request over a pooled connection, without following redirects.
+
+        Args:
+            url (str): The URL to request.
+
+        Returns:
+            Tuple[int, Message, bytes]: The status code, the response headers and the decompressed response body.
+        """
+        parts = urlsplit(url)
+        host_key = (parts.scheme, parts.netloc)
+        path = urlunsplit(('', '', parts.path or '/', parts.query, ''))
+
+        cookie_request = urllib.request.Request(url)
+        with self._lock:
+            self.cookie_jar.add_cookie_header(cookie_request)
+        headers = {**DEFAULT_HEADERS, **dict(cookie_request.header_items())}
+
+        connection, reused = self._get_connection(host_key)
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            connection.close()
+            if not reused:
+                raise
+            # The server closed the idle keep-alive connection, so retry once on a new connection
+            connection = self._new_connection(host_key)
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+        except Exception:
+            connection.close()
+            raise
+
+        with self._lock:
+            self.cookie_jar.extract_cookies(response, cookie_request)
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._release_connection(host_key, connection)
+
+        return response.status, response.msg, decompress_body(body, response.getheader('Content-Encoding', ''))
+
+    def close(self) -> None:
+        """
+        Closes all idle connections.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            for connections in self._idle_connections.values():
+                for connection in connections:
+                    connection.close()
+            self._idle_connections.clear()
+
+    def _get_connection(self, host_key: Tuple[str, str]) -> Tuple[http.client.HTTPConnection, bool]:
+        """
+        Takes an idle connection to a host from the pool, or opens a new one.
+
+        Args:
+            host_key (Tuple[str, str]): The scheme and host of the connection.
+
+        Returns:
+            Tuple[http.client.HTTPConnection, bool]: The connection, and whether it was reused from the pool.
+        """
+        with self._lock:
+            connections = self._idle_connections.get(host_key)
+            if connections:
+                return connections.pop(), True
+        return self._new_connection(host_key), False
+
+    def _new_connection(self, host_key: Tuple[str, str]) -> http.client.HTTPConnection:
+        scheme, host = host_key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, timeout=self.timeout)
+        if scheme == 'http':
+            return http.client.HTTPConnection(host, timeout=self.timeout)
+        raise ValueError(f"Unsupported URL scheme: {scheme}")
+
+    def _release_connection(self, host_key: Tuple[str, str], connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            connections = self._idle_connections.setdefault(host_key, [])
+            if len(connections) < self.max_idle_connections:
+                connections.append(connection)
+                return
+        connection.close()
+
+class BrowserFetcher(Fetcher):
+    """Fetches fully rendered pages with a Selenium web driver, started on first use.
+
+    Attributes:
+        driver_factory (Callable[[], webdriver.Chrome]): Starts the Selenium web driver.
+        driver (Optional[webdriver.Chrome]): The Selenium web driver, or None if it has not been started yet.
+        _lock (threading.Lock): The lock serializing access to the web driver, which can only load one page at a time.
+    """
+
+    def __init__(self, driver_factory: Callable):
+        """
+        Initializes the BrowserFetcher.
+
+        Args:
+            driver_factory (Callable[[], webdriver.Chrome]): Starts the Selenium web driver, such as webdriver.Chrome.
+        """
+        self.driver_factory = driver_factory
+        self.driver = None
+        self._lock = threading.Lock()
+
+    def fetch(self, url: str) -> Optional[str]:
+        with self._lock:
+            try:
+                if self.driver is None:
+                    self.driver = self.driver_factory()
+                self.driver.get(url)
+                return self.driver.page_source
+            except Exception:
+                return None
+
+    def close(self) -> None:
+        with self._lock:
+            if self.driver is not None:
+                self.driver.quit()
+                self.driver = None
+
+class FallbackFetcher(Fetcher):
+    """Fetches pages with a primary fetcher, falling back to a second fetcher when the result looks blocked or incomplete.
+
+    Attributes:
+        primary (Fetcher): The fetcher tried first, usually an HttpFetcher.
+        fallback (Fetcher): The fetcher used when the primary result is unusable, usually a BrowserFetcher.
+        is_complete (Callable[[str], bool]): Returns True if a fetched page contains the expected content.
+        num_fallbacks (int): The number of pages fetched with the fallback fetcher.
+    """
+
+    def __init__(self, primary: Fetcher, fallback: Fetcher, is_complete: Callable[[str], bool]=lambda html: True):
+        """
+        Initializes the FallbackFetcher.
+
+        Args:
+            primary (Fetcher): The fetcher tried first.
+            fallback (Fetcher): The fetcher used when the primary result is unusable.
+            is_complete (Callable[[str], bool], optional): Returns True if a fetched page contains the expected content.
+                Defaults to accepting every page that is not blocked.
+        """
+        self.primary = primary
+        self.fallback = fallback
+        self.is_complete = is_complete
+        self.num_fallbacks = 0
+
+    def fetch(self, url: str) -> Optional[str]:
+        html = self.primary.fetch(url)
+        if is_usable_page(html, self.is_complete):
+            return html
+
+        self.num_fallbacks += 1
+        return self.fallback.fetch(url)
+
+    def close(self) -> None:
+        self.primary.close()
+        self.fallback.close()
+
+def is_usable_page(html: Optional[str], is_complete: Callable[[str], bool]=lambda html: True) -> bool:
+    """
+    Returns True if a fetched page is neither missing, blocked nor incomplete.
+
+    Args:
+        html (Optional[str]): The HTML of the page.
+        is_complete (Callable[[str], bool], optional): Returns True if the page contains the expected content.
+            Defaults to accepting every page.
+
+    Returns:
+        bool: True if the page can be used, False otherwise.
+    """
+    return bool(html) and not looks_blocked(html) and is_complete(html)
+
+def looks_blocked(html: str) -> bool:
+    """
+    Returns True if a page looks like a bot verification or blocking page.
+
+    Args:
+        html (str): The HTML of the page.
+
+    Returns:
+        bool: True if the page looks blocked, False otherwise.
+    """
+    return BLOCKED_PAGE_REGEX.search(html) is not None
+
+def decompress_body(body: bytes, content_encoding: str) -> bytes:
+    """
+    Decompresses a response body according to its Content-Encoding header.
+
+    Args:
+        body (bytes): The raw response body.
+        content_encoding (str): The value of the Content-Encoding header.
+
+    Returns:
+        bytes: The decompressed body.
+    """
+    content_encoding = content_encoding.strip().lower()
+    if content_encoding in ('gzip', 'x-gzip'):
+        return gzip.decompress(body)
+    if content_encoding == 'deflate':
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # Some servers send raw deflate data without the zlib header
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
@@ -0,0 +1,388 @@
+import datetime
+import re
+from typing import Dict, Hashable, Iterable, Mapping, MutableMapping, Optional, Pattern, Set, Union
+
+import utils
+from job_columns import JobColumns
+from utils import get_max_annual_salary, get_min_years_of_experience, lowercase_title
+from exporters import load_jobs, save_jobs
+from page_cache import PageCache
+from parallel import DEFAULT_JOB_CHUNK_SIZE, find_rejected_jobs_parallel, reparse_cached_pages
+
+REFILTER_ACTIONS = ['report', 'flag', 'remove']
+
+# Matches the separator between the words of a multi-word excluded keyword in a lowercased title, such as the space or
+# hyphen of 'machine learning' and 'machine-learning'. Titles are scanned joined by newlines, so it never matches one
+KEYWORD_SEPARATOR_PATTERN = r'[^a-z0-9\n]+'
+
+class JobFilter:
+    """A set of job filtering rules compiled once into fast predicates.
+
+    The rules are read from the 'excluded_keywords', 'indeed_criteria.user_years_of_experience' and
+    'filter_rules' fields of the configuration file. Keyword and pattern lists are combined into a single
+    regular expression each, and the company blocklist is stored as a hash set.
+
+    Attributes:
+        excluded_title_regex (Optional[Pattern]): Matches any excluded keyword within a job title lowercased by
+            utils.lowercase_title.
+        max_years_of_experience (Optional[int]): The user's maximum years of experience, or None if not set.
+        company_blocklist (Set[str]): Lowercased company names to exclude.
+        location_include_regex (Optional[Pattern]): Matches locations to keep. All locations are kept if None.
+        location_exclude_regex (Optional[Pattern]): Matches locations to exclude.
+        min_salary (Optional[int]): The minimum annual salary. Jobs without a salary preview are kept.
+        title_include_regex (Optional[Pattern]): Matches titles to keep. All titles are kept if None.
+        max_posting_age_days (Optional[int]): The maximum number of days since the job was posted.
+        reference_date (datetime.date): The date used to compute the age of job postings.
+    """
+
+    def __init__(self, excluded_keywords: Iterable[str]=(), max_years_of_experience: Optional[int]=None,
+                 company_blocklist: Iterable[str]=(), location_include: Iterable[str]=(), location_exclude: Iterable[str]=(),
+                 min_salary: Optional[int]=None, title_include_patterns: Iterable[str]=(), max_posting_age_days: Optional[int]=None,
+                 reference_date: Optional[datetime.date]=None):
+        """
+        Initializes the JobFilter and compiles the rules.
+
+        Args:
+            excluded_keywords (Iterable[str]): Keywords that exclude a job when found in the title.
+            max_years_of_experience (Optional[int]): The user's maximum years of experience, or None if not set.
+            company_blocklist (Iterable[str]): Company names to exclude.
+            location_include (Iterable[str]): Location substrings to keep. All locations are kept if empty.
+            location_exclude (Iterable[str]): Location substrings to exclude.
+            min_salary (Optional[int]): The minimum annual salary.
+            title_include_patterns (Iterable[str]): Regular expressions for titles to keep. All titles are kept if empty.
+            max_posting_age_days (Optional[int]): The maximum number of days since the job was posted.
+            reference_date (Optional[datetime.date]): The date used to compute posting ages. Defaults to today.
+        """
+        # Keywords keep their punctuation, so 'c++' does not match 'C# Developer'
+        keywords = {lowercase_title(keyword) for keyword in excluded_keywords} - {''}
+        self.excluded_title_regex = compile_alternation(
+            [KEYWORD_SEPARATOR_PATTERN.join(re.escape(word) for word in keyword.split(' ')) for keyword in keywords],
+            prefix=r'(?<![a-z0-9])', suffix=r'(?![a-z0-9])')
+        self.max_years_of_experience = max_years_of_experience
+        self.company_blocklist = {company.strip().lower() for company in company_blocklist if company.strip()}
+        self.location_include_regex = compile_alternation([re.escape(location) for location in location_include if location.strip()], re.IGNORECASE)
+        self.location_exclude_regex = compile_alternation([re.escape(location) for location in location_exclude if location.strip()], re.IGNORECASE)
+        self.min_salary = min_salary
+        self.title_include_regex = compile_alternation([f'(?:{pattern})' for pattern in title_include_patterns if pattern.strip()], re.IGNORECASE)
+        self.max_posting_age_days = max_posting_age_days
+        self.reference_date = reference_date or datetime.date.today()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'JobFilter':
+        """
+        Creates a JobFilter from the configuration file contents.
+
+        Args:
+            config (Dict): The configuration dictionary loaded from config.json.
+
+        Returns:
+            JobFilter: The compiled filter.
+        """
+        rules = config.get('filter_rules', {})
+        return cls(
+            excluded_keywords=config['excluded_keywords'],
+            max_years_of_experience=utils.parse_optional_int(config['indeed_criteria']['user_years_of_experience']),
+            company_blocklist=rules.get('company_blocklist', []),
+            location_include=rules.get('location_include', []),
+            location_exclude=rules.get('location_exclude', []),
+            min_salary=utils.parse_optional_int(rules.get('min_salary', '')),
+            title_include_patterns=rules.get('title_include_patterns', []),
+            max_posting_age_days=utils.parse_optional_int(rules.get('max_posting_age_days', ''))
+        )
+
+    def rejection_reason(self, job: Mapping[str, str]) -> Optional[str]:
+        """
+        Returns the name of the first rule that rejects the job.
+
+        Args:
+            job (Mapping[str, str]): The job record, keyed by header.
+
+        Returns:
+            Optional[str]: The name of the rejecting rule, or None if the job passes every rule.
+        """
+        if not self.is_valid_min_years_of_experience(get_min_years_of_experience(job)):
+            return 'years_of_experience'
+        if self.is_excluded_title(str(job.get('title', ''))):
+            return 'excluded_title'
+        return self._remaining_rejection_reason(job)
+
+    def _remaining_rejection_reason(self, job: Mapping[str, str]) -> Optional[str]:
+        """
+        Returns the name of the first rule, other than years of experience and excluded keywords, that rejects the job.
+
+        Args:
+            job (Mapping[str, str]): The job record, keyed by header.
+
+        Returns:
+            Optional[str]: The name of the rejecting rule, or None if the job passes the remaining rules.
+        """
+        if not self.is_included_title(str(job.get('title', ''))):
+            return 'title_include'
+        if self.is_blocked_company(str(job.get('company', ''))):
+            return 'blocked_company'
+        if not self.is_valid_location(str(job.get('location', ''))):
+            return 'location'
+        if not self.is_valid_max_annual_salary(get_max_annual_salary(job)):
+            return 'salary'
+        if not self.is_recent(job.get('posted_date', '')):
+            return 'posting_age'
+        return None
+
+    def find_rejected_jobs(self, jobs: Mapping[Hashable, Mapping[str, str]]) -> Dict[Hashable, str]:
+        """
+        Applies the rules to a whole set of stored jobs at once.
+
+        The jobs are converted to columns and every rule is evaluated over whole columns with NumPy: metrics and posted
+        dates are compared as arrays, company and location rules run once per distinct value, and the excluded keyword
+        rule and the extraction of missing years of experience each run a single regular expression scan.
+
+        Args:
+            jobs (Mapping[Hashable, Mapping[str, str]]): The job records, keyed by job key.
+
+        Returns:
+            Dict[Hashable, str]: The name of the rejecting rule for each rejected job, keyed by job key.
+        """
+        return JobColumns.from_jobs(jobs).find_rejected_jobs(self)
+
+    def accepts(self, job: Mapping[str, str]) -> bool:
+        """
+        Returns True if the job passes every rule.
+
+        Args:
+            job (Mapping[str, str]): The job record, keyed by header.
+
+        Returns:
+            bool: True if the job passes every rule, False otherwise.
+        """
+        return self.rejection_reason(job) is None
+
+    def is_excluded_title(self, title: str) -> bool:
+        """
+        Returns True if the job title contains any excluded keywords.
+
+        Args:
+            title (str): The job title.
+
+        Returns:
+            bool: True if the title contains an excluded keyword, False otherwise.
+        """
+        return self.excluded_title_regex is not None and self.excluded_title_regex.search(lowercase_title(title)) is not None
+
+    def is_included_title(self, title: str) -> bool:
+        """
+        Returns True if the job title matches any of the title include patterns, or if none are configured.
+
+        Args:
+            title (str): The job title.
+
+        Returns:
+            bool: True if the title should be kept, False otherwise.
+        """
+        return self.title_include_regex is None or self.title_include_regex.search(title) is not None
+
+    def has_valid_years_of_experience(self, description: str) -> bool:
+        """
+        Checks if the user's maximum years of experience meets the minimum years of experience mentioned in the description.
+
+        Args:
+            description (str): The job description to be checked.
+
+        Returns:
+            bool: True if the job description meets the years of experience criteria, False otherwise.
+        """
+        return self.is_valid_min_years_of_experience(utils.extract_years_of_experience(description)[0])
+
+    def is_valid_min_years_of_experience(self, min_years: Optional[int]) -> bool:
+        """
+        Checks if the user's maximum years of experience meets the minimum years of experience of a job.
+
+        Args:
+            min_years (Optional[int]): The fewest years of experience mentioned by the job, or None if none are.
+
+        Returns:
+            bool: True if the job meets the years of experience criteria, False otherwise.
+        """
+        if min_years is None:
+            return True
+        return self.max_years_of_experience is not None and self.max_years_of_experience >= min_years
+
+    def is_blocked_company(self, company: str) -> bool:
+        """
+        Returns True if the company is in the company blocklist.
+
+        Args:
+            company (str): The company name.
+
+        Returns:
+            bool: True if the company is blocked, False otherwise.
+        """
+        return company.strip().lower() in self.company_blocklist
+
+    def is_valid_location(self, location: str) -> bool:
+        """
+        Returns True if the location matches the include list, if any, and does not match the exclude list.
+
+        Args:
+            location (str): The job location.
+
+        Returns:
+            bool: True if the location should be kept, False otherwise.
+        """
+        if self.location_include_regex and not self.location_include_regex.search(location):
+            return False
+        return not (self.location_exclude_regex and self.location_exclude_regex.search(location))
+
+    def has_valid_salary(self, salary_preview: str) -> bool:
+        """
+        Returns True if the top of the salary range meets the minimum salary. Jobs without a salary are kept.
+
+        Args:
+            salary_preview (str): The salary preview text of the job.
+
+        Returns:
+            bool: True if the salary should be kept, False otherwise.
+        """
+        salary_range = utils.parse_annual_salary_range(salary_preview)
+        return self.is_valid_max_annual_salary(salary_range[1] if salary_range else None)
+
+    def is_valid_max_annual_salary(self, max_annual_salary: Optional[float]) -> bool:
+        """
+        Returns True if the top of the annual salary range meets the minimum salary. Jobs without a salary are kept.
+
+        Args:
+            max_annual_salary (Optional[float]): The top of the annual salary range, or None if no salary is shown.
+
+        Returns:
+            bool: True if the salary should be kept, False otherwise.
+        """
+        return self.min_salary is None or max_annual_salary is None or max_annual_salary >= self.min_salary
+
+    def is_recent(self, posted_date: Union[datetime.date, str]) -> bool:
+        """
+        Returns True if the job was posted within the maximum posting age.
+
+        Args:
+            posted_date (Union[datetime.date, str]): The posted date of the job, as a date or formatted as '%m/%d/%Y'.
+
+        Returns:
+            bool: True if the posting is recent enough or its date is unknown, False otherwise.
+        """
+        if self.max_posting_age_days is None:
+            return True
+        date = utils.parse_posted_date(posted_date)
+        if date is None:
+            return True
+        return (self.reference_date - date).days <= self.max_posting_age_days
+
+def refilter_jobs(jobs: MutableMapping[Hashable, MutableMapping[str, str]], job_filter: JobFilter, action: str='report',
+                  max_workers: Optional[int]=1, chunk_size: int=DEFAULT_JOB_CHUNK_SIZE) -> Dict[Hashable, str]:
+    """
+    Re-applies the filter rules to stored jobs and prints a report of the jobs that would be removed.
+
+    Jobs that have already been applied to are reported but never flagged or removed.
+
+    Args:
+        jobs (MutableMapping[Hashable, MutableMapping[str, str]]): The stored job records, keyed by job key.
+        job_filter (JobFilter): The filter rules to apply.
+        action (str, optional): 'report' to only print the report, 'flag' to mark rejected jobs as "Skip" in the
+            'applied' column, or 'remove' to delete them. Defaults to 'report'.
+        max_workers (Optional[int], optional): The number of worker processes the jobs are sharded across, or 0 or
+            None to use every core. Defaults to 1.
+        chunk_size (int, optional): The number of jobs filtered per worker task. Defaults to DEFAULT_JOB_CHUNK_SIZE.
+
+    Returns:
+        Dict[Hashable, str]: The name of the rejecting rule for each rejected job, keyed by job key.
+    """
+    if action not in REFILTER_ACTIONS:
+        raise ValueError(f"Unknown re-filter action: {action}")
+
+    rejected = find_rejected_jobs_parallel(job_filter, jobs, max_workers, chunk_size)
+    reason_counts = {}
+    for reason in rejected.values():
+        reason_counts[reason] = reason_counts.get(reason, 0) + 1
+
+    print(f"Re-filtered {len(jobs)} jobs, {len(rejected)} rejected: {reason_counts}")
+
+    num_updated = 0
+    for job_key in rejected:
+        applied = jobs[job_key].get('applied', '')
+        if action == 'flag' and applied == 'No':
+            jobs[job_key]['applied'] = 'Skip'
+            num_updated += 1
+        elif action == 'remove' and applied != 'Yes':
+            del jobs[job_key]
+            num_updated += 1
+
+    if action != 'report':
+        print(f"Number of jobs {'flagged' if action == 'flag' else 'removed'}: {num_updated}")
+    return rejected
+
+def refilter_excel_jobs(config: Dict, action: str='report') -> Dict[Hashable, str]:
+    """
+    Re-applies the current filter rules to the saved jobs without re-scraping.
+
+    Large files are filtered in parallel according to the 'parallel' settings of the configuration file.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+        action (str, optional): One of REFILTER_ACTIONS. The output files are only rewritten for 'flag' and 'remove'.
+            Defaults to 'report'.
+
+    Returns:
+        Dict[Hashable, str]: The name of the rejecting rule for each rejected job, keyed by job key.
+    """
+    settings = config.get('parallel', {})
+    jobs = load_jobs(config)
+    rejected = refilter_jobs(jobs, JobFilter.from_config(config), action, settings.get('max_workers', 0),
+                             int(settings.get('chunk_size') or DEFAULT_JOB_CHUNK_SIZE))
+
+    if action != 'report' and rejected:
+        save_jobs(config, jobs)
+    return rejected
+
+def reparse_cached_excel_jobs(config: Dict) -> Set[int]:
+    """
+    Re-parses every page in the page cache with the current filter rules and merges the accepted jobs into the saved
+    jobs, without fetching anything.
+
+    The pages are parsed in parallel according to the 'parallel' settings of the configuration file.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+
+    Returns:
+        Set[int]: The job keys of the accepted jobs.
+    """
+    page_cache_settings = config.get('page_cache', {})
+    page_cache = PageCache(page_cache_settings.get('directory') or 'page_cache')
+    jobs = load_jobs(config)
+    initial_num_records = len(jobs)
+
+    accepted_job_keys, num_rejected_job_cards = reparse_cached_pages(
+        page_cache, JobFilter.from_config(config), jobs, utils.get_csv_headers(config),
+        '|'.join(config['indeed_criteria'].values()), config.get('parallel', {}).get('max_workers', 0))
+
+    print(f"Re-parsed cached pages, {len(accepted_job_keys)} jobs accepted: {len(jobs) - initial_num_records} new")
+    print(f"Number of filtered job cards: {num_rejected_job_cards}")
+
+    save_jobs(config, jobs)
+    return accepted_job_keys
+
+def compile_alternation(patterns: Iterable[str], flags: int=0, prefix: str='', suffix: str='') -> Optional[Pattern]:
+    """
+    Combines several regular expressions into a single compiled alternation.
+
+    Args:
+        patterns (Iterable[str]): The regular expressions to combine.
+        flags (int, optional): Flags passed to re.compile. Defaults to 0.
+        prefix (str, optional): Pattern placed before the alternation. Defaults to ''.
+        suffix (str, optional): Pattern placed after the alternation. Defaults to ''.
+
+    Returns:
+        Optional[Pattern]: The compiled regular expression, or None if there are no patterns.
+    """
+    # Longest first, so that multi-word keywords take precedence over their prefixes
+    patterns = sorted(set(patterns), key=len, reverse=True)
+    if not patterns:
+        return None
+    return re.compile(f"{prefix}(?:{'|'.join(patterns)}){suffix}", flags)
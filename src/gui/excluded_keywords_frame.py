@@ -1,7 +1,9 @@
+import json
 import threading
 import customtkinter as ctk
 from typing import List
 
+from filters import REFILTER_ACTIONS, refilter_excel_jobs, reparse_cached_excel_jobs
 from .utils_wrapper import update_config_field
 
 class ExcludedKeywordsFrame(ctk.CTkFrame):
@@ -15,6 +17,9 @@ class ExcludedKeywordsFrame(ctk.CTkFrame):
         _update_delay (float): The delay in seconds before updating the configuration file.
         filter_frame (customtkinter.CTkFrame): The frame that contains the filter list.
         keywords_text_box (customtkinter.CTkTextbox): The text box for entering excluded keywords.
+        refilter_action_option_menu (customtkinter.CTkOptionMenu): The option menu for selecting what to do with saved jobs that no longer pass the filters.
+        refilter_button (customtkinter.CTkButton): The button to re-apply the filters to the saved jobs.
+        reparse_button (customtkinter.CTkButton): The button to re-parse the cached result pages with the current filters.
     """
 
     def __init__(self, master: ctk.CTk, font: ctk.CTkFont, values:List[str]):
@@ -95,6 +100,7 @@ class ExcludedKeywordsFrame(ctk.CTkFrame):
         filter_description_frame = ctk.CTkFrame(self, fg_color='transparent')
         filter_description_frame.pack(anchor='center')
         self._create_description_label(font, filter_description_frame)
+        self._create_refilter_frame(font)
 
     def _create_description_label(self, font: ctk.CTkFont, parent_frame: ctk.CTkFrame) -> None:
         """
@@ -108,11 +114,86 @@ class ExcludedKeywordsFrame(ctk.CTkFrame):
             None
         """
         description = ('New scrape results will exclude any job titles that contain any of the excluded keywords.\n\n'
-                       'Previously scraped data will not be deleted if a record contains keywords in the filter list.')
+                       'Previously scraped data is only re-evaluated when the filters are re-applied to the saved jobs below. '
+                       'Jobs that have been applied to are never flagged or removed.')
         description_label = ctk.CTkLabel(parent_frame, fg_color='transparent', text=description, font=font,
                                          justify="left", wraplength=400)
         description_label.pack(side='left', padx=10, pady=(0, 10))
 
+    def _create_refilter_frame(self, font: ctk.CTkFont) -> None:
+        """
+        Creates the frame for re-applying the filters to the jobs saved in the Excel file.
+
+        Args:
+            font (customtkinter.CTkFont): The font used for the text elements in the frame.
+
+        Returns:
+            None
+        """
+        refilter_frame = ctk.CTkFrame(self, fg_color='transparent')
+        refilter_frame.pack(anchor='center', pady=(0, 10))
+
+        self.refilter_action_option_menu = ctk.CTkOptionMenu(refilter_frame, values=[action.capitalize() for action in REFILTER_ACTIONS], font=font)
+        self.refilter_action_option_menu.pack(side='left', padx=(10, 5))
+
+        self.refilter_button = ctk.CTkButton(refilter_frame, text='Re-filter saved jobs', font=font, command=self._start_refilter)
+        self.refilter_button.pack(side='left', padx=5)
+
+        self.reparse_button = ctk.CTkButton(refilter_frame, text='Re-parse cached pages', font=font, command=self._start_reparse)
+        self.reparse_button.pack(side='left', padx=(5, 10))
+
+    def _start_refilter(self) -> None:
+        """
+        Re-applies the filters to the saved jobs in a separate thread.
+
+        Returns:
+            None
+        """
+        self.refilter_button.configure(state=ctk.DISABLED)
+        action = self.refilter_action_option_menu.get().lower()
+        threading.Thread(target=self._refilter, args=(action,)).start()
+
+    def _refilter(self, action: str) -> None:
+        """
+        Re-applies the filters from the configuration file to the saved jobs.
+
+        Args:
+            action (str): One of 'report', 'flag' or 'remove'.
+
+        Returns:
+            None
+        """
+        try:
+            with open('config.json') as config_file:
+                config = json.load(config_file)
+            refilter_excel_jobs(config, action)
+        finally:
+            self.refilter_button.configure(state=ctk.NORMAL)
+
+    def _start_reparse(self) -> None:
+        """
+        Re-parses the cached result pages in a separate thread.
+
+        Returns:
+            None
+        """
+        self.reparse_button.configure(state=ctk.DISABLED)
+        threading.Thread(target=self._reparse).start()
+
+    def _reparse(self) -> None:
+        """
+        Re-parses the cached result pages with the filters from the configuration file and saves the accepted jobs.
+
+        Returns:
+            None
+        """
+        try:
+            with open('config.json') as config_file:
+                config = json.load(config_file)
+            reparse_cached_excel_jobs(config)
+        finally:
+            self.reparse_button.configure(state=ctk.NORMAL)
+
     def _bind_events(self) -> None:
         """
         Binds events to the keywords text box.
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import threading
 from time import sleep
@@ -5,10 +6,13 @@ from time import sleep
 import customtkinter as ctk
 
 from scraper import Scraper
+from coordinator import CrawlCoordinator, build_search_urls
+from exporters import load_jobs, save_jobs
 import utils
 from .indeed_settings_frame import IndeedSettingsFrame
 from .excluded_keywords_frame import ExcludedKeywordsFrame
 from .excel_settings_frame import ExcelSettingsFrame
+from .search_frame import SearchFrame
 from .utils_wrapper import update_config_field, is_valid_numerical_field_input
 
 DEFAULT_NUM_PAGES_SCRAPE = 5
@@ -27,7 +31,8 @@ class MainFrame(ctk.CTk):
     Attributes:
         frames (list): A list of subframes within the main frame.
         scraping_thread (threading.Thread or None): The thread responsible for running the scraper.
-        stop_scraping (bool): A flag to indicate whether the scraping process should be stopped.
+        stop_scraping (threading.Event): Set to indicate that the scraping process should be stopped.
+        coordinator (CrawlCoordinator or None): The coordinator crawling the configured searches, if running.
         default_font (customtkinter.CTkFont): The default font used for widgets in the frame.
         validate_command (function): A function to validate numerical input fields.
         config (dict): The configuration dictionary loaded from the JSON file.
@@ -36,6 +41,7 @@ class MainFrame(ctk.CTk):
         indeed_settings_frame (IndeedSettingsFrame): The subframe for Indeed settings.
         excluded_keywords_frame (ExcludedKeywordsFrame): The subframe for excluded keywords.
         csv_settings_frame (ExcelSettingsFrame): The subframe for CSV settings.
+        search_frame (SearchFrame): The subframe for searching the saved jobs, which stays enabled while scraping.
         scrape_settings_frame (customtkinter.CTkFrame): The frame containing the scrape settings.
         scrape_all_checkbox (customtkinter.CTkCheckBox): The checkbox for scraping all pages.
         num_pages_scrape_frame (customtkinter.CTkFrame): The frame for setting the number of pages to scrape.
@@ -56,7 +62,8 @@ class MainFrame(ctk.CTk):
         super().__init__()
         self.frames = []
         self.scraping_thread = None
-        self.stop_scraping = False
+        self.stop_scraping = threading.Event()
+        self.coordinator = None
         self.default_font = ctk.CTkFont(family='Roboto', size=12)
         self.validate_command = self.register(is_valid_numerical_field_input)
 
@@ -64,7 +71,7 @@ class MainFrame(ctk.CTk):
             self.config = json.load(config_file)
 
         self.title('Job Listing Scraper')
-        self.geometry('800x775')
+        self.geometry('800x1065')
         self.resizable(False, False)
 
         ctk.set_appearance_mode('System')
@@ -80,7 +87,7 @@ class MainFrame(ctk.CTk):
         Initialize all frames within the main frame.
         
         This method sets up the Indeed settings frame, the excluded keywords
-        frame, and the CSV settings frame.
+        frame, the CSV settings frame and the search frame.
 
         Returns:
             None
@@ -88,6 +95,7 @@ class MainFrame(ctk.CTk):
         self.init_indeed_settings_frame()
         self.init_excluded_keywords_frame()
         self.init_excel_settings_frame()
+        self.init_search_frame()
 
     def init_indeed_settings_frame(self) -> None:
         """
@@ -131,6 +139,19 @@ class MainFrame(ctk.CTk):
         self.excel_settings_frame.pack(fill='x', padx=10, pady=(10, 0))
         self.frames.append(self.excel_settings_frame)
 
+    def init_search_frame(self) -> None:
+        """
+        Initialize the search frame.
+
+        This frame allows the user to search the saved jobs. It is not added to the frames disabled while scraping,
+        so the saved jobs can be searched during a scrape.
+
+        Returns:
+            None
+        """
+        self.search_frame = SearchFrame(self, self.default_font)
+        self.search_frame.pack(fill='x', padx=10, pady=(10, 0))
+
     # Footer and Settings Functions
     def create_footer(self) -> None:
         """
@@ -293,7 +314,9 @@ class MainFrame(ctk.CTk):
             self.start_stop_button.configure(text='Stop', text_color='white', fg_color='#ff4d4d', hover_color='#ff8080')
             self.begin_scraping()
         elif self.start_stop_button.cget('text') == 'Stop':
-            self.stop_scraping = True
+            self.stop_scraping.set()
+            if self.coordinator:
+                self.coordinator.cancel()
             while self.scraping_thread:
                 sleep(0.1)
             self.enable_frames()
@@ -309,7 +332,7 @@ class MainFrame(ctk.CTk):
         Returns:
             None
         """
-        self.stop_scraping = True
+        self.stop_scraping.set()
         self.start_stop_button.configure(text='Start', text_color="#008000", fg_color='#4dff4d', hover_color='#3cb043')
 
     def toggle_scrape_all_checkbox(self) -> None:
@@ -411,7 +434,7 @@ class MainFrame(ctk.CTk):
         Returns:
             None
         """
-        self.stop_scraping = False
+        self.stop_scraping.clear()
         self.scraping_thread = threading.Thread(target=self.run_scraper)
         self.scraping_thread.start()
 
@@ -437,42 +460,92 @@ class MainFrame(ctk.CTk):
             location=indeed_criteria['location']
         )
 
-        return Scraper(indeed_url)
+        return Scraper(indeed_url, self.stop_scraping)
 
     def run_scraper(self) -> None:
         """
         Run the scraper to begin extracting job listings.
         
         This method initiates the scraping process and continues until the specified number of pages
-        has been scraped or until the stop_scraping flag is set to True. It also handles updating
+        has been scraped or until the stop_scraping event is set. When several searches are configured,
+        they are crawled concurrently by the crawl coordinator instead. It also handles updating
         the spreadsheet with the scraped data if specified in the configuration.
 
         Returns:
             None
         """
+        with open('config.json') as config_file:
+            self.config = json.load(config_file)
+
+        if self.config.get('searches'):
+            self.run_coordinator()
+            return
+
         scraper = self.setup_scraper()
         num_pages_to_scrape = self.config['num_pages_to_scrape']
         pages_scraped = 0
 
-        while (self.stop_scraping == False) and (num_pages_to_scrape == 0 or pages_scraped < num_pages_to_scrape):
-            extracted_hash_ids = scraper.extract_current_page()
+        while not self.stop_scraping.is_set() and (num_pages_to_scrape == 0 or pages_scraped < num_pages_to_scrape):
+            extracted_job_keys = scraper.extract_current_page()
 
             # Stop parsing when the last page has been parsed twice
-            if self.stop_scraping or extracted_hash_ids == scraper.previous_page_hash_ids:
+            if self.stop_scraping.is_set() or extracted_job_keys == scraper.previous_page_job_keys:
                 break
             else:
-                scraper.previous_page_hash_ids = extracted_hash_ids
+                scraper.previous_page_job_keys = extracted_job_keys
                 scraper.navigate_next_page()
                 pages_scraped += 1
 
         print(f"Number of pages scraped: {pages_scraped}")
         print(f"Number of new records: {len(scraper.jobs) - scraper.initial_num_records}")
-        print(f"Number of errored extractions: {scraper.num_errored_job_extractions}\n")
+        print(f"Number of errored extractions: {scraper.num_errored_job_extractions}")
+        print(f"Number of filtered job cards: {scraper.num_rejected_job_cards}")
+        print(f"Number of pages loaded in the browser after an unusable HTTP response: {scraper.num_browser_fallbacks}\n")
 
         scraper.shutdown()
-    
+        self.finish_scraping(scraper.jobs)
+
+    def run_coordinator(self) -> None:
+        """
+        Crawl every configured search concurrently with the crawl coordinator.
+
+        The coordinator runs on its own event loop in the scraping thread, and is cancelled by the Stop button.
+
+        Returns:
+            None
+        """
+        jobs = load_jobs(self.config)
+        initial_num_records = len(jobs)
+        self.coordinator = CrawlCoordinator.from_config(self.config, jobs)
+        if self.stop_scraping.is_set():
+            self.coordinator.cancel()
+
+        try:
+            asyncio.run(self.coordinator.run(build_search_urls(self.config)))
+        finally:
+            self.coordinator.close()
+
+        print(f"Number of pages scraped: {sum(self.coordinator.pages_crawled.values())}")
+        print(f"Number of new records: {len(jobs) - initial_num_records}")
+        print(f"Number of errored extractions: {self.coordinator.num_errored_job_extractions}")
+        print(f"Number of filtered job cards: {self.coordinator.num_rejected_job_cards}")
+        print(f"Number of timed out requests and searches: {self.coordinator.num_timeouts}\n")
+
+        self.coordinator = None
+        self.finish_scraping(jobs)
+
+    def finish_scraping(self, jobs: dict) -> None:
+        """
+        Save the scraped jobs and reset the frames once the scraping process has ended.
+
+        Args:
+            jobs (dict): The job records, keyed by the integer job key.
+
+        Returns:
+            None
+        """
         if self.config['csv_settings']['update_spreadsheet_on_completion']:
-            utils.write_jobs_excel(self.config['csv_settings']['excel_output_path'], scraper.jobs)
+            save_jobs(self.config, jobs)
 
         self.scraping_thread = None
         self.enable_frames()
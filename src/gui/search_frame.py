@@ -0,0 +1,120 @@
+import json
+import customtkinter as ctk
+
+from search_index import SearchIndex
+
+DEFAULT_NUM_SEARCH_RESULTS = 50
+
+class SearchFrame(ctk.CTkFrame):
+    """A frame for searching the titles, companies and descriptions of the saved jobs.
+
+    Searches run against the full-text search index, so the saved jobs are never read from the output files.
+
+    Attributes:
+        search_entry_field (customtkinter.CTkEntry): The entry field for the search query.
+        search_button (customtkinter.CTkButton): The button to run the search.
+        results_text_box (customtkinter.CTkTextbox): The text box listing the matching jobs.
+    """
+
+    def __init__(self, master: ctk.CTk, font: ctk.CTkFont):
+        """
+        Initializes the SearchFrame.
+
+        Args:
+            master (customtkinter.CTk): The parent widget.
+            font (customtkinter.CTkFont): The font used for the text elements in the frame.
+
+        Returns:
+            None
+        """
+        super().__init__(master)
+        self._create_title_label(font)
+        self._create_search_bar(font)
+        self._create_results_text_box(font)
+
+    def _create_title_label(self, font: ctk.CTkFont) -> None:
+        """
+        Creates the title label for the frame.
+
+        Args:
+            font (customtkinter.CTkFont): The font used for the text elements in the frame.
+
+        Returns:
+            None
+        """
+        title_label = ctk.CTkLabel(self, text='Search Saved Jobs', font=(font, 18))
+        title_label.pack(pady=(10, 10))
+
+    def _create_search_bar(self, font: ctk.CTkFont) -> None:
+        """
+        Creates the entry field and the button for the search query.
+
+        Args:
+            font (customtkinter.CTkFont): The font used for the text elements in the frame.
+
+        Returns:
+            None
+        """
+        search_bar_frame = ctk.CTkFrame(self, fg_color='transparent')
+        search_bar_frame.pack(fill='x', padx=10)
+
+        self.search_entry_field = ctk.CTkEntry(search_bar_frame, font=font,
+                                               placeholder_text='Words or "exact phrases" in the title, company or description')
+        self.search_entry_field.pack(side='left', fill='x', expand=True, padx=(10, 5))
+        self.search_entry_field.bind('<Return>', self._search)
+
+        self.search_button = ctk.CTkButton(search_bar_frame, text='Search', font=font, command=self._search)
+        self.search_button.pack(side='left', padx=(5, 10))
+
+    def _create_results_text_box(self, font: ctk.CTkFont) -> None:
+        """
+        Creates the read-only text box listing the matching jobs.
+
+        Args:
+            font (customtkinter.CTkFont): The font used for the text elements in the frame.
+
+        Returns:
+            None
+        """
+        self.results_text_box = ctk.CTkTextbox(self, font=font, height=150, wrap='word')
+        self.results_text_box.pack(fill='x', padx=20, pady=10)
+        self.results_text_box.configure(state=ctk.DISABLED)
+
+    def _search(self, event=None) -> None:
+        """
+        Searches the saved jobs for the query in the entry field and lists the best matches.
+
+        Args:
+            event: The event that triggered the search, if any.
+
+        Returns:
+            None
+        """
+        with open('config.json') as config_file:
+            config = json.load(config_file)
+
+        search_index = SearchIndex.from_config(config)
+        if search_index is None:
+            self._show_results('The search index is disabled. Set "search_index.enabled" to true in config.json.')
+            return
+
+        with search_index:
+            results = search_index.search(self.search_entry_field.get(), DEFAULT_NUM_SEARCH_RESULTS)
+
+        lines = [f"{result.title} - {result.company}\n{result.job_link}\n{result.snippet}\n" for result in results]
+        self._show_results('\n'.join(lines) or 'No saved jobs match the search.')
+
+    def _show_results(self, text: str) -> None:
+        """
+        Replaces the contents of the results text box.
+
+        Args:
+            text (str): The text to display.
+
+        Returns:
+            None
+        """
+        self.results_text_box.configure(state=ctk.NORMAL)
+        self.results_text_box.delete('1.0', 'end')
+        self.results_text_box.insert('1.0', text)
+        self.results_text_box.configure(state=ctk.DISABLED)
@@ -0,0 +1,178 @@
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import utils
+from job_record import JobRecord
+
+# Fields of a job card that must be present for the card to be processed
+REQUIRED_JOB_CARD_FIELDS = ('job_link', 'description', 'title', 'company', 'location', 'posted_date')
+
+# Elements without a closing tag, which are never pushed onto the element stack
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+class JobCardParser(HTMLParser):
+    """Extracts job cards from the served HTML of an Indeed results page.
+
+    The parser uses the same selectors as the Selenium extraction in Scraper, so that pages fetched over plain HTTP or
+    read from the page cache produce the same values as pages rendered in the browser.
+
+    Attributes:
+        base_url (str): The URL of the page, used to resolve relative job links.
+        job_cards (List[Dict[str, Optional[str]]]): The extracted job cards, keyed by header.
+        _card (Optional[Dict[str, Optional[str]]]): The job card currently being parsed.
+        _stack (List[Tuple[str, Dict[str, str]]]): The open elements within the current job card.
+        _captures (List[Tuple[str, int, List[str]]]): The fields being captured, with the stack depth of their element and their text.
+    """
+
+    def __init__(self, base_url: str):
+        """
+        Initializes the JobCardParser.
+
+        Args:
+            base_url (str): The URL of the page, used to resolve relative job links.
+        """
+        super().__init__()
+        self.base_url = base_url
+        self.job_cards = []
+        self._card = None
+        self._stack = []
+        self._captures = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        attributes = {name: value or '' for name, value in attrs}
+
+        if self._card is None:
+            if tag == 'div' and 'job_seen_beacon' in attributes.get('class', '').split():
+                self._card = {field: None for field in REQUIRED_JOB_CARD_FIELDS}
+                self._card['salary_preview'] = None
+                self._stack = [(tag, attributes)]
+            return
+
+        if tag == 'br':
+            self._append_text(' ')
+        if tag in VOID_ELEMENTS:
+            return
+
+        if tag == 'a' and self._card['job_link'] is None and 'href' in attributes:
+            self._card['job_link'] = urljoin(self.base_url, attributes['href'])
+
+        self._stack.append((tag, attributes))
+        field = self._match_field(tag, attributes)
+        if field and self._card[field] is None and all(capture[0] != field for capture in self._captures):
+            self._captures.append((field, len(self._stack), []))
+        # Text of adjacent elements is separated, as it would be when rendered
+        self._append_text(' ')
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._card is None or tag in VOID_ELEMENTS:
+            return
+
+        # Tolerate unclosed elements by closing everything up to the matching start tag
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                del self._stack[index:]
+                break
+        else:
+            return
+
+        self._append_text(' ')
+        for capture in [capture for capture in self._captures if capture[1] > len(self._stack)]:
+            field, _, parts = capture
+            self._card[field] = ' '.join(''.join(parts).split())
+            self._captures.remove(capture)
+
+        if not self._stack:
+            self.job_cards.append(self._card)
+            self._card = None
+            self._captures = []
+
+    def handle_data(self, data: str) -> None:
+        if self._card is not None:
+            self._append_text(data)
+
+    def _append_text(self, text: str) -> None:
+        for _, _, parts in self._captures:
+            parts.append(text)
+
+    def _match_field(self, tag: str, attributes: Dict[str, str]) -> Optional[str]:
+        """
+        Returns the job card field an element holds, if any.
+
+        Args:
+            tag (str): The tag name of the element.
+            attributes (Dict[str, str]): The attributes of the element.
+
+        Returns:
+            Optional[str]: The header of the field, or None if the element does not hold a field.
+        """
+        classes = attributes.get('class', '').split()
+        test_id = attributes.get('data-testid')
+
+        if tag == 'tr' and 'underShelfFooter' in classes:
+            return 'description'
+        if tag == 'h2' and 'jobTitle' in classes:
+            return 'title'
+        if tag == 'span' and test_id == 'company-name':
+            return 'company'
+        if tag == 'div' and test_id == 'text-location':
+            return 'location'
+        if tag == 'span' and test_id == 'myJobsStateDate':
+            return 'posted_date'
+        if tag == 'div' and test_id == 'attribute_snippet_testid' and \
+                any('salary-snippet-container' in element_attributes.get('class', '') for _, element_attributes in self._stack[:-1]):
+            return 'salary_preview'
+        return None
+
+def parse_job_cards(html: str, base_url: str) -> List[Dict[str, Optional[str]]]:
+    """
+    Extracts the job cards from the HTML of an Indeed results page.
+
+    Args:
+        html (str): The HTML of the results page.
+        base_url (str): The URL of the page, used to resolve relative job links.
+
+    Returns:
+        List[Dict[str, Optional[str]]]: The job cards, keyed by header. Missing fields are None, except for the
+        salary preview, which defaults to 'N/A'.
+    """
+    parser = JobCardParser(base_url)
+    parser.feed(html)
+    parser.close()
+
+    for job_card in parser.job_cards:
+        job_card['salary_preview'] = job_card['salary_preview'] or 'N/A'
+    return parser.job_cards
+
+def evaluate_job_cards(job_cards: List[Dict[str, Optional[str]]], job_filter, headers: List[str], search_criteria: str,
+                       jobs: Optional[Dict[int, JobRecord]]=None, date_normalizer: Optional[utils.PostDateNormalizer]=None
+                       ) -> List[Tuple[Optional[int], Optional[Dict[str, str]], Optional[str]]]:
+    """
+    Builds the job details of parsed job cards and applies the filter rules to them.
+
+    Args:
+        job_cards (List[Dict[str, Optional[str]]]): The parsed job cards, keyed by header.
+        job_filter (JobFilter): The filter rules to apply.
+        headers (List[str]): Headers of the job details.
+        search_criteria (str): The search criteria stored with the jobs.
+        jobs (Optional[Dict[int, JobRecord]], optional): The stored job records, whose posted date and applied status
+            are kept. Defaults to None.
+        date_normalizer (Optional[utils.PostDateNormalizer], optional): The normalizer of the run, which resolves the
+            posted dates. Defaults to None, which resolves the cards of the page against the current time.
+
+    Returns:
+        List[Tuple[Optional[int], Optional[Dict[str, str]], Optional[str]]]: For every job card, in page order, the
+        integer job key and job details, or None for cards that could not be extracted, and the name of the
+        rejecting rule, or None if the job was accepted. Cards with missing fields are rejected as 'errored'.
+    """
+    date_normalizer = date_normalizer or utils.PostDateNormalizer()
+    results = []
+    for job_card in job_cards:
+        if any(job_card[field] is None for field in REQUIRED_JOB_CARD_FIELDS):
+            results.append((None, None, 'errored'))
+        elif not utils.is_valid_indeed_job_link_structure(job_card['job_link']):
+            results.append((None, None, 'invalid_link'))
+        else:
+            job_key, job_details = utils.build_job_details(job_card, headers, search_criteria, jobs or {}, date_normalizer)
+            results.append((job_key, job_details, job_filter.rejection_reason(job_details)))
+    return results
@@ -0,0 +1,339 @@
+import datetime
+import re
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Pattern, Tuple
+
+import numpy as np
+
+import utils
+
+# Rejection reasons of the rules, in the order JobFilter.rejection_reason applies them
+REJECTION_REASONS = ['years_of_experience', 'excluded_title', 'title_include', 'blocked_company', 'location', 'salary',
+                     'posting_age']
+
+class JobColumns:
+    """A columnar, read-only view of a set of jobs, for filtering and aggregating the whole history at once.
+
+    Numeric fields are stored as NumPy arrays, with NaN for missing values, and posted dates as day ordinals, with 0
+    for jobs without a valid date. Companies, locations and applied statuses repeat across many jobs and are stored as
+    categories: an array of codes into a list of distinct values, so a rule on these fields is evaluated once per
+    distinct value. Predicates return boolean arrays that can be combined with '&', '|' and '~'.
+
+    Attributes:
+        job_keys (List[Hashable]): The job key of each row.
+        posted_ordinals (np.ndarray): The proleptic Gregorian ordinal of the posted date of each row, or 0.
+        min_years_of_experience (np.ndarray): The fewest years of experience mentioned by each job, or NaN.
+        max_years_of_experience (np.ndarray): The most years of experience mentioned by each job, or NaN.
+        min_annual_salary (np.ndarray): The bottom of the annual salary range of each job, or NaN.
+        max_annual_salary (np.ndarray): The top of the annual salary range of each job, or NaN.
+        titles (List[str]): The title of each job.
+        normalized_titles (List[str]): The title of each job, normalized as by utils.normalize_title.
+        lowercase_titles (List[str]): The title of each job, lowercased as by utils.lowercase_title.
+        categories (Dict[str, List[str]]): The distinct values of 'company', 'location' and 'applied'.
+        codes (Dict[str, np.ndarray]): The index of the value of each row in categories, for the same fields.
+    """
+
+    def __init__(self, job_keys: List[Hashable], columns: Dict[str, List]):
+        """
+        Initializes the JobColumns from the values of each row.
+
+        Args:
+            job_keys (List[Hashable]): The job key of each row.
+            columns (Dict[str, List]): The values of each row for 'posted_ordinal', the metric fields, 'title',
+                'company', 'location' and 'applied'. Missing metrics are None or ''.
+        """
+        self.job_keys = job_keys
+        self.posted_ordinals = np.array(columns['posted_ordinal'], dtype=np.int64)
+        for field in ('min_years_of_experience', 'max_years_of_experience', 'min_annual_salary', 'max_annual_salary'):
+            setattr(self, field, to_float_array(columns[field]))
+        self.titles = columns['title']
+        normalized_titles = {title: utils.normalize_title(title) for title in set(self.titles)}
+        self.normalized_titles = [normalized_titles[title] for title in self.titles]
+        lowercase_titles = {title: utils.lowercase_title(title) for title in normalized_titles}
+        self.lowercase_titles = [lowercase_titles[title] for title in self.titles]
+        self.categories = {}
+        self.codes = {}
+        for field in ('company', 'location', 'applied'):
+            self.categories[field], self.codes[field] = encode_categories(columns[field])
+
+    @classmethod
+    def from_jobs(cls, jobs: Mapping[Hashable, Mapping[str, str]]) -> 'JobColumns':
+        """
+        Creates the columns of a set of job records.
+
+        Stored metrics are used as they are. The years of experience of records without them are extracted with a
+        single regular expression scan over all their descriptions.
+
+        Args:
+            jobs (Mapping[Hashable, Mapping[str, str]]): The job records, keyed by job key.
+
+        Returns:
+            JobColumns: The columns of the jobs, in the iteration order of jobs.
+        """
+        job_keys = list(jobs)
+        records = [jobs[job_key] for job_key in job_keys]
+        columns = {field: [str(record.get(field, '')) for record in records]
+                   for field in ('title', 'company', 'location', 'applied')}
+        posted_dates = map(utils.parse_posted_date, [record.get('posted_date', '') for record in records])
+        columns['posted_ordinal'] = [posted_date.toordinal() if posted_date else 0 for posted_date in posted_dates]
+
+        # Missing fields are read as None, while stored metrics that were not found are ''
+        for field in ('min_years_of_experience', 'max_years_of_experience', 'min_annual_salary', 'max_annual_salary'):
+            columns[field] = [record.get(field) for record in records]
+
+        for row, record in enumerate(records):
+            if columns['max_annual_salary'][row] is None:
+                salary_range = utils.parse_annual_salary_range(str(record.get('salary_preview', ''))) or ('', '')
+                columns['min_annual_salary'][row], columns['max_annual_salary'][row] = salary_range
+
+        # '\x00' is neither whitespace nor a word character, so matches cannot span two descriptions
+        unextracted_rows = [row for row, min_years in enumerate(columns['min_years_of_experience']) if min_years is None]
+        descriptions = [str(records[row].get('description', '')) for row in unextracted_rows]
+        for index, match in utils.find_matches_by_row(utils.YEARS_OF_EXPERIENCE_REGEX, descriptions, '\x00'):
+            row, years = unextracted_rows[index], int(match.group(1))
+            min_years, max_years = columns['min_years_of_experience'][row], columns['max_years_of_experience'][row]
+            columns['min_years_of_experience'][row] = years if min_years is None else min(min_years, years)
+            columns['max_years_of_experience'][row] = years if max_years is None else max(max_years, years)
+
+        return cls(job_keys, columns)
+
+    def __len__(self) -> int:
+        return len(self.job_keys)
+
+    def select(self, mask: np.ndarray) -> List[Hashable]:
+        """
+        Returns the job keys of the rows selected by a predicate.
+
+        Args:
+            mask (np.ndarray): A boolean array with one value per row.
+
+        Returns:
+            List[Hashable]: The job keys of the selected rows, in row order.
+        """
+        return [self.job_keys[row] for row in np.flatnonzero(mask)]
+
+    def accepts_years_of_experience(self, max_years_of_experience: Optional[int]) -> np.ndarray:
+        """
+        Returns which jobs the user's maximum years of experience qualifies for.
+
+        Args:
+            max_years_of_experience (Optional[int]): The user's maximum years of experience, or None if not set.
+
+        Returns:
+            np.ndarray: True for jobs that mention no years of experience or at most the user's.
+        """
+        no_years = np.isnan(self.min_years_of_experience)
+        if max_years_of_experience is None:
+            return no_years
+        with np.errstate(invalid='ignore'):
+            return no_years | (self.min_years_of_experience <= max_years_of_experience)
+
+    def accepts_salary(self, min_salary: Optional[float]) -> np.ndarray:
+        """
+        Returns which jobs have an annual salary range reaching a minimum salary.
+
+        Args:
+            min_salary (Optional[float]): The minimum annual salary, or None to accept every job.
+
+        Returns:
+            np.ndarray: True for jobs without a salary or whose salary range reaches the minimum.
+        """
+        if min_salary is None:
+            return np.ones(len(self), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            return np.isnan(self.max_annual_salary) | (self.max_annual_salary >= min_salary)
+
+    def posted_between(self, start: Optional[datetime.date]=None, end: Optional[datetime.date]=None,
+                       include_undated: bool=False) -> np.ndarray:
+        """
+        Returns which jobs were posted within a date range.
+
+        Args:
+            start (Optional[datetime.date], optional): The first date of the range, or None for no lower bound.
+            end (Optional[datetime.date], optional): The last date of the range, or None for no upper bound.
+            include_undated (bool, optional): Whether jobs without a valid posted date are selected. Defaults to False.
+
+        Returns:
+            np.ndarray: True for jobs posted within the range.
+        """
+        dated = self.posted_ordinals > 0
+        mask = dated.copy()
+        if start is not None:
+            mask &= self.posted_ordinals >= start.toordinal()
+        if end is not None:
+            mask &= self.posted_ordinals <= end.toordinal()
+        return mask | ~dated if include_undated else mask
+
+    def category_matches(self, field: str, predicate) -> np.ndarray:
+        """
+        Evaluates a predicate once per distinct value of a categorical field.
+
+        Args:
+            field (str): 'company', 'location' or 'applied'.
+            predicate (Callable[[str], bool]): The predicate applied to each distinct value.
+
+        Returns:
+            np.ndarray: The result of the predicate for the value of each row.
+        """
+        category_mask = np.array([bool(predicate(value)) for value in self.categories[field]], dtype=bool)
+        return category_mask[self.codes[field]] if len(category_mask) else np.zeros(len(self), dtype=bool)
+
+    def company_in(self, companies: Iterable[str]) -> np.ndarray:
+        """
+        Returns which jobs are from one of several companies, ignoring case and surrounding whitespace.
+
+        Args:
+            companies (Iterable[str]): The company names.
+
+        Returns:
+            np.ndarray: True for jobs of the companies.
+        """
+        companies = {company.strip().lower() for company in companies}
+        return self.category_matches('company', lambda company: company.strip().lower() in companies)
+
+    def location_matches(self, regex: Pattern) -> np.ndarray:
+        """
+        Returns which jobs have a location matching a regular expression.
+
+        Args:
+            regex (Pattern): The regular expression, searched within the location.
+
+        Returns:
+            np.ndarray: True for jobs whose location matches.
+        """
+        return self.category_matches('location', lambda location: regex.search(location))
+
+    def title_matches(self, regex: Pattern, normalized: bool=False, lowercase: bool=False) -> np.ndarray:
+        """
+        Returns which jobs have a title matching a regular expression.
+
+        Normalized and lowercased titles contain no newline, so they are searched with a single scan over all of them
+        joined by newlines. Raw titles may be matched by arbitrary user patterns, including anchors, so each distinct
+        title is searched on its own.
+
+        Args:
+            regex (Pattern): The regular expression, searched within the title. When searching normalized or
+                lowercased titles, it must not match a newline.
+            normalized (bool, optional): Whether to search the normalized titles. Defaults to False.
+            lowercase (bool, optional): Whether to search the lowercased titles. Defaults to False.
+
+        Returns:
+            np.ndarray: True for jobs whose title matches.
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        if normalized or lowercase:
+            titles = self.normalized_titles if normalized else self.lowercase_titles
+            for row, _ in utils.find_matches_by_row(regex, titles, '\n'):
+                mask[row] = True
+        else:
+            matches = {}
+            for row, title in enumerate(self.titles):
+                if title not in matches:
+                    matches[title] = regex.search(title) is not None
+                mask[row] = matches[title]
+        return mask
+
+    def keyword_flags(self, keywords: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Returns which jobs mention each of several keywords in their normalized title, with a single scan.
+
+        Args:
+            keywords (Iterable[str]): The keywords, matched as whole words like the excluded keywords.
+
+        Returns:
+            Dict[str, np.ndarray]: The rows whose title contains the keyword, keyed by keyword.
+        """
+        keywords = {utils.normalize_title(keyword): keyword for keyword in keywords}
+        keywords.pop('', None)
+        flags = {keyword: np.zeros(len(self), dtype=bool) for keyword in keywords.values()}
+        if not keywords:
+            return flags
+
+        # Longest first, so that multi-word keywords take precedence over their prefixes
+        alternation = '|'.join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+        regex = re.compile(f'(?<![a-z0-9])({alternation})(?![a-z0-9])')
+        for row, match in utils.find_matches_by_row(regex, self.normalized_titles, '\n'):
+            flags[keywords[match.group(1)]][row] = True
+        return flags
+
+    def find_rejected_jobs(self, job_filter) -> Dict[Hashable, str]:
+        """
+        Applies the rules of a JobFilter to every job at once.
+
+        Args:
+            job_filter (JobFilter): The filter rules to apply.
+
+        Returns:
+            Dict[Hashable, str]: The name of the first rule rejecting each rejected job, keyed by job key, as returned
+            by JobFilter.rejection_reason.
+        """
+        rejected = {
+            'years_of_experience': ~self.accepts_years_of_experience(job_filter.max_years_of_experience),
+            'salary': ~self.accepts_salary(job_filter.min_salary)
+        }
+        if job_filter.excluded_title_regex:
+            rejected['excluded_title'] = self.title_matches(job_filter.excluded_title_regex, lowercase=True)
+        if job_filter.title_include_regex:
+            rejected['title_include'] = ~self.title_matches(job_filter.title_include_regex)
+        if job_filter.company_blocklist:
+            rejected['blocked_company'] = self.company_in(job_filter.company_blocklist)
+        if job_filter.location_include_regex or job_filter.location_exclude_regex:
+            rejected['location'] = ~self.category_matches('location', job_filter.is_valid_location)
+        if job_filter.max_posting_age_days is not None:
+            start = job_filter.reference_date - datetime.timedelta(days=job_filter.max_posting_age_days)
+            rejected['posting_age'] = ~self.posted_between(start, include_undated=True)
+
+        # Rules are applied from last to first, so the first rule rejecting a job names it
+        reasons = np.full(len(self), -1, dtype=np.int8)
+        for index in reversed(range(len(REJECTION_REASONS))):
+            mask = rejected.get(REJECTION_REASONS[index])
+            if mask is not None:
+                reasons[mask] = index
+
+        return {self.job_keys[row]: REJECTION_REASONS[reasons[row]] for row in np.flatnonzero(reasons >= 0)}
+
+def encode_categories(values: List[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Encodes the values of a categorical field.
+
+    Args:
+        values (List[str]): The value of each row.
+
+    Returns:
+        Tuple[List[str], np.ndarray]: The distinct values, in order of first appearance, and the index of the value of
+        each row among them.
+    """
+    categories = {}
+    codes = np.fromiter((categories.setdefault(value, len(categories)) for value in values), dtype=np.int32,
+                        count=len(values))
+    return list(categories), codes
+
+def to_float_array(values: List) -> np.ndarray:
+    """
+    Converts the stored values of a metric field to an array of numbers.
+
+    Args:
+        values (List[Any]): The value of each row: a number, a numeric string, or None or '' if missing.
+
+    Returns:
+        np.ndarray: The values as float64, with NaN for missing or invalid values.
+    """
+    values = [None if value == '' else value for value in values]
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([to_number(value) for value in values], dtype=np.float64)
+
+def to_number(value) -> Optional[float]:
+    """
+    Converts a stored metric to a number.
+
+    Args:
+        value (Any): The stored metric, a number or ''.
+
+    Returns:
+        Optional[float]: The number, or None if the value is empty or not a number.
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,469 @@
+import datetime
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from job_record import JOB_RECORD_FIELDS, JobRecord, JobStore
+from text_compression import MAX_DICTIONARY_SAMPLES, MIN_DICTIONARY_SAMPLES, CompressedText, TextCodec
+
+# First bytes of a job log file
+LOG_MAGIC = b'JOBLOG1\n'
+
+# Header of every record of the log: the job key and the length of the payload, or TOMBSTONE_LENGTH for a removal
+RECORD_HEADER = struct.Struct('<QI')
+TOMBSTONE_LENGTH = 0xFFFFFFFF
+
+# Header of the index file: magic, number of entries and size of the log covered by the index
+INDEX_HEADER = struct.Struct('<8sQQ')
+INDEX_MAGIC = b'JOBIDX1\n'
+
+# Separates the JSON of a record payload from its compressed description. JSON never contains a raw NUL byte
+DESCRIPTION_SEPARATOR = b'\x00'
+
+# Fields stored in the JSON of a record payload whose description is compressed
+_JSON_FIELDS = tuple(field for field in JOB_RECORD_FIELDS if field != 'description')
+
+# Encodes record payloads. Reused, since json.dumps creates an encoder per call when given options
+RECORD_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+# Entries of the index file, sorted by job key
+INDEX_DTYPE = np.dtype([('key', '<u8'), ('offset', '<u8'), ('length', '<u4'), ('checksum', '<u4')])
+
+# The log is compacted when it is larger than this many times the size of its live records
+COMPACTION_RATIO = 2
+
+# Logs smaller than this are never compacted
+MIN_COMPACTION_SIZE = 1 << 20
+
+class JobLog:
+    """An append-only log of job records, with a memory-mapped index of the offset of each job key.
+
+    Every change appends a record to the end of the log, the JSON of the job or a tombstone for a removal, so writes
+    are sequential and the existing records are never rewritten. The index maps each job key to its latest record and
+    is stored next to the log, sorted by job key, so it is mapped and searched without being read. Records appended
+    after the index was last written are found by scanning the end of the log when it is opened, so an interrupted
+    run loses nothing, and a truncated last record is dropped.
+
+    Opening the log only maps these two files, so looking up a few jobs of a history of millions takes milliseconds.
+    Once the log is mostly replaced records, it is compacted into a new log holding the latest records only.
+
+    Once the log is written with enough jobs, a dictionary of the phrases their descriptions share is trained and
+    stored next to the log with a '.zdict' suffix, and descriptions are then compressed with it. Records read from the
+    log keep their description compressed until it is read, and are written back without compressing it again.
+
+    Attributes:
+        path (str): The path of the log. The index is stored at the same path with a '.idx' suffix.
+        codec (Optional[TextCodec]): Compresses the descriptions, or None before the dictionary is trained.
+        _entries (np.ndarray): The memory-mapped entries of the index file, sorted by job key.
+        _indexed_size (int): The size of the log covered by the index file.
+        _tail (Dict[int, Optional[Tuple[int, int, int]]]): The offset, payload length and checksum of the records
+            appended after the index file was written, or None for removed jobs, keyed by job key.
+        _num_jobs (int): The number of jobs in the log.
+        _data (Optional[mmap.mmap]): The memory-mapped log, or None before the first read.
+        _log_file (Optional[BinaryIO]): The log opened for appending, or None before the first write.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes the JobLog, opening the log and its index, and creating an empty log if it does not exist.
+
+        Args:
+            path (str): The path of the log.
+        """
+        self.path = path
+        self._data = None
+        self._log_file = None
+        self.codec = TextCodec.load(f"{path}.zdict")
+        if not os.path.isfile(path):
+            with open(path, 'wb') as log_file:
+                log_file.write(LOG_MAGIC)
+
+        if not self._open_index():
+            self._entries = np.zeros(0, dtype=INDEX_DTYPE)
+            self._indexed_size = len(LOG_MAGIC)
+        self._tail = {}
+        self._num_jobs = len(self._entries)
+        self._scan_tail()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['JobLog']:
+        """
+        Creates a JobLog from the 'job_log' settings of the configuration file.
+
+        Args:
+            config (Dict): The configuration dictionary loaded from config.json.
+
+        Returns:
+            Optional[JobLog]: The job log, or None if it is disabled.
+        """
+        settings = config.get('job_log', {})
+        if not settings.get('enabled'):
+            return None
+        return cls(settings.get('path') or 'jobs.log')
+
+    def __len__(self) -> int:
+        return self._num_jobs
+
+    def __contains__(self, job_key: object) -> bool:
+        return self._find(job_key) is not None
+
+    def __enter__(self) -> 'JobLog':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def keys(self) -> List[int]:
+        """
+        Returns the job keys of the jobs in the log.
+
+        Returns:
+            List[int]: The integer job keys.
+        """
+        tail_keys = np.fromiter(self._tail, dtype=np.uint64, count=len(self._tail))
+        indexed_keys = self._entries['key'][~np.isin(self._entries['key'], tail_keys)].tolist()
+        return indexed_keys + [job_key for job_key, location in self._tail.items() if location is not None]
+
+    def get(self, job_key: int) -> Optional[JobRecord]:
+        """
+        Reads the latest record of a job.
+
+        Args:
+            job_key (int): The integer job key.
+
+        Returns:
+            Optional[JobRecord]: The job record, or None if the job is not in the log.
+        """
+        location = self._find(job_key)
+        return decode_job_record(self._read_payload(location[0], location[1]), self.codec) if location else None
+
+    def read_jobs(self) -> JobStore:
+        """
+        Reads the latest record of every job, scanning the log in order.
+
+        Returns:
+            JobStore: The job records, keyed by the integer job key.
+        """
+        locations = self._locations()
+        order = np.argsort(locations['offset'], kind='stable')
+        keys, offsets, lengths = (locations[field][order].tolist() for field in ('key', 'offset', 'length'))
+        return JobStore({job_key: decode_job_record(self._read_payload(offset, length), self.codec)
+                         for job_key, offset, length in zip(keys, offsets, lengths)})
+
+    def append(self, job_records: Mapping[int, JobRecord]) -> None:
+        """
+        Appends records of jobs, replacing their previous records.
+
+        Args:
+            job_records (Mapping[int, JobRecord]): The job records, keyed by the integer job key.
+
+        Returns:
+            None
+        """
+        self._write([(job_key, encode_job_record(job_record, self.codec)) for job_key, job_record in job_records.items()])
+
+    def remove(self, job_keys: Iterable[int]) -> None:
+        """
+        Appends tombstones removing jobs from the log. Keys that are not in the log are ignored.
+
+        Args:
+            job_keys (Iterable[int]): The integer job keys.
+
+        Returns:
+            None
+        """
+        self._write([(job_key, None) for job_key in job_keys if job_key in self])
+
+    def sync(self, job_records: Mapping[int, JobRecord]) -> None:
+        """
+        Updates the log to hold exactly the given jobs, appending only the jobs that were added or changed and
+        tombstones for the removed jobs, then writes the index or compacts the log. Trains the dictionary of the
+        descriptions first if there are enough jobs, which appends every job once more, compressed.
+
+        Args:
+            job_records (Mapping[int, JobRecord]): The saved job records, keyed by the integer job key.
+
+        Returns:
+            None
+        """
+        if self.codec is None:
+            self._train_codec(job_records)
+        job_keys = list(job_records)
+        payloads = [encode_job_record(job_records[job_key], self.codec) for job_key in job_keys]
+        encoded = np.zeros(len(job_keys), dtype=INDEX_DTYPE)
+        encoded['key'] = job_keys
+        encoded['length'] = [len(payload) for payload in payloads]
+        encoded['checksum'] = [zlib.crc32(payload) for payload in payloads]
+
+        # Jobs whose latest record has the same length and checksum are unchanged
+        stored = self._locations()
+        stored.sort(order='key')
+        positions = np.minimum(np.searchsorted(stored['key'], encoded['key']), max(len(stored) - 1, 0))
+        unchanged = np.zeros(len(job_keys), dtype=bool)
+        if len(stored):
+            matches = stored[positions]
+            unchanged = ((matches['key'] == encoded['key']) & (matches['length'] == encoded['length'])
+                         & (matches['checksum'] == encoded['checksum']))
+
+        changes = [(job_key, payload) for job_key, payload, is_unchanged in zip(job_keys, payloads, unchanged.tolist())
+                   if not is_unchanged]
+        changes.extend((job_key, None) for job_key in stored['key'][~np.isin(stored['key'], encoded['key'])].tolist())
+        self._write(changes)
+
+        log_size = self._log_size()
+        if log_size > MIN_COMPACTION_SIZE and log_size > COMPACTION_RATIO * (self._get_live_bytes() + len(LOG_MAGIC)):
+            self.compact()
+        else:
+            self.flush()
+
+    def compact(self) -> None:
+        """
+        Rewrites the log with the latest record of every job only, in log order, and writes its index.
+
+        Returns:
+            None
+        """
+        locations = self._locations()
+        locations = locations[np.argsort(locations['offset'], kind='stable')]
+        entries = np.zeros(len(locations), dtype=INDEX_DTYPE)
+        entries['key'], entries['length'], entries['checksum'] = locations['key'], locations['length'], locations['checksum']
+
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(LOG_MAGIC)
+            for position, (offset, length) in enumerate(zip(locations['offset'].tolist(), locations['length'].tolist())):
+                entries[position]['offset'] = temp_file.tell()
+                temp_file.write(self._read(offset, RECORD_HEADER.size + length))
+            log_size = temp_file.tell()
+
+        self._close_files()
+        os.replace(temp_path, self.path)
+        entries.sort(order='key')
+        self._write_index(entries, log_size)
+
+    def flush(self) -> None:
+        """
+        Writes the appended records to disk and rewrites the index, so the next opening does not scan them.
+
+        Returns:
+            None
+        """
+        if self._log_file:
+            self._log_file.flush()
+        if not self._tail:
+            return
+
+        locations = self._locations()
+        locations.sort(order='key')
+        self._close_files()
+        self._write_index(locations, self._log_size())
+
+    def close(self) -> None:
+        """
+        Writes the index and closes the files.
+
+        Returns:
+            None
+        """
+        self.flush()
+        self._close_files()
+        self._entries = np.zeros(0, dtype=INDEX_DTYPE)
+
+    def _train_codec(self, job_records: Mapping[int, JobRecord]) -> None:
+        """Trains the dictionary of the descriptions on a sample of the jobs, if there are enough of them."""
+        descriptions = [description for description in (job_record.description for job_record in job_records.values())
+                        if description]
+        if len(descriptions) < MIN_DICTIONARY_SAMPLES:
+            return
+        samples = descriptions[::(len(descriptions) - 1) // MAX_DICTIONARY_SAMPLES + 1]
+        self.codec = TextCodec.train(samples).save(f"{self.path}.zdict")
+
+    def _find(self, job_key: int) -> Optional[Tuple[int, int, int]]:
+        """Returns the offset, payload length and checksum of the latest record of a job, or None if it is not in the log."""
+        if job_key in self._tail:
+            return self._tail[job_key]
+        if not isinstance(job_key, int) or not 0 <= job_key < 1 << 64 or not len(self._entries):
+            return None
+
+        keys = self._entries['key']
+        position = int(np.searchsorted(keys, np.uint64(job_key)))
+        if position == len(keys) or int(keys[position]) != job_key:
+            return None
+        entry = self._entries[position]
+        return int(entry['offset']), int(entry['length']), int(entry['checksum'])
+
+    def _locations(self) -> np.ndarray:
+        """Returns the index entries of the jobs in the log, with the records appended since the index was written."""
+        tail_keys = np.fromiter(self._tail, dtype=np.uint64, count=len(self._tail))
+        entries = self._entries[~np.isin(self._entries['key'], tail_keys)]
+        tail_entries = np.array([(job_key, *location) for job_key, location in self._tail.items() if location is not None],
+                                dtype=INDEX_DTYPE)
+        return np.concatenate([entries, tail_entries])
+
+    def _get_live_bytes(self) -> int:
+        """Returns the number of bytes of the latest records of the jobs."""
+        return int(self._locations()['length'].sum(dtype=np.uint64)) + RECORD_HEADER.size * len(self)
+
+    def _write(self, changes: List[Tuple[int, Optional[bytes]]]) -> None:
+        """Appends records, or tombstones for None payloads, to the log with a single write."""
+        if not changes:
+            return
+        if self._log_file is None:
+            self._log_file = open(self.path, 'ab')
+
+        offset = self._log_file.seek(0, os.SEEK_END)
+        chunks = []
+        for job_key, payload in changes:
+            is_stored = self._find(job_key) is not None
+            if payload is None:
+                chunks.append(RECORD_HEADER.pack(job_key, TOMBSTONE_LENGTH))
+                self._tail[job_key] = None
+                self._num_jobs -= is_stored
+                offset += RECORD_HEADER.size
+            else:
+                chunks += [RECORD_HEADER.pack(job_key, len(payload)), payload]
+                self._tail[job_key] = (offset, len(payload), zlib.crc32(payload))
+                self._num_jobs += not is_stored
+                offset += RECORD_HEADER.size + len(payload)
+        self._log_file.write(b''.join(chunks))
+
+    def _read(self, offset: int, size: int) -> bytes:
+        """Returns bytes of the log, mapping it again if it has grown since it was mapped."""
+        if self._data is None or offset + size > len(self._data):
+            if self._log_file:
+                self._log_file.flush()
+            if self._data is not None:
+                self._data.close()
+            with open(self.path, 'rb') as log_file:
+                self._data = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._data[offset:offset + size]
+
+    def _read_payload(self, offset: int, length: int) -> bytes:
+        """Returns the payload of the record at an offset."""
+        return self._read(offset + RECORD_HEADER.size, length)
+
+    def _log_size(self) -> int:
+        """Returns the size of the log, appended records included."""
+        if self._log_file:
+            self._log_file.flush()
+        return os.path.getsize(self.path)
+
+    def _scan_tail(self) -> None:
+        """Reads the records appended after the index was written, and drops a truncated last record."""
+        log_size = os.path.getsize(self.path)
+        if log_size <= self._indexed_size:
+            return
+
+        with open(self.path, 'rb') as log_file:
+            log_file.seek(self._indexed_size)
+            data = log_file.read()
+
+        position = 0
+        while position + RECORD_HEADER.size <= len(data):
+            job_key, length = RECORD_HEADER.unpack_from(data, position)
+            offset = self._indexed_size + position
+            if length == TOMBSTONE_LENGTH:
+                self._num_jobs -= self._find(job_key) is not None
+                self._tail[job_key] = None
+                position += RECORD_HEADER.size
+                continue
+            if position + RECORD_HEADER.size + length > len(data):
+                break
+            payload = data[position + RECORD_HEADER.size:position + RECORD_HEADER.size + length]
+            self._num_jobs += self._find(job_key) is None
+            self._tail[job_key] = (offset, length, zlib.crc32(payload))
+            position += RECORD_HEADER.size + length
+
+        if position < len(data):
+            with open(self.path, 'r+b') as log_file:
+                log_file.truncate(self._indexed_size + position)
+
+    def _open_index(self) -> bool:
+        """Maps the index file, returning whether it exists and matches the log."""
+        index_path = f"{self.path}.idx"
+        if not os.path.isfile(index_path) or os.path.getsize(index_path) < INDEX_HEADER.size:
+            return False
+
+        with open(index_path, 'rb') as index_file:
+            magic, num_entries, indexed_size = INDEX_HEADER.unpack(index_file.read(INDEX_HEADER.size))
+        if (magic != INDEX_MAGIC or indexed_size > os.path.getsize(self.path)
+                or os.path.getsize(index_path) != INDEX_HEADER.size + num_entries * INDEX_DTYPE.itemsize):
+            return False
+
+        self._entries = np.memmap(index_path, dtype=INDEX_DTYPE, mode='r', offset=INDEX_HEADER.size,
+                                  shape=(num_entries,)) if num_entries else np.zeros(0, dtype=INDEX_DTYPE)
+        self._indexed_size = indexed_size
+        return True
+
+    def _write_index(self, entries: np.ndarray, log_size: int) -> None:
+        """Replaces the index file with entries sorted by job key, covering the log up to log_size, and maps it."""
+        index_path = f"{self.path}.idx"
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(INDEX_HEADER.pack(INDEX_MAGIC, len(entries), log_size))
+            temp_file.write(entries.tobytes())
+
+        self._entries = np.zeros(0, dtype=INDEX_DTYPE)  # release the mapping of the index being replaced
+        os.replace(temp_path, index_path)
+        self._open_index()
+        self._tail = {}
+        self._num_jobs = len(self._entries)
+
+    def _close_files(self) -> None:
+        """Closes the log opened for appending and unmaps it."""
+        if self._log_file:
+            self._log_file.close()
+            self._log_file = None
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+def encode_job_record(job_record: JobRecord, codec: Optional[TextCodec]=None) -> bytes:
+    """
+    Encodes a job record as the JSON of its non-empty fields, with the posted date in ISO format. With a codec, the
+    description is compressed and follows the JSON after a NUL byte; a description read compressed with the same
+    dictionary is not compressed again.
+
+    Args:
+        job_record (JobRecord): The job record.
+        codec (Optional[TextCodec], optional): Compresses the description. Defaults to None, to store it in the JSON.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON, followed by the compressed description if there is one.
+    """
+    fields = {}
+    for field in JOB_RECORD_FIELDS if codec is None else _JSON_FIELDS:
+        value = getattr(job_record, field)
+        if value != '':
+            fields[field] = value.isoformat() if isinstance(value, datetime.date) else value
+    payload = RECORD_ENCODER.encode(fields).encode('utf-8')
+
+    description = job_record.stored_description
+    if codec is None or description == '':
+        return payload
+    return payload + DESCRIPTION_SEPARATOR + codec.compress(description)
+
+def decode_job_record(payload: bytes, codec: Optional[TextCodec]=None) -> JobRecord:
+    """
+    Decodes a job record encoded by encode_job_record. Fields that are not job record fields are ignored. A compressed
+    description is only decompressed when it is read.
+
+    Args:
+        payload (bytes): The UTF-8 encoded JSON, followed by the compressed description if there is one.
+        codec (Optional[TextCodec], optional): The codec the description was compressed with. Defaults to None.
+
+    Returns:
+        JobRecord: The job record.
+    """
+    separator = payload.find(DESCRIPTION_SEPARATOR)
+    if separator < 0:
+        return JobRecord.from_encoded(json.loads(payload))
+
+    job_record = JobRecord.from_encoded(json.loads(payload[:separator]))
+    job_record.description = CompressedText(payload[separator + 1:], codec or TextCodec())
+    return job_record
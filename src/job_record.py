@@ -0,0 +1,368 @@
+import datetime
+import sys
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from text_compression import CompressedText
+
+# Fields of a job record, in the default column order of the Excel output
+JOB_RECORD_FIELDS = ('posted_date', 'applied', 'title', 'company', 'location', 'job_link', 'description',
+                     'salary_preview', 'min_years_of_experience', 'max_years_of_experience', 'min_annual_salary',
+                     'max_annual_salary', 'search_criteria', 'hash_id', 'duplicate_of')
+
+# Numeric fields extracted from the description and salary preview when a job is ingested, and their types
+METRIC_FIELD_TYPES = {'min_years_of_experience': int, 'max_years_of_experience': int,
+                      'min_annual_salary': float, 'max_annual_salary': float}
+
+# Fields whose values repeat across many records and are interned so that records share a single string object
+INTERNED_FIELDS = frozenset(['posted_date', 'applied', 'company', 'location', 'search_criteria'])
+
+# Fields of a job record, and whether their values are interned, in the order JobRecord.from_encoded sets them
+_ENCODED_FIELDS = tuple((field, field in INTERNED_FIELDS) for field in JOB_RECORD_FIELDS)
+
+# Format of the 'posted_date' column in text outputs
+POSTED_DATE_FORMAT = '%m/%d/%Y'
+
+# Parsed posted dates, keyed by their text. Jobs share a few thousand distinct dates, so each is parsed only once
+_posted_date_cache: Dict[str, Optional[datetime.date]] = {}
+
+def parse_posted_date(posted_date: Any) -> Optional[datetime.date]:
+    """
+    Parses a posted date stored in the 'posted_date' column.
+
+    Args:
+        posted_date (Any): The stored value, a date, a datetime, or a string in POSTED_DATE_FORMAT or ISO format.
+
+    Returns:
+        Optional[datetime.date]: The date, or None if the value is empty or invalid.
+    """
+    if isinstance(posted_date, datetime.datetime):
+        return posted_date.date()
+    if isinstance(posted_date, datetime.date):
+        return posted_date
+
+    text = str(posted_date).strip()
+    if text not in _posted_date_cache:
+        try:
+            date = datetime.datetime.strptime(text, POSTED_DATE_FORMAT).date()
+        except ValueError:
+            try:
+                date = datetime.date.fromisoformat(text)
+            except ValueError:
+                date = None
+        _posted_date_cache[text] = date
+    return _posted_date_cache[text]
+
+def parse_metric(value: Any, metric_type: type) -> Any:
+    """
+    Converts a stored metric, which text outputs store as a string, to its type.
+
+    Args:
+        value (Any): The stored value.
+        metric_type (type): int or float.
+
+    Returns:
+        Any: The number, or '' if the value is not a number.
+    """
+    try:
+        return metric_type(float(value))
+    except (TypeError, ValueError):
+        return ''
+
+def format_posted_date(posted_date: Any) -> str:
+    """
+    Formats a posted date for text outputs.
+
+    Args:
+        posted_date (Any): The stored value, usually a date.
+
+    Returns:
+        str: The date in POSTED_DATE_FORMAT, or the value as a string if it is not a date.
+    """
+    if isinstance(posted_date, datetime.date):
+        return posted_date.strftime(POSTED_DATE_FORMAT)
+    return str(posted_date)
+
+class JobRecord:
+    """A compact record of a single job listing.
+
+    Records use __slots__ instead of a per-record dictionary, and repeated values such as the search criteria,
+    company and location are interned. Values can be accessed either as attributes or by header name like a
+    dictionary, so records can be used wherever a job dictionary was previously expected. Posted dates are stored as
+    dates, so they sort correctly across years; values that are not valid dates are kept as they are. The description
+    may be stored compressed, as read from a compressed store, and is then decompressed each time it is read.
+
+    Attributes:
+        posted_date (Union[datetime.date, str]): The date the job was posted.
+        applied (str): Whether the job has been applied to ("Yes", "No" or "Skip").
+        title (str): The job title.
+        company (str): The company name.
+        location (str): The job location.
+        job_link (str): The link to the job posting.
+        description (str): The description snippet of the job.
+        salary_preview (str): The salary preview of the job.
+        min_years_of_experience (Union[int, str]): The fewest years of experience mentioned in the description, or ''.
+        max_years_of_experience (Union[int, str]): The most years of experience mentioned in the description, or ''.
+        min_annual_salary (Union[float, str]): The bottom of the annual salary range, or '' if no salary is shown.
+        max_annual_salary (Union[float, str]): The top of the annual salary range, or '' if no salary is shown.
+        search_criteria (str): The search criteria that returned the job.
+        hash_id (str): The unique identifier of the job.
+        duplicate_of (str): The hash_id of the stored job this job is a near duplicate of, or '' if it is not flagged.
+    """
+
+    __slots__ = tuple('_description' if field == 'description' else field for field in JOB_RECORD_FIELDS)
+
+    def __init__(self, **fields: Any):
+        """
+        Initializes the JobRecord. Fields that are not provided default to an empty string.
+
+        Args:
+            **fields (Any): The field values of the record, keyed by header.
+        """
+        for field in JOB_RECORD_FIELDS:
+            self[field] = fields.get(field, '')
+
+    @classmethod
+    def from_dict(cls, record: Mapping[str, Any]) -> 'JobRecord':
+        """
+        Creates a JobRecord from a dictionary of job details. Unknown headers are ignored.
+
+        Args:
+            record (Mapping[str, Any]): The job details, keyed by header.
+
+        Returns:
+            JobRecord: The compact job record.
+        """
+        return cls(**{field: record[field] for field in JOB_RECORD_FIELDS if field in record})
+
+    @classmethod
+    def from_encoded(cls, fields: Mapping[str, Any]) -> 'JobRecord':
+        """
+        Creates a JobRecord from fields written by a binary store, whose metrics are numbers or '' and whose posted
+        date is text. Skips the per-field checks of from_dict, so reading millions of records is about twice as fast.
+
+        Args:
+            fields (Mapping[str, Any]): The field values of the record, keyed by header. Missing fields are ''.
+
+        Returns:
+            JobRecord: The compact job record.
+        """
+        job_record = cls.__new__(cls)
+        for field, is_interned in _ENCODED_FIELDS:
+            value = fields.get(field, '')
+            if is_interned and value.__class__ is str:
+                value = sys.intern(value)
+            setattr(job_record, field, value)
+        if job_record.posted_date != '':
+            job_record.posted_date = parse_posted_date(job_record.posted_date) or job_record.posted_date
+        return job_record
+
+    @property
+    def description(self) -> str:
+        description = self._description
+        return description.decompress() if description.__class__ is CompressedText else description
+
+    @description.setter
+    def description(self, value: Union[str, CompressedText]) -> None:
+        self._description = value
+
+    @property
+    def stored_description(self) -> Union[str, CompressedText]:
+        """The description as it is stored, without decompressing it."""
+        return self._description
+
+    def to_dict(self, headers: Iterable[str]=JOB_RECORD_FIELDS, as_text: bool=False) -> Dict[str, Any]:
+        """
+        Converts the record to a dictionary.
+
+        Args:
+            headers (Iterable[str], optional): The headers to include. Defaults to all fields.
+            as_text (bool, optional): Whether to format the posted date as text for text outputs. Defaults to False.
+
+        Returns:
+            Dict[str, Any]: The field values of the record, keyed by header.
+        """
+        record = {header: self.get(header, '') for header in headers}
+        if as_text and 'posted_date' in record:
+            record['posted_date'] = format_posted_date(record['posted_date'])
+        return record
+
+    def get(self, header: str, default: Any=None) -> Any:
+        """
+        Returns the value of a field, or the default if the record has no such field.
+
+        Args:
+            header (str): The name of the field.
+            default (Any, optional): The value returned for unknown fields. Defaults to None.
+
+        Returns:
+            Any: The value of the field.
+        """
+        return getattr(self, header) if header in JOB_RECORD_FIELDS else default
+
+    def __getitem__(self, header: str) -> Any:
+        if header not in JOB_RECORD_FIELDS:
+            raise KeyError(header)
+        return getattr(self, header)
+
+    def __setitem__(self, header: str, value: Any) -> None:
+        if header not in JOB_RECORD_FIELDS:
+            raise KeyError(header)
+        if value is None:
+            value = ''
+        if header == 'posted_date' and value != '':
+            value = parse_posted_date(value) or value
+        elif header in METRIC_FIELD_TYPES and value != '':
+            value = parse_metric(value, METRIC_FIELD_TYPES[header])
+        if header in INTERNED_FIELDS and isinstance(value, str):
+            value = sys.intern(value)
+        setattr(self, header, value)
+
+    def __contains__(self, header: object) -> bool:
+        return header in JOB_RECORD_FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(JOB_RECORD_FIELDS)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, JobRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in JOB_RECORD_FIELDS)
+
+    def __repr__(self) -> str:
+        return f"JobRecord(hash_id={self.hash_id!r}, title={self.title!r}, company={self.company!r})"
+
+def job_sort_key(job_key: int, job_record: JobRecord) -> Tuple[int, str, int]:
+    """
+    Returns the key that orders job records in output order.
+
+    Args:
+        job_key (int): The integer job key of the record.
+        job_record (JobRecord): The job record.
+
+    Returns:
+        Tuple[int, str, int]: The negated ordinal of the posted date, so newer jobs come first and jobs without a
+        valid date come last, then the company, then the job key to break ties.
+    """
+    posted_date = job_record.posted_date
+    ordinal = posted_date.toordinal() if isinstance(posted_date, datetime.date) else 0
+    return (-ordinal, str(job_record.company), job_key)
+
+class JobStore(dict):
+    """Job records keyed by integer job key, with an index of the job keys in output order.
+
+    The index is updated as records are added, replaced and removed, so records can be written in output order
+    without sorting the whole set on every export. Records are indexed by their posted date and company when they are
+    stored; a record whose posted date or company is changed in place must be stored again, or passed to reindex().
+
+    Attributes:
+        _sort_keys (Dict[int, Tuple[int, str, int]]): The sort key of each stored record, keyed by job key.
+        _order (List[Tuple[int, str, int]]): The sort keys of the stored records, in output order.
+    """
+
+    def __init__(self, job_records: Optional[Mapping[int, JobRecord]]=None):
+        """
+        Initializes the JobStore.
+
+        Args:
+            job_records (Optional[Mapping[int, JobRecord]], optional): The initial job records, keyed by job key.
+                Defaults to None.
+        """
+        super().__init__()
+        self._sort_keys = {}
+        self._order = []
+        if job_records:
+            self.update(job_records)
+
+    def __setitem__(self, job_key: int, job_record: JobRecord) -> None:
+        if job_key in self._sort_keys:
+            self._unindex(job_key)
+        super().__setitem__(job_key, job_record)
+        sort_key = job_sort_key(job_key, job_record)
+        self._sort_keys[job_key] = sort_key
+        insort(self._order, sort_key)
+
+    def __delitem__(self, job_key: int) -> None:
+        super().__delitem__(job_key)
+        self._unindex(job_key)
+
+    def _unindex(self, job_key: int) -> None:
+        sort_key = self._sort_keys.pop(job_key)
+        del self._order[bisect_left(self._order, sort_key)]
+
+    def update(self, job_records: Mapping[int, JobRecord]) -> None:
+        """
+        Stores several job records, sorting the index once rather than inserting each record.
+
+        Args:
+            job_records (Mapping[int, JobRecord]): The job records, keyed by job key.
+
+        Returns:
+            None
+        """
+        for job_key, job_record in job_records.items():
+            if job_key in self._sort_keys:
+                self._unindex(job_key)
+            super().__setitem__(job_key, job_record)
+            self._sort_keys[job_key] = sort_key = job_sort_key(job_key, job_record)
+            self._order.append(sort_key)
+        self._order.sort()
+
+    def pop(self, job_key: int, *default: Any) -> Any:
+        if job_key not in self:
+            return super().pop(job_key, *default)
+        job_record = super().pop(job_key)
+        self._unindex(job_key)
+        return job_record
+
+    def popitem(self) -> Tuple[int, JobRecord]:
+        job_key, job_record = super().popitem()
+        self._unindex(job_key)
+        return job_key, job_record
+
+    def setdefault(self, job_key: int, default: JobRecord=None) -> JobRecord:
+        if job_key not in self:
+            self[job_key] = default
+        return self[job_key]
+
+    def clear(self) -> None:
+        super().clear()
+        self._sort_keys.clear()
+        self._order.clear()
+
+    def copy(self) -> 'JobStore':
+        return JobStore(self)
+
+    def reindex(self, job_key: int) -> None:
+        """
+        Updates the position of a record whose posted date or company was changed in place.
+
+        Args:
+            job_key (int): The integer job key of the record.
+
+        Returns:
+            None
+        """
+        self[job_key] = self[job_key]
+
+    def sorted_items(self) -> Iterator[Tuple[int, JobRecord]]:
+        """
+        Returns the job keys and records in output order: newest first, then by company.
+
+        Yields:
+            Tuple[int, JobRecord]: The next job key and record.
+        """
+        for sort_key in self._order:
+            yield sort_key[2], dict.__getitem__(self, sort_key[2])
+
+    def sorted_values(self) -> List[JobRecord]:
+        """
+        Returns the job records in output order: newest first, then by company.
+
+        Returns:
+            List[JobRecord]: The job records.
+        """
+        return [dict.__getitem__(self, sort_key[2]) for sort_key in self._order]
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (JobStore, (dict(self),))
@@ -0,0 +1,390 @@
+import os
+import zlib
+from typing import Dict, Iterable, List, Mapping, MutableMapping, Optional, Tuple
+
+import numpy as np
+
+import utils
+
+# What to do with a new job that is a near duplicate of a stored job: 'flag' stores it with the hash_id of the stored
+# job in its 'duplicate_of' column, and 'skip' does not store it
+NEAR_DUPLICATE_ACTIONS = ['flag', 'skip']
+
+# Number of consecutive words of a shingle
+SHINGLE_SIZE = 3
+
+# Largest prime below 2**32. MinHash values are reduced modulo this prime, so signatures fit in 32-bit integers
+MINHASH_PRIME = 4294967291
+
+# Number of words whose shingles are hashed at once when computing the signatures of many jobs
+SIGNATURE_BATCH_SIZE = 1 << 16
+
+class NearDuplicateIndex:
+    """An index of the MinHash signatures of the saved jobs, which finds near-duplicate postings in sublinear time.
+
+    The title, company and description of a job are split into overlapping word shingles. Its signature holds, for
+    each of num_perm hash functions, the smallest hash of its shingles, so the fraction of equal values in two
+    signatures estimates the Jaccard similarity of the two jobs. Signatures are split into num_bands bands, and jobs
+    sharing any band are compared (locality-sensitive hashing). With the default 16 bands of 4 values, jobs with a
+    similarity of 0.7 share a band with a probability of 99%, while jobs sharing no band are never compared.
+
+    Band hashes are stored in one sorted array per band and looked up by binary search. Jobs added since the arrays
+    were last sorted are kept in a dictionary, and merged into the arrays once they make up a quarter of the index.
+
+    Attributes:
+        threshold (float): The estimated Jaccard similarity from which two jobs are near duplicates.
+        num_perm (int): The number of values of a signature.
+        num_bands (int): The number of bands of a signature.
+        seed (int): The seed of the hash functions. Signatures are only comparable if computed with the same seed.
+        action (str): One of NEAR_DUPLICATE_ACTIONS.
+        path (Optional[str]): The path of the file storing the signatures between runs, or None if they are not stored.
+    """
+
+    def __init__(self, threshold: float=0.7, num_perm: int=64, num_bands: int=16, seed: int=1, action: str='flag',
+                 path: Optional[str]=None):
+        """
+        Initializes an empty NearDuplicateIndex.
+
+        Args:
+            threshold (float, optional): The similarity from which two jobs are near duplicates. Defaults to 0.7.
+            num_perm (int, optional): The number of values of a signature. Defaults to 64.
+            num_bands (int, optional): The number of bands of a signature. Must divide num_perm. Defaults to 16.
+            seed (int, optional): The seed of the hash functions. Defaults to 1.
+            action (str, optional): One of NEAR_DUPLICATE_ACTIONS. Defaults to 'flag'.
+            path (Optional[str], optional): The path of the file storing the signatures. Defaults to None.
+
+        Raises:
+            ValueError: If num_bands does not divide num_perm or the action is unknown.
+        """
+        if num_perm % num_bands:
+            raise ValueError(f"The number of bands ({num_bands}) must divide the signature size ({num_perm})")
+        if action not in NEAR_DUPLICATE_ACTIONS:
+            raise ValueError(f"Unknown near duplicate action: {action}")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.num_bands = num_bands
+        self.seed = seed
+        self.action = action
+        self.path = path
+
+        rng = np.random.default_rng(seed)
+        self._multipliers = rng.integers(1, MINHASH_PRIME, num_perm, dtype=np.uint64)[:, np.newaxis]
+        self._increments = rng.integers(0, MINHASH_PRIME, num_perm, dtype=np.uint64)[:, np.newaxis]
+        self._band_multipliers = rng.integers(1, 1 << 63, num_perm // num_bands, dtype=np.uint64) | np.uint64(1)
+        self._shingle_multipliers = rng.integers(1, 1 << 63, SHINGLE_SIZE, dtype=np.uint64) | np.uint64(1)
+
+        self._job_keys = []  # row : job key
+        self._rows = {}  # job key : row
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._band_hashes = np.empty((0, num_bands), dtype=np.uint64)
+        self._alive = np.empty(0, dtype=bool)
+        self._size = 0
+        self._sorted_hashes = np.empty((num_bands, 0), dtype=np.uint64)
+        self._sorted_rows = np.empty((num_bands, 0), dtype=np.int64)
+        self._sorted_size = 0  # number of rows when the band hashes were last sorted
+        self._pending = {}  # (band, band hash) : rows added since the band hashes were sorted
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['NearDuplicateIndex']:
+        """
+        Creates a NearDuplicateIndex from the 'near_duplicates' settings of the configuration file, with the signatures
+        stored by the previous run.
+
+        Args:
+            config (Dict): The configuration dictionary loaded from config.json.
+
+        Returns:
+            Optional[NearDuplicateIndex]: The index, or None if near duplicate detection is disabled.
+        """
+        settings = config.get('near_duplicates', {})
+        if not settings.get('enabled'):
+            return None
+
+        index = cls(threshold=float(settings.get('threshold') or 0.7), action=settings.get('action') or 'flag',
+                    path=settings.get('path') or 'near_duplicates.npz')
+        index.load()
+        return index
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, job_key: object) -> bool:
+        return job_key in self._rows
+
+    def compute_signatures(self, job_records: List[Mapping[str, str]]) -> np.ndarray:
+        """
+        Computes the MinHash signatures of several jobs at once.
+
+        Each distinct word is hashed once, and the shingles of a batch of jobs are hashed and reduced to their minimum
+        per job with array operations.
+
+        Args:
+            job_records (List[Mapping[str, str]]): The job records.
+
+        Returns:
+            np.ndarray: A uint32 array with the signature of each job as a row. Jobs without any word get a signature
+            of MINHASH_PRIME values, which is never indexed.
+        """
+        signatures = np.full((len(job_records), self.num_perm), MINHASH_PRIME, dtype=np.uint32)
+        word_hashes = {'': 0}  # padding between jobs
+        batch_rows, batch_words, num_words = [], [], 0
+
+        for row, job_record in enumerate(job_records):
+            words = get_words(job_record)
+            if words:
+                batch_rows.append(row)
+                batch_words.append(words)
+                num_words += len(words) + SHINGLE_SIZE - 1
+            if batch_rows and (num_words >= SIGNATURE_BATCH_SIZE or row == len(job_records) - 1):
+                signatures[batch_rows] = self._minhash(batch_words, num_words, word_hashes)
+                batch_rows, batch_words, num_words = [], [], 0
+
+        return signatures
+
+    def add(self, job_records: Mapping[int, Mapping[str, str]]) -> None:
+        """
+        Indexes jobs, replacing the signature of jobs that are already indexed.
+
+        Args:
+            job_records (Mapping[int, Mapping[str, str]]): The job records, keyed by the integer job key.
+
+        Returns:
+            None
+        """
+        job_keys = list(job_records)
+        self.add_signatures(job_keys, self.compute_signatures([job_records[job_key] for job_key in job_keys]))
+
+    def add_signatures(self, job_keys: List[int], signatures: np.ndarray) -> None:
+        """
+        Indexes jobs whose signatures have already been computed.
+
+        Args:
+            job_keys (List[int]): The integer job keys.
+            signatures (np.ndarray): The signature of each job, as rows.
+
+        Returns:
+            None
+        """
+        self.remove(job_key for job_key in job_keys if job_key in self._rows)
+        self._reserve(self._size + len(job_keys))
+
+        rows = np.arange(self._size, self._size + len(job_keys))
+        self._signatures[rows] = signatures
+        self._band_hashes[rows] = self._hash_bands(signatures)
+        self._alive[rows] = (signatures != MINHASH_PRIME).any(axis=1)
+        self._job_keys.extend(job_keys)
+        self._rows.update(zip(job_keys, rows.tolist()))
+        self._size += len(job_keys)
+
+        if self._size - self._sorted_size > max(1024, self._size // 4):
+            self._sort_bands()
+            return
+        for row in rows[self._alive[rows]].tolist():
+            for band, band_hash in enumerate(self._band_hashes[row].tolist()):
+                self._pending.setdefault((band, band_hash), []).append(row)
+
+    def remove(self, job_keys: Iterable[int]) -> None:
+        """
+        Removes jobs from the index.
+
+        Args:
+            job_keys (Iterable[int]): The integer job keys. Keys that are not indexed are ignored.
+
+        Returns:
+            None
+        """
+        for job_key in list(job_keys):
+            row = self._rows.pop(job_key, None)
+            if row is not None:
+                self._alive[row] = False
+
+    def sync(self, job_records: Mapping[int, Mapping[str, str]]) -> None:
+        """
+        Updates the index to contain exactly the given jobs, computing the signatures of the jobs that are not indexed.
+
+        Args:
+            job_records (Mapping[int, Mapping[str, str]]): The saved job records, keyed by the integer job key.
+
+        Returns:
+            None
+        """
+        self.remove([job_key for job_key in self._rows if job_key not in job_records])
+        self.add({job_key: record for job_key, record in job_records.items() if job_key not in self._rows})
+
+    def find_duplicate(self, job_record: Mapping[str, str], exclude: Optional[int]=None) -> Optional[Tuple[int, float]]:
+        """
+        Finds the indexed job most similar to a job, among the jobs that are near duplicates of it.
+
+        Args:
+            job_record (Mapping[str, str]): The job record.
+            exclude (Optional[int], optional): A job key that is never returned, usually the key of the job itself.
+                Defaults to None.
+
+        Returns:
+            Optional[Tuple[int, float]]: The integer job key of the most similar job and its estimated similarity, or
+            None if no indexed job reaches the threshold.
+        """
+        signature = self.compute_signatures([job_record])
+        if (signature == MINHASH_PRIME).all():
+            return None
+
+        band_hashes = self._hash_bands(signature)[0]
+        candidate_rows = []
+        for band, band_hash in enumerate(band_hashes):
+            sorted_hashes = self._sorted_hashes[band]
+            start, end = np.searchsorted(sorted_hashes, band_hash, 'left'), np.searchsorted(sorted_hashes, band_hash, 'right')
+            candidate_rows.extend(self._sorted_rows[band, start:end].tolist())
+            candidate_rows.extend(self._pending.get((band, int(band_hash)), ()))
+
+        candidate_rows = np.unique(np.array(candidate_rows, dtype=np.int64))
+        candidate_rows = candidate_rows[self._alive[candidate_rows]]
+        if exclude in self._rows:
+            candidate_rows = candidate_rows[candidate_rows != self._rows[exclude]]
+        if not len(candidate_rows):
+            return None
+
+        similarities = (self._signatures[candidate_rows] == signature).mean(axis=1)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return self._job_keys[candidate_rows[best]], float(similarities[best])
+
+    def check(self, job_key: int, job_details: MutableMapping[str, str], jobs: Mapping[int, Mapping[str, str]]) -> bool:
+        """
+        Applies the near duplicate action to a job accepted by the filters, and indexes the job if it is kept.
+
+        Jobs that are already stored keep their 'duplicate_of' value. A new job that is a near duplicate of a stored
+        job is either skipped or flagged with the hash_id of the stored job, depending on the action.
+
+        Args:
+            job_key (int): The integer job key of the job.
+            job_details (MutableMapping[str, str]): The job details, keyed by header. Updated in place when flagged.
+            jobs (Mapping[int, Mapping[str, str]]): The stored job records, keyed by the integer job key.
+
+        Returns:
+            bool: False if the job is a near duplicate that should be skipped, True otherwise.
+        """
+        if job_key in jobs:
+            return True
+
+        duplicate = self.find_duplicate(job_details, exclude=job_key)
+        # Jobs removed since they were indexed, for example after enrichment, are not duplicated
+        if duplicate and duplicate[0] in jobs:
+            if self.action == 'skip':
+                return False
+            job_details['duplicate_of'] = jobs[duplicate[0]].get('hash_id', '')
+
+        self.add({job_key: job_details})
+        return True
+
+    def load(self, path: Optional[str]=None) -> None:
+        """
+        Adds the signatures stored in a file to the index. Files written with other signature parameters are ignored.
+
+        Args:
+            path (Optional[str], optional): The path of the file. Defaults to the path of the index.
+
+        Returns:
+            None
+        """
+        path = path or self.path
+        if not path or not os.path.isfile(path):
+            return
+
+        with np.load(path) as stored:
+            if stored['parameters'].tolist() != [self.num_perm, self.num_bands, self.seed]:
+                return
+            self.add_signatures(stored['job_keys'].tolist(), stored['signatures'])
+
+    def save(self, path: Optional[str]=None) -> None:
+        """
+        Writes the signatures of the indexed jobs to a file, replacing it atomically.
+
+        Args:
+            path (Optional[str], optional): The path of the file. Defaults to the path of the index.
+
+        Returns:
+            None
+        """
+        path = path or self.path
+        rows = np.array(sorted(self._rows.values()), dtype=np.int64)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as temp_file:
+            np.savez(temp_file, parameters=np.array([self.num_perm, self.num_bands, self.seed]),
+                     job_keys=np.array([self._job_keys[row] for row in rows.tolist()], dtype=np.uint64),
+                     signatures=self._signatures[rows])
+        os.replace(temp_path, path)
+
+    def _minhash(self, job_words: List[List[str]], num_words: int, word_hashes: Dict[str, int]) -> np.ndarray:
+        """
+        Computes the signatures of a batch of jobs from their words.
+
+        The words of every job are followed by SHINGLE_SIZE - 1 empty words, hashed to 0, so a shingle starts at each word of a job.
+        Each job is reduced over the shingles starting at its own words only, so the shingles spanning the padding and the next
+        job never change its signature.
+
+        Args:
+            job_words (List[List[str]]): The words of each job. No job is empty.
+            num_words (int): The total number of words of the jobs, padding included.
+            word_hashes (Dict[str, int]): The CRC-32 of the words hashed so far. Updated in place.
+
+        Returns:
+            np.ndarray: The uint32 signature of each job, as rows.
+        """
+        padding = [''] * (SHINGLE_SIZE - 1)
+        hashes = np.fromiter(
+            (word_hashes[word] if word in word_hashes else word_hashes.setdefault(word, zlib.crc32(word.encode('utf-8')))
+             for words in job_words for word in (words + padding)), dtype=np.uint64, count=num_words)
+
+        # Multiply-shift hashing of the consecutive word hashes, with 64-bit arithmetic wrapping around
+        shingles = np.zeros(num_words - SHINGLE_SIZE + 1, dtype=np.uint64)
+        for offset in range(SHINGLE_SIZE):
+            shingles += hashes[offset:len(shingles) + offset] * self._shingle_multipliers[offset]
+        shingles >>= np.uint64(32)
+
+        permuted = (self._multipliers * shingles + self._increments) % np.uint64(MINHASH_PRIME)
+        offsets = np.cumsum([0] + [len(words) + SHINGLE_SIZE - 1 for words in job_words[:-1]])
+        # Segments alternate between the shingles of a job and the shingles spanning its padding, which are left out.
+        # The shingles of the last job end the array
+        bounds = np.column_stack((offsets, offsets + [len(words) for words in job_words])).ravel()[:-1]
+        return np.minimum.reduceat(permuted, bounds, axis=1)[:, ::2].T
+
+    def _reserve(self, capacity: int) -> None:
+        """Grows the row arrays, doubling their capacity, so that they can hold at least capacity rows."""
+        if capacity <= len(self._alive):
+            return
+        new_capacity = max(capacity, 2 * len(self._alive), 1024)
+        self._signatures = np.resize(self._signatures, (new_capacity, self.num_perm))
+        self._band_hashes = np.resize(self._band_hashes, (new_capacity, self.num_bands))
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._alive = alive
+
+    def _hash_bands(self, signatures: np.ndarray) -> np.ndarray:
+        """Hashes each band of the signatures to a single 64-bit value, with arithmetic wrapping around."""
+        bands = signatures.astype(np.uint64).reshape(len(signatures), self.num_bands, self.num_perm // self.num_bands)
+        return (bands * self._band_multipliers).sum(axis=2, dtype=np.uint64)
+
+    def _sort_bands(self) -> None:
+        """Merges the pending rows into the sorted band hashes."""
+        rows = np.flatnonzero(self._alive[:self._size])
+        band_hashes = self._band_hashes[rows].T
+        order = np.argsort(band_hashes, axis=1, kind='stable')
+        self._sorted_hashes = np.take_along_axis(band_hashes, order, axis=1)
+        self._sorted_rows = rows[order]
+        self._sorted_size = self._size
+        self._pending = {}
+
+def get_words(job_record: Mapping[str, str]) -> List[str]:
+    """
+    Returns the words of the title, company and description of a job, normalized like job titles.
+
+    Args:
+        job_record (Mapping[str, str]): The job record.
+
+    Returns:
+        List[str]: The words, in order.
+    """
+    text = ' '.join(str(job_record.get(field, '')) for field in ('title', 'company', 'description'))
+    return utils.normalize_title(text).split()
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+SCRIPT_TAG_REGEX = re.compile(r'<script\b[^>]*>.*?</script\s*>', re.IGNORECASE | re.DOTALL)
+
+class PageCache:
+    """An on-disk, content-addressed cache of fetched page HTML.
+
+    Each page is stored once under the SHA-256 hash of its content in the 'blobs' directory, and each URL has a small
+    entry in the 'entries' directory pointing to the content it was last fetched with, along with the fetch time.
+    Identical pages fetched from different URLs therefore share a single file.
+
+    Attributes:
+        directory (str): The root directory of the cache.
+        ttl_seconds (Optional[float]): The number of seconds a cached page stays fresh, or None if pages never expire.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: Optional[float]=None):
+        """
+        Initializes the PageCache, creating its directories if needed.
+
+        Args:
+            directory (str): The root directory of the cache.
+            ttl_seconds (Optional[float], optional): The number of seconds a cached page stays fresh. Defaults to None.
+        """
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(os.path.join(directory, 'entries'), exist_ok=True)
+        os.makedirs(os.path.join(directory, 'blobs'), exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['PageCache']:
+        """
+        Creates a PageCache from the 'page_cache' settings of the configuration file.
+
+        Args:
+            config (Dict): The configuration dictionary loaded from config.json.
+
+        Returns:
+            Optional[PageCache]: The page cache, or None if the cache is disabled.
+        """
+        settings = config.get('page_cache', {})
+        if not settings.get('enabled') and not settings.get('replay'):
+            return None
+
+        ttl_hours = settings.get('ttl_hours')
+        return cls(settings.get('directory') or 'page_cache', float(ttl_hours) * 3600 if ttl_hours else None)
+
+    def get_path(self, url: str, ignore_ttl: bool=False) -> Optional[str]:
+        """
+        Returns the path of the cached content for a URL.
+
+        Args:
+            url (str): The URL of the page.
+            ignore_ttl (bool, optional): Whether expired pages are returned as well. Defaults to False.
+
+        Returns:
+            Optional[str]: The path of the cached HTML file, or None if the page is not cached or has expired.
+        """
+        entry = self._read_entry(url)
+        if entry is None:
+            return None
+        if not ignore_ttl and self.ttl_seconds is not None and time.time() - entry['fetched_at'] > self.ttl_seconds:
+            return None
+
+        blob_path = self._blob_path(entry['content_hash'])
+        return blob_path if os.path.isfile(blob_path) else None
+
+    def get(self, url: str, ignore_ttl: bool=False) -> Optional[str]:
+        """
+        Returns the cached HTML for a URL.
+
+        Args:
+            url (str): The URL of the page.
+            ignore_ttl (bool, optional): Whether expired pages are returned as well. Defaults to False.
+
+        Returns:
+            Optional[str]: The cached HTML, or None if the page is not cached or has expired.
+        """
+        blob_path = self.get_path(url, ignore_ttl)
+        if blob_path is None:
+            return None
+
+        with open(blob_path, encoding='utf-8') as blob_file:
+            return blob_file.read()
+
+    def put(self, url: str, html: str) -> str:
+        """
+        Stores the HTML of a page in the cache.
+
+        Args:
+            url (str): The URL of the page.
+            html (str): The HTML content of the page.
+
+        Returns:
+            str: The path of the cached HTML file.
+        """
+        content = html.encode('utf-8')
+        content_hash = hashlib.sha256(content).hexdigest()
+        blob_path = self._blob_path(content_hash)
+
+        if not os.path.isfile(blob_path):
+            atomic_write(blob_path, content)
+
+        entry = {'url': url, 'fetched_at': time.time(), 'content_hash': content_hash}
+        atomic_write(self._entry_path(url), json.dumps(entry).encode('utf-8'))
+        return blob_path
+
+    def iter_pages(self) -> Iterator[Tuple[str, str]]:
+        """
+        Iterates over every cached page, regardless of its age, in a stable order.
+
+        Yields:
+            Tuple[str, str]: The URL of the page and the path of its cached HTML file.
+        """
+        entries_directory = os.path.join(self.directory, 'entries')
+        for filename in sorted(os.listdir(entries_directory)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(entries_directory, filename), encoding='utf-8') as entry_file:
+                    entry = json.load(entry_file)
+            except (OSError, ValueError):
+                continue
+
+            blob_path = self._blob_path(entry['content_hash'])
+            if os.path.isfile(blob_path):
+                yield entry['url'], blob_path
+
+    def _read_entry(self, url: str) -> Optional[Dict]:
+        """
+        Reads the cache entry of a URL.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            Optional[Dict]: The entry, or None if the URL is not cached.
+        """
+        try:
+            with open(self._entry_path(url), encoding='utf-8') as entry_file:
+                return json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+
+    def _entry_path(self, url: str) -> str:
+        return os.path.join(self.directory, 'entries', hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.directory, 'blobs', content_hash + '.html')
+
+def strip_scripts(html: str) -> str:
+    """
+    Removes all script tags from a rendered page, so that a snapshot can be reopened without re-running the page.
+
+    Args:
+        html (str): The HTML of the page.
+
+    Returns:
+        str: The HTML without script tags.
+    """
+    return SCRIPT_TAG_REGEX.sub('', html)
+
+def atomic_write(path: str, content: bytes) -> None:
+    """
+    Writes a file by writing a temporary file and renaming it, so that readers never observe a partial file.
+
+    Args:
+        path (str): The path of the file.
+        content (bytes): The content to write.
+
+    Returns:
+        None
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as temp_file:
+        temp_file.write(content)
+    os.replace(temp_path, path)
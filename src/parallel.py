@@ -0,0 +1,184 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+import utils
+from job_cards import evaluate_job_cards, parse_job_cards
+from job_record import JobRecord
+from page_cache import PageCache
+
+# Number of stored jobs filtered per task
+DEFAULT_JOB_CHUNK_SIZE = 2000
+
+# Number of cached pages parsed per task
+DEFAULT_PAGE_CHUNK_SIZE = 20
+
+# Per-process state of the pool workers, set once by the pool initializer instead of being sent with every chunk
+_worker_state = {}
+
+def _initialize_worker(state: Dict[str, Any]) -> None:
+    _worker_state.clear()
+    _worker_state.update(state)
+
+def resolve_max_workers(max_workers: Optional[int]) -> int:
+    """
+    Returns the number of worker processes to use.
+
+    Args:
+        max_workers (Optional[int]): The configured number of worker processes, or 0 or None to use every core.
+
+    Returns:
+        int: The number of worker processes.
+    """
+    if max_workers and max_workers > 0:
+        return max_workers
+    return os.cpu_count() or 1
+
+def iter_chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """
+    Splits items into consecutive chunks.
+
+    Args:
+        items (Iterable[Any]): The items to split.
+        chunk_size (int): The maximum number of items per chunk.
+
+    Yields:
+        List[Any]: The next chunk of items.
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def map_chunks(function: Callable[[Any], Any], chunks: Iterable[Any], max_workers: Optional[int],
+               state: Dict[str, Any]) -> Iterator[Any]:
+    """
+    Applies a function to chunks of work in a pool of worker processes, yielding the results in submission order.
+
+    Chunks are submitted lazily, with at most two chunks per worker in flight, so that large inputs are never fully
+    queued in memory. Workers are spawned rather than forked, as forking a process running GUI and driver threads is
+    unsafe. With a single worker, the chunks are processed in the current process.
+
+    Args:
+        function (Callable[[Any], Any]): A module-level function applied to each chunk.
+        chunks (Iterable[Any]): The chunks of work.
+        max_workers (Optional[int]): The number of worker processes, or 0 or None to use every core.
+        state (Dict[str, Any]): State sent once to every worker, available to the function in _worker_state.
+
+    Yields:
+        Any: The result of each chunk, in the order the chunks were submitted.
+    """
+    max_workers = resolve_max_workers(max_workers)
+
+    if max_workers == 1:
+        _initialize_worker(state)
+        try:
+            for chunk in chunks:
+                yield function(chunk)
+        finally:
+            _worker_state.clear()
+        return
+
+    with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_initialize_worker, initargs=(state,)) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(function, chunk))
+            if len(pending) >= max_workers * 2:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+def _find_rejected_jobs_chunk(jobs: Dict[Hashable, Mapping[str, str]]) -> Dict[Hashable, str]:
+    return _worker_state['job_filter'].find_rejected_jobs(jobs)
+
+def find_rejected_jobs_parallel(job_filter, jobs: Mapping[Hashable, Mapping[str, str]], max_workers: Optional[int]=0,
+                                chunk_size: int=DEFAULT_JOB_CHUNK_SIZE) -> Dict[Hashable, str]:
+    """
+    Applies the filter rules to a whole set of stored jobs, sharding the jobs across worker processes.
+
+    Inputs that fit in a single chunk are filtered in the current process, as starting the pool would cost more than
+    it saves.
+
+    Args:
+        job_filter (JobFilter): The filter rules to apply.
+        jobs (Mapping[Hashable, Mapping[str, str]]): The job records, keyed by job key.
+        max_workers (Optional[int], optional): The number of worker processes, or 0 or None to use every core. Defaults to 0.
+        chunk_size (int, optional): The number of jobs filtered per task. Defaults to DEFAULT_JOB_CHUNK_SIZE.
+
+    Returns:
+        Dict[Hashable, str]: The name of the rejecting rule for each rejected job, keyed by job key.
+    """
+    if len(jobs) <= chunk_size:
+        return job_filter.find_rejected_jobs(jobs)
+
+    chunks = ({key: jobs[key] for key in keys} for keys in iter_chunks(jobs, chunk_size))
+    rejected = {}
+    for chunk_rejected in map_chunks(_find_rejected_jobs_chunk, chunks, max_workers, {'job_filter': job_filter}):
+        rejected.update(chunk_rejected)
+    return rejected
+
+def _parse_pages_chunk(pages: List[Tuple[str, str]]) -> List[Tuple[Optional[int], Optional[Dict[str, str]], Optional[str]]]:
+    """
+    Parses and filters the job cards of several cached pages in a worker process.
+
+    Args:
+        pages (List[Tuple[str, str]]): The URL of each page and the path of its cached HTML file.
+
+    Returns:
+        List[Tuple[Optional[int], Optional[Dict[str, str]], Optional[str]]]: For every job card, in page order, the
+        integer job key and job details, or None for cards that could not be extracted, and the name of the
+        rejecting rule, or None if the job was accepted.
+    """
+    results = []
+    for url, path in pages:
+        with open(path, encoding='utf-8') as page_file:
+            job_cards = parse_job_cards(page_file.read(), url)
+        results.extend(evaluate_job_cards(job_cards, _worker_state['job_filter'], _worker_state['headers'],
+                                          _worker_state['search_criteria'], date_normalizer=_worker_state['date_normalizer']))
+    return results
+
+def reparse_cached_pages(page_cache: PageCache, job_filter, jobs: Dict[int, JobRecord], headers: List[str],
+                         search_criteria: str='', max_workers: Optional[int]=0,
+                         chunk_size: int=DEFAULT_PAGE_CHUNK_SIZE) -> Tuple[Set[int], Dict[str, int]]:
+    """
+    Re-parses every page in the page cache with the current filter rules, sharding the pages across worker processes.
+
+    The results are merged into the stored jobs in page order, so the outcome does not depend on the number of
+    workers. Jobs that are already stored keep their posted date, applied status and search criteria.
+
+    Args:
+        page_cache (PageCache): The page cache holding the archived result pages.
+        job_filter (JobFilter): The filter rules to apply.
+        jobs (Dict[int, JobRecord]): The stored job records, keyed by the integer job key. Updated in place.
+        headers (List[str]): Headers of the job details.
+        search_criteria (str, optional): The search criteria stored with newly found jobs. Defaults to ''.
+        max_workers (Optional[int], optional): The number of worker processes, or 0 or None to use every core. Defaults to 0.
+        chunk_size (int, optional): The number of pages parsed per task. Defaults to DEFAULT_PAGE_CHUNK_SIZE.
+
+    Returns:
+        Tuple[Set[int], Dict[str, int]]: The job keys of the accepted jobs, and the number of job cards rejected by
+        each filter rule, including 'errored' for cards with missing fields.
+    """
+    # Every worker resolves posted dates against the same reference time
+    state = {'job_filter': job_filter, 'headers': headers, 'search_criteria': search_criteria,
+             'date_normalizer': utils.PostDateNormalizer()}
+    accepted_job_keys = set()
+    num_rejected_job_cards = {}
+
+    for results in map_chunks(_parse_pages_chunk, iter_chunks(page_cache.iter_pages(), chunk_size), max_workers, state):
+        for job_key, job_details, reason in results:
+            if reason is not None:
+                num_rejected_job_cards[reason] = num_rejected_job_cards.get(reason, 0) + 1
+                continue
+
+            utils.merge_job_record(jobs, job_key, job_details)
+            accepted_job_keys.add(job_key)
+
+    return accepted_job_keys, num_rejected_job_cards
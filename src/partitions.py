@@ -0,0 +1,416 @@
+import datetime
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Set, cast
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font
+from openpyxl.worksheet.worksheet import Worksheet
+
+import utils
+from job_record import JobRecord
+
+# Ways of partitioning the Excel output, selected in 'csv_settings.partition_by'. An empty value disables partitioning
+PARTITION_KEYS = ['month', 'search_criteria']
+
+# Where partitions are written, selected in 'csv_settings.partition_output'
+PARTITION_OUTPUTS = ['files', 'sheets']
+
+# Name of the sheet listing the partitions, which is the only sheet of the output workbook when partitions are files
+SUMMARY_SHEET_NAME = 'Summary'
+
+# Columns of the summary sheet
+SUMMARY_HEADERS = ['partition', 'location', 'jobs', 'applied', 'not_applied', 'skipped', 'updated', 'digest']
+
+# Partition of jobs with no valid posted date or no search criteria
+UNKNOWN_PARTITION = 'unknown'
+
+# Characters that are not allowed in sheet names, also replaced in file names
+INVALID_NAME_CHARACTERS_REGEX = re.compile(r'[\[\]:*?/\\<>|"]+')
+
+# Maximum length of a sheet name
+MAX_SHEET_NAME_LENGTH = 31
+
+class Partition(NamedTuple):
+    """A partition listed in the summary sheet.
+
+    Attributes:
+        key (str): The month ('YYYY-MM') or search criteria of the jobs in the partition.
+        location (str): The file name of the partition, relative to the output workbook, or its sheet name.
+        digest (str): The digest of the rows last written to the partition.
+        updated (str): The time the partition was last rewritten.
+    """
+    key: str
+    location: str
+    digest: str
+    updated: str
+
+def get_partition_settings(config: Dict) -> Optional[str]:
+    """
+    Returns the selected partitioning of the Excel output.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+
+    Returns:
+        Optional[str]: One of PARTITION_KEYS, or None if the output is a single sheet.
+
+    Raises:
+        ValueError: If the partitioning or the partition output is unknown.
+    """
+    csv_settings = config['csv_settings']
+    partition_by = csv_settings.get('partition_by') or None
+    if partition_by is not None and partition_by not in PARTITION_KEYS:
+        raise ValueError(f"Unknown partition_by: {partition_by!r}")
+    if get_partition_output(config) not in PARTITION_OUTPUTS:
+        raise ValueError(f"Unknown partition_output: {get_partition_output(config)!r}")
+    return partition_by
+
+def get_partition_output(config: Dict) -> str:
+    """
+    Returns where partitions are written.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+
+    Returns:
+        str: One of PARTITION_OUTPUTS. Defaults to 'files'.
+    """
+    return config['csv_settings'].get('partition_output') or 'files'
+
+def get_partition_key(job_record: JobRecord, partition_by: str) -> str:
+    """
+    Returns the partition of a job record.
+
+    Args:
+        job_record (JobRecord): The job record.
+        partition_by (str): One of PARTITION_KEYS.
+
+    Returns:
+        str: The month of the posted date as 'YYYY-MM', or the search criteria, or UNKNOWN_PARTITION.
+    """
+    if partition_by == 'month':
+        posted_date = utils.parse_posted_date(job_record.get('posted_date'))
+        return posted_date.strftime('%Y-%m') if posted_date else UNKNOWN_PARTITION
+    return str(job_record.get('search_criteria') or UNKNOWN_PARTITION)
+
+def partition_job_records(job_records: Dict[int, JobRecord], partition_by: str) -> Dict[str, Dict[int, JobRecord]]:
+    """
+    Splits job records into partitions.
+
+    Args:
+        job_records (Dict[int, JobRecord]): A dictionary of job records, keyed by the integer job key.
+        partition_by (str): One of PARTITION_KEYS.
+
+    Returns:
+        Dict[str, Dict[int, JobRecord]]: The job records of each partition, keyed by partition key in sorted order.
+    """
+    partitions = {}
+    for job_key, job_record in job_records.items():
+        partitions.setdefault(get_partition_key(job_record, partition_by), {})[job_key] = job_record
+    return {key: partitions[key] for key in sorted(partitions)}
+
+def compute_partition_digest(fieldnames: List[str], job_records: Dict[int, JobRecord]) -> str:
+    """
+    Computes a digest of the rows of a partition, in output order.
+
+    Args:
+        fieldnames (List[str]): The headers of the written columns.
+        job_records (Dict[int, JobRecord]): The job records of the partition.
+
+    Returns:
+        str: The SHA-256 digest of the headers and rows.
+    """
+    digest = hashlib.sha256(json.dumps(fieldnames).encode())
+    for job_record in utils.sort_job_records(job_records):
+        digest.update(json.dumps([str(job_record.get(header, '')) for header in fieldnames]).encode())
+    return digest.hexdigest()
+
+def is_file_location(location: str) -> bool:
+    """
+    Returns whether a partition is stored in its own file rather than in a sheet of the output workbook.
+
+    Args:
+        location (str): The location of the partition listed in the summary sheet.
+
+    Returns:
+        bool: True if the location is a file name.
+    """
+    return location.lower().endswith('.xlsx')
+
+def read_partition_summary(workbook: Workbook) -> Optional[List[Partition]]:
+    """
+    Reads the partitions listed in the summary sheet of a workbook.
+
+    Args:
+        workbook (Workbook): The output workbook.
+
+    Returns:
+        Optional[List[Partition]]: The partitions, or None if the workbook has no summary sheet.
+    """
+    if SUMMARY_SHEET_NAME not in workbook.sheetnames:
+        return None
+
+    rows = workbook[SUMMARY_SHEET_NAME].iter_rows(values_only=True)
+    headers = next(rows, ())
+    partitions = []
+    for row in rows:
+        values = dict(zip(headers, row))
+        if values.get('partition') is not None and values.get('location'):
+            partitions.append(Partition(str(values['partition']), str(values['location']), values.get('digest') or '',
+                                        values.get('updated') or ''))
+    return partitions
+
+def read_output_summary(filename: str) -> List[Partition]:
+    """
+    Reads the partitions listed in the summary sheet of the output workbook without loading its other sheets.
+
+    Args:
+        filename (str): The path of the output workbook.
+
+    Returns:
+        List[Partition]: The partitions, or an empty list if the workbook does not exist or has no summary sheet.
+    """
+    if not os.path.isfile(filename):
+        return []
+
+    workbook = load_workbook(filename, read_only=True)
+    try:
+        return read_partition_summary(workbook) or []
+    finally:
+        workbook.close()
+
+def allocate_location(key: str, partition_output: str, base_name: str, taken: Set[str]) -> str:
+    """
+    Chooses the file name or sheet name of a new partition.
+
+    Args:
+        key (str): The partition key.
+        partition_output (str): One of PARTITION_OUTPUTS.
+        base_name (str): The file name of the output workbook without extension, used as prefix of partition files.
+        taken (Set[str]): The lowercase locations already used by other partitions. The new location is added.
+
+    Returns:
+        str: A location not used by any other partition.
+    """
+    name = INVALID_NAME_CHARACTERS_REGEX.sub('_', key).strip("' ") or UNKNOWN_PARTITION
+    if partition_output == 'sheets':
+        name = name[:MAX_SHEET_NAME_LENGTH].replace('.', '_')
+        candidate = name
+    else:
+        candidate = f"{base_name}_{name}.xlsx"
+
+    suffix = 2
+    while candidate.lower() in taken or candidate.lower() == SUMMARY_SHEET_NAME.lower():
+        if partition_output == 'sheets':
+            candidate = f"{name[:MAX_SHEET_NAME_LENGTH - len(str(suffix)) - 1]}_{suffix}"
+        else:
+            candidate = f"{base_name}_{name}_{suffix}.xlsx"
+        suffix += 1
+
+    taken.add(candidate.lower())
+    return candidate
+
+def count_applied(job_records: Dict[int, JobRecord]) -> Dict[str, int]:
+    """
+    Counts the job records of each value of the 'applied' column.
+
+    Args:
+        job_records (Dict[int, JobRecord]): The job records.
+
+    Returns:
+        Dict[str, int]: The number of job records, keyed by 'applied' value.
+    """
+    applied_counts = {}
+    for job_record in job_records.values():
+        applied = job_record.get('applied', '')
+        applied_counts[applied] = applied_counts.get(applied, 0) + 1
+    return applied_counts
+
+def write_summary_sheet(worksheet: Worksheet, partitions: List[Partition],
+                        partition_records: Dict[str, Dict[int, JobRecord]]) -> None:
+    """
+    Writes the summary row of every partition below a bold header row.
+
+    Args:
+        worksheet (Worksheet): The empty summary sheet.
+        partitions (List[Partition]): The partitions.
+        partition_records (Dict[str, Dict[int, JobRecord]]): The job records of each partition, keyed by partition key.
+
+    Returns:
+        None
+    """
+    worksheet.append(SUMMARY_HEADERS)
+    for cell in worksheet[1]:
+        cell.font = Font(bold=True)
+
+    for partition in partitions:
+        job_records = partition_records[partition.key]
+        applied_counts = count_applied(job_records)
+        worksheet.append([partition.key, partition.location, len(job_records), applied_counts.get('Yes', 0),
+                          applied_counts.get('No', 0), applied_counts.get('Skip', 0), partition.updated,
+                          partition.digest])
+
+def write_partitioned_jobs_excel(config: Dict, job_records: Dict[int, JobRecord]) -> List[str]:
+    """
+    Writes job records to the partitions of the Excel output, rewriting only the partitions whose rows changed.
+
+    A partition is rewritten when the digest of its rows differs from the digest stored in the summary sheet, so a
+    run that only finds jobs posted this month rewrites only the current month. Partitions that no longer hold any
+    job are removed. With 'files' output, each partition is its own workbook next to the output workbook, which only
+    holds the summary sheet, so the save time does not grow with the history. With 'sheets' output, every partition
+    is a sheet of the output workbook; unchanged sheets are not rebuilt, but the whole workbook is still saved.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+        job_records (Dict[int, JobRecord]): A dictionary of job records, keyed by the integer job key.
+
+    Returns:
+        List[str]: The keys of the rewritten partitions.
+    """
+    partition_by = get_partition_settings(config)
+    partition_output = get_partition_output(config)
+    filename = config['csv_settings']['excel_output_path']
+    fieldnames = utils.get_csv_headers(config)
+    directory = os.path.dirname(filename)
+    base_name = os.path.splitext(os.path.basename(filename))[0]
+
+    if partition_output == 'sheets':
+        workbook = load_workbook(filename) if os.path.isfile(filename) else None
+        previous_partitions = read_partition_summary(workbook) if workbook is not None else None
+        if previous_partitions is None:
+            # A missing workbook, or a single sheet workbook written before partitioning, is replaced
+            workbook = Workbook()
+            workbook.remove(workbook.active)
+    else:
+        previous_partitions = read_output_summary(filename)
+        workbook = Workbook()
+        workbook.remove(workbook.active)
+
+    # Partitions stored the other way are rewritten, as when switching between files and sheets
+    stale_partitions = {partition.key: partition for partition in previous_partitions or []}
+    previous_partitions = {key: partition for key, partition in stale_partitions.items()
+                           if is_file_location(partition.location) == (partition_output == 'files')}
+    taken = {partition.location.lower() for partition in stale_partitions.values()}
+    updated = datetime.datetime.now().strftime('%m/%d/%Y %H:%M')
+    partition_records = partition_job_records(job_records, partition_by)
+    partitions = []
+    rewritten = []
+
+    for key, records in partition_records.items():
+        digest = compute_partition_digest(fieldnames, records)
+        previous = previous_partitions.get(key)
+        if previous is not None:
+            stale_partitions.pop(key)
+            location = previous.location
+        else:
+            location = allocate_location(key, partition_output, base_name, taken)
+
+        if partition_output == 'files':
+            is_unchanged = previous is not None and previous.digest == digest and \
+                os.path.isfile(os.path.join(directory, location))
+        else:
+            is_unchanged = previous is not None and previous.digest == digest and location in workbook.sheetnames
+
+        if is_unchanged:
+            partitions.append(previous)
+            continue
+
+        if partition_output == 'files':
+            utils.write_jobs_excel(os.path.join(directory, location), records, fieldnames)
+        else:
+            worksheet = workbook[location] if location in workbook.sheetnames else workbook.create_sheet(location)
+            utils.write_jobs_worksheet(worksheet, fieldnames, records, f"JobTable_{utils.string_to_hash(key)[:8]}")
+        partitions.append(Partition(key, location, digest, updated))
+        rewritten.append(key)
+
+    # Remove the partitions that no longer hold any job
+    for stale_partition in stale_partitions.values():
+        path = os.path.join(directory, stale_partition.location)
+        if is_file_location(stale_partition.location):
+            if os.path.isfile(path):
+                os.remove(path)
+        elif stale_partition.location in workbook.sheetnames:
+            workbook.remove(workbook[stale_partition.location])
+
+    if SUMMARY_SHEET_NAME in workbook.sheetnames:
+        workbook.remove(workbook[SUMMARY_SHEET_NAME])
+    write_summary_sheet(workbook.create_sheet(SUMMARY_SHEET_NAME, 0), partitions, partition_records)
+    workbook.active = 0
+    workbook.save(filename)
+
+    print(f"Rewrote {len(rewritten)} of {len(partitions)} Excel partitions")
+    return rewritten
+
+def read_partitioned_jobs_excel(config: Dict) -> Dict[int, JobRecord]:
+    """
+    Reads job records from every partition listed in the summary sheet of the Excel output.
+
+    Workbooks without a summary sheet are read as a single sheet, so partitioning can be enabled on an existing output.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+
+    Returns:
+        Dict[int, JobRecord]: A dictionary where each key is the integer job key and the value is the job record.
+    """
+    filename = config['csv_settings']['excel_output_path']
+    headers = utils.get_csv_headers(config)
+    if not os.path.isfile(filename):
+        return {}
+
+    workbook = load_workbook(filename, read_only=True)
+    try:
+        partitions = read_partition_summary(workbook)
+        if partitions is None:
+            return utils.read_worksheet_job_records(cast(Worksheet, workbook.active), headers)
+
+        job_records = {}
+        for partition in partitions:
+            if partition.location in workbook.sheetnames:
+                job_records.update(utils.read_worksheet_job_records(workbook[partition.location], headers))
+                continue
+
+            path = os.path.join(os.path.dirname(filename), partition.location)
+            if os.path.isfile(path):
+                partition_workbook = load_workbook(path, read_only=True)
+                try:
+                    job_records.update(utils.read_worksheet_job_records(
+                        cast(Worksheet, partition_workbook.active), headers))
+                finally:
+                    partition_workbook.close()
+        return job_records
+    finally:
+        workbook.close()
+
+def remove_partitions(config: Dict) -> None:
+    """
+    Removes the partition files listed in the summary sheet of the Excel output, and the output workbook itself, so
+    the output can be written as a single sheet again after partitioning is disabled.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+
+    Returns:
+        None
+    """
+    filename = config['csv_settings']['excel_output_path']
+    if not os.path.isfile(filename):
+        return
+
+    workbook = load_workbook(filename, read_only=True)
+    try:
+        partitions = read_partition_summary(workbook)
+        sheetnames = workbook.sheetnames
+    finally:
+        workbook.close()
+    if partitions is None:
+        return
+
+    for partition in partitions:
+        path = os.path.join(os.path.dirname(filename), partition.location)
+        if partition.location not in sheetnames and os.path.isfile(path):
+            os.remove(path)
+    os.remove(filename)
@@ -1,9 +1,10 @@
 import json
 import logging
 import math
+import pathlib
+import threading
 from random import randint
-from time import sleep
-from typing import Dict, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 from selenium import webdriver
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
@@ -13,33 +14,160 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.remote.webelement import WebElement
 
 import utils
+from filters import JobFilter
+from job_record import JobRecord
+from page_cache import PageCache, strip_scripts
+from enrichment import JobEnricher, reject_by_full_descriptions
+from fetchers import HttpFetcher, is_usable_page
+from exporters import load_jobs, merge_output_edits
+from archive import JobArchive
+from job_log import JobLog
+from job_cards import REQUIRED_JOB_CARD_FIELDS, parse_job_cards
+from search_index import SearchIndex
+from near_duplicates import NearDuplicateIndex
+from seen_jobs import LazyJobStore, SeenJobsFilter
+
+# Extracts every job card on the page in a single round trip and applies the title keyword and
+# years of experience filters in the browser, so rejected cards never cross the WebDriver boundary.
+# Mirrors utils.is_valid_indeed_job_link_structure, JobFilter.is_excluded_title and
+# JobFilter.has_valid_years_of_experience: the excluded title and years of experience regular
+# expressions are the ones compiled in Python, passed as arguments.
+FILTER_JOB_CARDS_SCRIPT = """
+const excludedTitleRegex = arguments[0] === null ? null : new RegExp(arguments[0]);
+const yearsOfExperienceRegex = new RegExp(arguments[1], 'gi');
+const maxYearsOfExperience = arguments[2];
+const rejected = {errored: 0, invalid_link: 0, years_of_experience: 0, excluded_title: 0};
+const jobs = [];
+
+function text(card, selector) {
+    const element = card.querySelector(selector);
+    return element ? element.innerText : null;
+}
+
+// Same as utils.lowercase_title
+function lowercaseTitle(title) {
+    return title.trim().split(/\\s+/).join(' ').toLowerCase();
+}
+
+function isExcludedTitle(title) {
+    return excludedTitleRegex !== null && excludedTitleRegex.test(lowercaseTitle(title));
+}
+
+function hasValidYearsOfExperience(description) {
+    const years = Array.from(description.matchAll(yearsOfExperienceRegex), match => parseInt(match[1], 10));
+    if (years.length === 0) return true;
+    return maxYearsOfExperience !== null && maxYearsOfExperience >= Math.min(...years);
+}
+
+for (const card of document.querySelectorAll('div.job_seen_beacon')) {
+    const anchor = card.querySelector('a');
+    const job = {
+        job_link: anchor ? anchor.href : null,
+        description: text(card, 'tr.underShelfFooter'),
+        title: text(card, 'h2.jobTitle'),
+        company: text(card, 'span[data-testid="company-name"]'),
+        location: text(card, 'div[data-testid="text-location"]'),
+        salary_preview: text(card, '[class*="salary-snippet-container"] div[data-testid="attribute_snippet_testid"]') || 'N/A',
+        posted_date: text(card, 'span[data-testid="myJobsStateDate"]'),
+    };
+
+    if ([job.job_link, job.description, job.title, job.company, job.location, job.posted_date].includes(null)) {
+        rejected.errored++;
+    } else if (!job.job_link.startsWith('https://www.indeed.com/rc/clk?jk=')) {
+        rejected.invalid_link++;
+    } else if (!hasValidYearsOfExperience(job.description)) {
+        rejected.years_of_experience++;
+    } else if (isExcludedTitle(job.title)) {
+        rejected.excluded_title++;
+    } else {
+        jobs.push(job);
+    }
+}
+return {jobs: jobs, rejected: rejected};
+"""
+
+# Resolves the relative links of a cached page snapshot against the URL it was originally fetched from
+SET_BASE_URL_SCRIPT = """
+const base = document.createElement('base');
+base.href = arguments[0];
+document.head.prepend(base);
+"""
+
+def get_filter_script_arguments(job_filter: JobFilter) -> Tuple[Optional[str], str, Optional[int]]:
+    """
+    Returns the arguments of FILTER_JOB_CARDS_SCRIPT, so the page script applies the same rules as the job filter.
+
+    Args:
+        job_filter (JobFilter): The compiled filter rules.
+
+    Returns:
+        Tuple[Optional[str], str, Optional[int]]: The pattern of the excluded title regular expression, or None if no
+        keyword is excluded, the pattern of the years of experience regular expression, and the user's maximum years
+        of experience.
+    """
+    excluded_title_regex = job_filter.excluded_title_regex
+    return (excluded_title_regex.pattern if excluded_title_regex is not None else None,
+            utils.YEARS_OF_EXPERIENCE_REGEX.pattern, job_filter.max_years_of_experience)
 
 class Scraper:
     """A web scraper for extracting job listings.
 
     Attributes:
-        driver (webdriver.Chrome): The Selenium web driver for Chrome.
+        driver (webdriver.Chrome): The Selenium web driver for Chrome, started on first use.
         url (str): The URL to scrape.
         excluded_keywords (Set[str]): Keywords to exclude from the results.
         csv_headers (List[str]): Headers for the CSV output.
         crawl_delay (int): Delay between page crawls.
-        jobs (Dict[str, Dict[str, str]]): Dictionary of job listings.
+        filter_in_browser (bool): Whether job cards are extracted and filtered by a script running in the page.
+        job_filter (JobFilter): The compiled filter rules applied to every extracted job.
+        jobs (Dict[int, JobRecord]): Dictionary of job listings, keyed by the integer job key. A LazyJobStore if the
+            job log or the seen jobs filter is enabled and filled.
         initial_num_records (int): Initial number of job records.
         num_errored_job_extractions (int): Number of job extractions that resulted in errors.
+        num_rejected_job_cards (Dict[str, int]): Number of job cards rejected by the filters, keyed by filter rule.
+        new_job_keys (Set[int]): The job keys of the jobs first stored during this run, which are the only jobs
+            removed when their full description is rejected.
         search_criteria (str): Criteria used for searching jobs.
-        previous_page_hash_ids (Set[str]): Hash IDs of job listings from the previous page.
+        date_normalizer (utils.PostDateNormalizer): Resolves the posted dates of the run against its start time.
+        previous_page_job_keys (Set[int]): Job keys of job listings from the previous page.
         logger (logging.Logger): Logger for the scraper.
+        page_cache (Optional[PageCache]): The on-disk cache of fetched result pages, or None if disabled.
+        replay_from_cache (bool): Whether pages are only read from the page cache, regardless of their age, instead of the web.
+        page_from_cache (bool): Whether the current page was loaded from the page cache.
+        enricher (Optional[JobEnricher]): Fetches the full description of accepted jobs, or None if enrichment is disabled.
+        http_fetcher (Optional[HttpFetcher]): Fetches result pages over plain HTTP before falling back to the browser, or None if disabled.
+        page_job_cards (Optional[List[Dict[str, Optional[str]]]]): The job cards parsed from the HTML of the current page,
+            or None if the current page was loaded in the browser.
+        num_browser_fallbacks (int): Number of pages loaded in the browser because the HTTP response was blocked or incomplete.
+        stop_event (threading.Event): Set to stop the scraper, interrupting any wait between pages.
+        search_index (Optional[SearchIndex]): The full-text index of the jobs, updated as jobs are accepted, or None if disabled.
+        near_duplicates (Optional[NearDuplicateIndex]): Finds new jobs that are near duplicates of stored jobs, or None if disabled.
+        seen_jobs (Optional[SeenJobsFilter]): The filter of the saved job keys, which lets the scraper recognize new
+            jobs without reading the saved jobs, or None if disabled.
+        job_log (Optional[JobLog]): The log of the saved jobs, which reads saved jobs one at a time, or None if disabled.
+        archive (Optional[JobArchive]): The jobs moved out of the saved jobs by the retention policy, which are not
+            stored again, or None if no job has been archived.
     """
 
-    def __init__(self, url):
+    def __init__(self, url, stop_event: Optional[threading.Event]=None):
         """Initialize the Scraper with a URL.
 
         Args:
             url (str): The URL to scrape.
+            stop_event (Optional[threading.Event], optional): Set to stop the scraper, interrupting any wait between
+                pages. Defaults to a new event.
         """
-        self.driver = webdriver.Chrome()
+        self._driver = None
         self.url = url
+        self.stop_event = stop_event or threading.Event()
         self.initialize_scraper()
+
+    @property
+    def driver(self) -> webdriver.Chrome:
+        """The Selenium web driver, started on first use so that Chrome is never started when every page is fetched over HTTP."""
+        if self._driver is None:
+            self._driver = webdriver.Chrome()
+        return self._driver
     
     def initialize_scraper(self) -> None:
         """
@@ -52,44 +180,183 @@ class Scraper:
             config = json.load(config_file)
 
         self.excluded_keywords = config['excluded_keywords']
-        self.csv_headers = config['csv_settings']['csv_headers']
+        self.csv_headers = utils.get_csv_headers(config)
         self.crawl_delay = config['crawl_delay']
-        self.jobs = utils.read_jobs_excel(config['csv_settings']['excel_output_path'])  # {hash_id: record}
-        self.initial_num_records = len(self.jobs)
+        self.filter_in_browser = config.get('filter_in_browser', False)
+        self.job_filter = JobFilter.from_config(config)
+        self.seen_jobs = SeenJobsFilter.from_config(config)
+        self.job_log = JobLog.from_config(config)
+        if self.job_log is not None:
+            merge_output_edits(config, self.job_log)
+        # The saved jobs are only read once a job may have been saved before, unless the filter has not been filled yet
+        if self.job_log is not None and len(self.job_log):
+            self.jobs = LazyJobStore(self.job_log, lambda: load_jobs(config), self.job_log.get)
+        elif self.seen_jobs is not None and len(self.seen_jobs):
+            self.jobs = LazyJobStore(self.seen_jobs, lambda: load_jobs(config))
+        else:
+            self.jobs = load_jobs(config)  # {job key: record}
+            self._initial_num_records = len(self.jobs)
         self.num_errored_job_extractions = 0
+        self.num_rejected_job_cards = {'invalid_link': 0, 'years_of_experience': 0, 'excluded_title': 0}
+        self.new_job_keys = set()
         self.search_criteria = '|'.join(list(config['indeed_criteria'].values()))
-        self.previous_page_hash_ids = set()
+        self.date_normalizer = utils.PostDateNormalizer()
+        self.previous_page_job_keys = set()
         self.logger = logging.getLogger(__name__)
-        self.driver.get(self.url)
-
-    def extract_current_page(self) -> Set[str]:
+        self.page_cache = PageCache.from_config(config)
+        self.replay_from_cache = config.get('page_cache', {}).get('replay', False)
+        self.page_from_cache = False
+        self.http_fetcher = HttpFetcher() if config.get('http_first', False) else None
+        self.page_job_cards = None
+        self.num_browser_fallbacks = 0
+        self.enricher = JobEnricher.from_config(config, self.http_fetcher)
+        # The indexes are synchronized with the saved jobs whenever they are written, so a lazily read history is not read here
+        self.search_index = SearchIndex.from_config(config)
+        if self.search_index and not isinstance(self.jobs, LazyJobStore):
+            self.search_index.sync(self.jobs)
+        self.near_duplicates = NearDuplicateIndex.from_config(config)
+        if self.near_duplicates is not None and not isinstance(self.jobs, LazyJobStore):
+            self.near_duplicates.sync(self.jobs)
+        self.archive = JobArchive.from_config(config)
+        self.load_page(self.url)
+
+    @property
+    def initial_num_records(self) -> int:
+        """The number of saved job records when the scraper started, reading the saved jobs if they have not been read yet."""
+        if isinstance(self.jobs, LazyJobStore):
+            self.jobs.load()
+            return self.jobs.num_saved_records
+        return self._initial_num_records
+
+    def extract_current_page(self) -> Set[int]:
         """Extract and print job details from the current page.
 
         Returns:
-            Set[str]: Set of hash IDs for the jobs added to the results.
+            Set[int]: Set of job keys for the jobs added to the results.
+        """
+        current_page_added_job_keys = set()
+
+        if self.page_job_cards is not None:
+            self.process_parsed_job_cards(self.page_job_cards, current_page_added_job_keys)
+        elif not self.replay_from_cache or self.page_from_cache:
+            self.extract_browser_page(current_page_added_job_keys)
+
+        if self.enricher:
+            self.enrich_jobs(current_page_added_job_keys)
+
+        if self.search_index:
+            self.search_index.add({job_key: self.jobs[job_key] for job_key in current_page_added_job_keys if job_key in self.jobs})
+
+        return current_page_added_job_keys
+
+    def extract_browser_page(self, current_page_added_job_keys: Set[int]) -> None:
+        """Extract the job details from the page loaded in the browser.
+
+        Args:
+            current_page_added_job_keys (Set[int]): Set of job keys for the jobs added to the results.
         """
-        current_page_added_hash_ids = set()
         success, message = self.wait_for_job_cards_to_load()
 
         if not success:
             print(message)
-            return current_page_added_hash_ids
+            return
+
+        if self.page_cache and not self.page_from_cache:
+            self.page_cache.put(self.url, strip_scripts(self.driver.page_source))
 
         # Wait 1s to allow any dynamic web page changes to occur before scraping
-        sleep(1)
-        job_cards = self.driver.find_elements(By.CSS_SELECTOR, 'div.job_seen_beacon')
+        if self.stop_event.wait(1):
+            return
+
+        if self.filter_in_browser:
+            self.extract_filtered_job_cards(current_page_added_job_keys)
+        else:
+            job_cards = self.driver.find_elements(By.CSS_SELECTOR, 'div.job_seen_beacon')
+
+            for job_card in job_cards:
+                self.process_job_card(job_card, current_page_added_job_keys)
 
+    def process_parsed_job_cards(self, job_cards: List[Dict[str, Optional[str]]], current_page_added_job_keys: Set[int]) -> None:
+        """Process the job cards parsed from the HTML of the current page.
+
+        Args:
+            job_cards (List[Dict[str, Optional[str]]]): The parsed job cards, keyed by header.
+            current_page_added_job_keys (Set[int]): Set of job keys for the jobs added to the results.
+        """
         for job_card in job_cards:
-            self.process_job_card(job_card, current_page_added_hash_ids)
+            if any(job_card[field] is None for field in REQUIRED_JOB_CARD_FIELDS):
+                self.num_errored_job_extractions += 1
+            elif not utils.is_valid_indeed_job_link_structure(job_card['job_link']):
+                self.num_rejected_job_cards['invalid_link'] += 1
+            else:
+                self.process_extracted_job(job_card, current_page_added_job_keys)
+
+    def enrich_jobs(self, job_keys: Set[int]) -> None:
+        """
+        Fetches the full description of the given jobs and re-applies the years of experience filter to it.
+
+        Jobs first stored during this run that are rejected by their full description are removed from the results.
+        Saved jobs are never removed: those not applied to yet are marked as "Skip" instead.
+
+        Args:
+            job_keys (Set[int]): The job keys of the accepted jobs to enrich.
+
+        Returns:
+            None
+        """
+        records = [self.jobs[job_key] for job_key in job_keys if job_key in self.jobs]
+        descriptions = self.enricher.get_full_descriptions((record.hash_id, record.job_link) for record in records)
+
+        num_rejected = reject_by_full_descriptions(self.jobs, job_keys, descriptions,
+                                                   self.job_filter.has_valid_years_of_experience, self.new_job_keys)
+        if num_rejected:
+            self.num_rejected_job_cards['full_description'] = self.num_rejected_job_cards.get('full_description', 0) + num_rejected
+
+    def extract_filtered_job_cards(self, current_page_added_job_keys: Set[int]) -> None:
+        """Extract the job cards on the current page with the filters evaluated inside the browser.
+
+        Only the cards that pass the filters are returned from the page script, along with the number
+        of cards rejected by each filter.
 
-        return current_page_added_hash_ids
+        Args:
+            current_page_added_job_keys (Set[int]): Set of job keys for the jobs added to the results.
+        """
+        result = self.driver.execute_script(FILTER_JOB_CARDS_SCRIPT, *get_filter_script_arguments(self.job_filter))
+        rejected = result['rejected']
+
+        self.num_errored_job_extractions += rejected.pop('errored', 0)
+        for reason, count in rejected.items():
+            self.num_rejected_job_cards[reason] = self.num_rejected_job_cards.get(reason, 0) + count
 
-    def process_job_card(self, job_card: WebElement, current_page_added_hash_ids: Set[str]) -> None:
+        for extracted_job in result['jobs']:
+            self.process_extracted_job(extracted_job, current_page_added_job_keys)
+
+    def process_extracted_job(self, extracted_job: Dict[str, str], current_page_added_job_keys: Set[int]) -> None:
+        """Process a job card that has already been extracted and filtered by the page script.
+
+        Args:
+            extracted_job (Dict[str, str]): The raw text values of the job card, keyed by header.
+            current_page_added_job_keys (Set[int]): Set of job keys for the jobs added to the results.
+        """
+        job_key, job_details = utils.build_job_details(extracted_job, self.csv_headers, self.search_criteria, self.jobs,
+                                                       self.date_normalizer)
+
+        if (self.is_archived(job_key) or not self.passes_job_filter(job_details)
+                or not self.passes_near_duplicate_check(job_key, job_details)):
+            return
+
+        if job_key not in self.jobs:
+            self.new_job_keys.add(job_key)
+        self.jobs[job_key] = JobRecord.from_dict(job_details)
+        current_page_added_job_keys.add(job_key)
+        print('\n'.join([f'{header}: {job_details[header]}' for header in self.csv_headers]), '\n')
+
+    def process_job_card(self, job_card: WebElement, current_page_added_job_keys: Set[int]) -> None:
         """Process an individual job card.
 
         Args:
             job_card (WebElement): The job card element.
-            current_page_added_hash_ids (Set[str]): Set of hash IDs for the jobs added to the results.
+            current_page_added_job_keys (Set[int]): Set of job keys for the jobs added to the results.
         """
         add_to_results = True
         job_details = {}
@@ -105,36 +372,39 @@ class Scraper:
                 return
 
             job_details['job_link'] = utils.parse_indeed_url(indeed_full_url)
-            job_details['hash_id'] = utils.string_to_hash(job_details['job_link'])
-            hash_id = job_details['hash_id']
+            job_details['hash_id'] = utils.canonical_job_id(job_details['job_link'])
+            job_key = utils.job_key_to_int(job_details['hash_id'])
 
             description_element = job_card.find_element(By.CSS_SELECTOR, 'tr.underShelfFooter')
             description = description_element.text if description_element else 'N/A'
             job_details['description'] = description
 
             # Validate the job details
-            if not utils.is_valid_indeed_job_link_structure(job_details['job_link']) or not utils.description_has_valid_years_of_experience(description):
+            if not utils.is_valid_indeed_job_link_structure(job_details['job_link']) or not self.job_filter.has_valid_years_of_experience(description):
                 add_to_results = False
 
             for header in self.csv_headers:
                 if not add_to_results:
                     break
 
-                add_to_results = self.extract_job_detail(job_card, job_details, header, hash_id)
+                add_to_results = self.extract_job_detail(job_card, job_details, header, job_key)
 
                 if header not in job_details:
                     job_details[header] = ''
 
-            if add_to_results:
+            if (add_to_results and not self.is_archived(job_key) and self.passes_job_filter(job_details)
+                    and self.passes_near_duplicate_check(job_key, job_details)):
                 # Update results and print details
-                self.jobs[hash_id] = job_details
-                current_page_added_hash_ids.add(hash_id)
+                if job_key not in self.jobs:
+                    self.new_job_keys.add(job_key)
+                self.jobs[job_key] = JobRecord.from_dict(job_details)
+                current_page_added_job_keys.add(job_key)
                 print('\n'.join([f'{header}: {job_details[header]}' for header in self.csv_headers]), '\n')
 
         except NoSuchElementException as e:
             print(f"An element was not found: {e}")
     
-    def extract_job_detail(self, job_card: WebElement, job_details: Dict[str, str], header: str, hash_id: str) -> bool:
+    def extract_job_detail(self, job_card: WebElement, job_details: Dict[str, str], header: str, job_key: int) -> bool:
         """
         Extracts specific job details based on the header provided and updates the job_details dictionary.
 
@@ -142,7 +412,7 @@ class Scraper:
             job_card (WebElement): The WebElement representing a job card.
             job_details (Dict[str, str]): The dictionary to store job details, where the key is the header and the value is the corresponding detail.
             header (str): The specific job detail to extract, such as 'title', 'company', 'location', etc.
-            hash_id (str): The unique identifier for the job.
+            job_key (int): The integer job key of the job.
 
         Returns:
             bool: True if the job detail is successfully extracted and added to job_details, False otherwise.
@@ -152,7 +422,7 @@ class Scraper:
                 title_element = job_card.find_element(By.CSS_SELECTOR, 'h2.jobTitle')
                 job_details[header] = title_element.text if title_element else 'Title not found'
 
-                if title_element and utils.exclude_based_on_title(self.excluded_keywords, title_element.text):
+                if title_element and self.job_filter.is_excluded_title(title_element.text):
                     return False  # Do not add to results if title is excluded
 
             elif header == 'company':
@@ -173,28 +443,81 @@ class Scraper:
 
             elif header == 'posted_date':
                 posted_date_element = job_card.find_element(By.CSS_SELECTOR, 'span[data-testid="myJobsStateDate"]')
-                scraped_date_str = utils.parse_post_date(posted_date_element.text)
+                scraped_date_str = self.date_normalizer.parse(posted_date_element.text)
 
-                if hash_id in self.jobs:
-                    job_details[header] = str(self.jobs[hash_id][header])
+                if job_key in self.jobs:
+                    job_details[header] = self.jobs[job_key][header]
                 else:
                     job_details[header] = scraped_date_str
 
             elif header == 'applied':
                 # Fetch pre-existing values or default to "No", for not applied to job yet
-                if hash_id in self.jobs:
-                    job_details[header] = str(self.jobs[hash_id][header])
+                if job_key in self.jobs:
+                    job_details[header] = str(self.jobs[job_key][header])
                 else:
                     job_details[header] = 'No'
 
             elif header == 'search_criteria':
                 job_details[header] = self.search_criteria
 
+            elif header == 'duplicate_of':
+                job_details[header] = self.jobs[job_key][header] if job_key in self.jobs else ''
+
             return True  # By default, add to results
         except:
             self.num_errored_job_extractions += 1
             return False
 
+    def passes_job_filter(self, job_details: Dict[str, str]) -> bool:
+        """
+        Applies the configured filter rules to a fully extracted job, counting the rule that rejected it, if any.
+
+        Args:
+            job_details (Dict[str, str]): The extracted job details, keyed by header.
+
+        Returns:
+            bool: True if the job passes every filter rule, False otherwise.
+        """
+        reason = self.job_filter.rejection_reason(job_details)
+        if reason is None:
+            return True
+
+        self.num_rejected_job_cards[reason] = self.num_rejected_job_cards.get(reason, 0) + 1
+        return False
+
+    def is_archived(self, job_key: int) -> bool:
+        """
+        Checks whether a job was moved to the archive by the retention policy, counting it as rejected if it was.
+
+        Args:
+            job_key (int): The integer job key of the job.
+
+        Returns:
+            bool: True if the job is archived and should not be stored again, False otherwise.
+        """
+        if self.archive is None or job_key not in self.archive:
+            return False
+
+        self.num_rejected_job_cards['archived'] = self.num_rejected_job_cards.get('archived', 0) + 1
+        return True
+
+    def passes_near_duplicate_check(self, job_key: int, job_details: Dict[str, str]) -> bool:
+        """
+        Applies the near duplicate action to a job accepted by the filters, counting it as rejected if it is skipped.
+
+        Args:
+            job_key (int): The integer job key of the job.
+            job_details (Dict[str, str]): The extracted job details, keyed by header. Flagged in place.
+
+        Returns:
+            bool: True if the job should be stored, False otherwise.
+        """
+        if self.near_duplicates is None or self.near_duplicates.check(job_key, job_details, self.jobs):
+            return True
+
+        self.num_rejected_job_cards['near_duplicate'] = self.num_rejected_job_cards.get('near_duplicate', 0) + 1
+        return False
+
     def wait_for_job_cards_to_load(self, wait_time: int=5, max_tries: int=5) -> Tuple[bool, str]:
         """
         Waits for job cards to load on the webpage.
@@ -227,8 +550,65 @@ class Scraper:
             None
         """
         self.url = utils.get_next_page_url(self.url)
-        sleep(randint(self.crawl_delay, math.floor(self.crawl_delay * 1.5)))
-        self.driver.get(self.url)
+        if not self.get_cached_page_path(self.url):
+            # Returns early as soon as the scraper is stopped
+            if self.stop_event.wait(randint(self.crawl_delay, math.floor(self.crawl_delay * 1.5))):
+                return
+        self.load_page(self.url)
+
+    def get_cached_page_path(self, url: str) -> Optional[str]:
+        """
+        Returns the path of the cached snapshot of a page, if the page cache is enabled.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            Optional[str]: The path of the cached HTML file, or None if the page is not cached, has expired or the cache is disabled.
+        """
+        if self.page_cache is None:
+            return None
+        return self.page_cache.get_path(url, ignore_ttl=self.replay_from_cache)
+
+    def load_page(self, url: str) -> None:
+        """
+        Loads a page, from the page cache when a fresh snapshot of the page is available.
+
+        Cached pages and pages fetched over plain HTTP are parsed without the browser whenever their job cards can be
+        found in the HTML. Otherwise, the page is loaded in the web driver. In replay mode, pages missing from the cache
+        are not fetched from the web.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            None
+        """
+        html = self.page_cache.get(url, ignore_ttl=self.replay_from_cache) if self.page_cache else None
+        self.page_from_cache = html is not None
+        self.page_job_cards = None
+
+        if html is None and self.http_fetcher and not self.replay_from_cache:
+            html = self.http_fetcher.fetch(url)
+
+        if html is not None:
+            job_cards = parse_job_cards(html, url)
+            if is_usable_page(html, lambda html: bool(job_cards)):
+                self.page_job_cards = job_cards
+                if self.page_cache and not self.page_from_cache:
+                    self.page_cache.put(url, strip_scripts(html))
+                return
+
+        if self.page_from_cache:
+            # The snapshot only contains its job cards once rendered, so open it in the browser
+            self.driver.get(pathlib.Path(self.get_cached_page_path(url)).resolve().as_uri())
+            self.driver.execute_script(SET_BASE_URL_SCRIPT, url)
+        elif self.replay_from_cache:
+            self.logger.warning(f"Page not found in the page cache, skipping: {url}")
+        else:
+            if self.http_fetcher:
+                self.num_browser_fallbacks += 1
+            self.driver.get(url)
         
     def shutdown(self) -> None:
         """
@@ -237,4 +617,18 @@ class Scraper:
         Returns:
             None
         """
-        self.driver.quit()
\ No newline at end of file
+        if self._driver is not None:
+            self._driver.quit()
+        if self.http_fetcher:
+            self.http_fetcher.close()
+        if self.search_index:
+            self.search_index.close()
+        if self.near_duplicates is not None:
+            self.near_duplicates.save()
+        # The jobs are written after the shutdown, which reads them anyway
+        if isinstance(self.jobs, LazyJobStore):
+            self.jobs.load()
+        if self.seen_jobs is not None:
+            self.seen_jobs.close()
+        if self.job_log is not None:
+            self.job_log.close()
\ No newline at end of file
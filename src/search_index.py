@@ -0,0 +1,255 @@
+import re
+import sqlite3
+import threading
+import zlib
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+from job_record import JobRecord
+
+# Job keys are unsigned 64-bit integers, while SQLite rowids are signed
+ROWID_OFFSET = 1 << 64
+
+INDEX_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs USING fts5(
+    title, company, description, job_link UNINDEXED, checksum UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Columns of the jobs table. An index created with other columns is dropped and rebuilt by the next synchronization
+INDEX_COLUMNS = ['title', 'company', 'description', 'job_link', 'checksum']
+
+# Matches a quoted phrase or a single term of a search query, with an optional trailing '*' for prefix searches
+QUERY_TOKEN_REGEX = re.compile(r'"([^"]*)"(\*?)|([^\s"]+)')
+
+class SearchResult(NamedTuple):
+    """A job matching a search query.
+
+    Attributes:
+        job_key (int): The integer job key of the job.
+        title (str): The title of the job.
+        company (str): The company of the job.
+        job_link (str): The link to the job posting.
+        snippet (str): The part of the description around the matched terms, with matches in [brackets].
+    """
+    job_key: int
+    title: str
+    company: str
+    job_link: str
+    snippet: str
+
+class SearchIndex:
+    """A full-text index over the title, company and description of the saved jobs, stored in a SQLite FTS5 table.
+
+    Each job is a row of the table, with its job key as rowid, so indexing a job again replaces it. The index is
+    updated as jobs are accepted and synchronized with the saved jobs when they are written, so searching never
+    requires reading the output files. Each row stores a checksum of the indexed text, so synchronizing only
+    re-indexes the jobs whose title, company, description or link changed.
+
+    Attributes:
+        path (str): The path of the SQLite database.
+        connection (sqlite3.Connection): The connection to the database.
+        _lock (threading.Lock): The lock serializing the use of the connection.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes the SearchIndex, creating the database if needed.
+
+        Args:
+            path (str): The path of the SQLite database.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(jobs)").fetchall()]
+        if columns and columns != INDEX_COLUMNS:
+            self.connection.execute("DROP TABLE jobs")
+        self.connection.executescript(INDEX_SCHEMA)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['SearchIndex']:
+        """
+        Creates a SearchIndex from the 'search_index' settings of the configuration file.
+
+        Args:
+            config (Dict): The configuration dictionary loaded from config.json.
+
+        Returns:
+            Optional[SearchIndex]: The search index, or None if the index is disabled.
+        """
+        settings = config.get('search_index', {})
+        if not settings.get('enabled'):
+            return None
+        return cls(settings.get('path') or 'search_index.sqlite3')
+
+    def add(self, job_records: Mapping[int, JobRecord]) -> None:
+        """
+        Indexes jobs, replacing any previously indexed version of the same jobs.
+
+        Args:
+            job_records (Mapping[int, JobRecord]): The job records to index, keyed by the integer job key.
+
+        Returns:
+            None
+        """
+        self._insert([get_index_row(job_key, record) for job_key, record in job_records.items()])
+
+    def remove(self, job_keys: Iterable[int]) -> None:
+        """
+        Removes jobs from the index.
+
+        Args:
+            job_keys (Iterable[int]): The integer job keys of the jobs to remove.
+
+        Returns:
+            None
+        """
+        with self._lock, self._transaction():
+            self.connection.executemany("DELETE FROM jobs WHERE rowid = ?", [(to_rowid(job_key),) for job_key in job_keys])
+
+    def job_keys(self) -> Set[int]:
+        """
+        Returns the job keys of every indexed job.
+
+        Returns:
+            Set[int]: The integer job keys.
+        """
+        with self._lock:
+            rows = self.connection.execute("SELECT rowid FROM jobs").fetchall()
+        return {from_rowid(rowid) for (rowid,) in rows}
+
+    def sync(self, job_records: Mapping[int, JobRecord]) -> None:
+        """
+        Updates the index to contain exactly the given jobs, indexing the missing and changed ones and removing the
+        others.
+
+        Jobs whose indexed text is unchanged are left as they are, so synchronizing an up-to-date index only reads its
+        keys and checksums.
+
+        Args:
+            job_records (Mapping[int, JobRecord]): The saved job records, keyed by the integer job key.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            checksums = dict(self.connection.execute("SELECT rowid, checksum FROM jobs").fetchall())
+        self.remove(from_rowid(rowid) for rowid in set(checksums).difference(map(to_rowid, job_records)))
+
+        rows = (get_index_row(job_key, record) for job_key, record in job_records.items())
+        self._insert([row for row in rows if checksums.get(row[0]) != row[5]])
+
+    def search(self, query: str, limit: int=50) -> List[SearchResult]:
+        """
+        Searches the indexed jobs, best matches first.
+
+        Args:
+            query (str): The search query. Every term must match; quoted terms match as a phrase and terms ending with
+                '*' match as a prefix.
+            limit (int, optional): The maximum number of results. Defaults to 50.
+
+        Returns:
+            List[SearchResult]: The matching jobs, ranked by relevance.
+        """
+        match_query = build_match_query(query)
+        if not match_query:
+            return []
+
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT rowid, title, company, job_link, snippet(jobs, 2, '[', ']', '...', 12) FROM jobs "
+                "WHERE jobs MATCH ? ORDER BY rank LIMIT ?", (match_query, limit)).fetchall()
+        return [SearchResult(from_rowid(rowid), *values) for rowid, *values in rows]
+
+    def close(self) -> None:
+        """
+        Closes the connection to the database.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.connection.close()
+
+    def _insert(self, rows: List[Tuple[int, str, str, str, str, int]]) -> None:
+        """Inserts rows built by get_index_row, replacing the rows of the same jobs."""
+        if not rows:
+            return
+        with self._lock, self._transaction():
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO jobs (rowid, title, company, description, job_link, checksum) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def _transaction(self) -> 'sqlite3.Connection':
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __enter__(self) -> 'SearchIndex':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+def build_match_query(query: str) -> str:
+    """
+    Converts a search query typed by the user into an FTS5 query in which every term must match.
+
+    Terms are quoted, so punctuation and FTS5 operators in the query are searched as text rather than parsed.
+
+    Args:
+        query (str): The search query, with optional "quoted phrases" and terms ending with '*' for prefix searches.
+
+    Returns:
+        str: The FTS5 query, or '' if the query has no term.
+    """
+    terms = []
+    for match in QUERY_TOKEN_REGEX.finditer(query):
+        phrase, phrase_prefix, term = match.groups()
+        if term is not None:
+            term, phrase_prefix = (term[:-1], '*') if term.endswith('*') else (term, '')
+            phrase = term
+        if phrase.strip():
+            terms.append(f'"{phrase}"{phrase_prefix}')
+    return ' '.join(terms)
+
+def get_index_row(job_key: int, record: JobRecord) -> Tuple[int, str, str, str, str, int]:
+    """
+    Builds the row indexing a job.
+
+    Args:
+        job_key (int): The integer job key.
+        record (JobRecord): The job record.
+
+    Returns:
+        Tuple[int, str, str, str, str, int]: The rowid, title, company, description and link of the job, and the
+        CRC-32 of the indexed text.
+    """
+    values = [str(record.get(field, '')) for field in ('title', 'company', 'description', 'job_link')]
+    return (to_rowid(job_key), *values, zlib.crc32('\x1f'.join(values).encode('utf-8')))
+
+def to_rowid(job_key: int) -> int:
+    """
+    Converts a job key to the signed 64-bit rowid it is stored under.
+
+    Args:
+        job_key (int): The integer job key.
+
+    Returns:
+        int: The rowid.
+    """
+    return job_key - ROWID_OFFSET if job_key >= ROWID_OFFSET // 2 else job_key
+
+def from_rowid(rowid: int) -> int:
+    """
+    Converts a rowid back to the job key stored under it.
+
+    Args:
+        rowid (int): The rowid.
+
+    Returns:
+        int: The integer job key.
+    """
+    return rowid + ROWID_OFFSET if rowid < 0 else rowid
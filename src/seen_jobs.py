@@ -0,0 +1,343 @@
+import math
+import os
+from typing import Any, Callable, Container, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+import utils
+from job_record import JobRecord, JobStore
+
+# Identifies seen jobs filter files, and changes whenever their layout or hash functions change
+SEEN_JOBS_MAGIC = 0x4A4F42424C4F4F31
+
+# Size in bytes of the file header: magic, number of bits, number of hash functions, capacity and number of keys
+HEADER_SIZE = 64
+
+# Header fields, as indexes of the uint64 header array
+NUM_BITS_FIELD, NUM_HASHES_FIELD, CAPACITY_FIELD, COUNT_FIELD = 1, 2, 3, 4
+
+class SeenJobsFilter:
+    """A persistent Bloom filter of the job keys of every saved job, stored in a memory-mapped file.
+
+    A job key that is not in the filter has never been saved, so most new jobs are recognized without reading the
+    saved jobs. A job key in the filter has probably been saved, with a false positive rate of about error_rate as
+    long as the filter holds at most capacity keys. Keys are never removed, so jobs removed from the output files,
+    for example when archived, are still recognized.
+
+    Each job key is hashed num_hashes times with double hashing of two mixes of the key. Only the pages of the file
+    holding the tested bits are read, so a filter of several million keys is opened instantly.
+
+    Attributes:
+        path (str): The path of the file.
+        capacity (int): The number of keys the filter was sized for.
+        error_rate (float): The false positive rate at capacity.
+        num_bits (int): The number of bits of the filter.
+        num_hashes (int): The number of bits set per key.
+        _header (np.memmap): The uint64 header of the file.
+        _bits (np.memmap): The bits of the filter, as bytes.
+    """
+
+    def __init__(self, path: str, capacity: int=1_000_000, error_rate: float=0.01):
+        """
+        Initializes the SeenJobsFilter, opening its file, or creating it if it does not exist or has another layout.
+
+        The capacity and error rate of an existing file are kept.
+
+        Args:
+            path (str): The path of the file.
+            capacity (int, optional): The number of keys the filter is sized for. Defaults to 1,000,000.
+            error_rate (float, optional): The false positive rate at capacity. Defaults to 0.01.
+        """
+        self.path = path
+        self.error_rate = error_rate
+        if not self._open():
+            self._create(capacity)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['SeenJobsFilter']:
+        """
+        Creates a SeenJobsFilter from the 'seen_jobs' settings of the configuration file.
+
+        Args:
+            config (Dict): The configuration dictionary loaded from config.json.
+
+        Returns:
+            Optional[SeenJobsFilter]: The filter, or None if it is disabled.
+        """
+        settings = config.get('seen_jobs', {})
+        if not settings.get('enabled'):
+            return None
+        return cls(settings.get('path') or 'seen_jobs.bloom', int(settings.get('capacity') or 1_000_000),
+                   float(settings.get('error_rate') or 0.01))
+
+    def __len__(self) -> int:
+        """Returns the number of distinct keys added to the filter, not counting keys mistaken for added ones."""
+        return int(self._header[COUNT_FIELD])
+
+    def __contains__(self, job_key: int) -> bool:
+        positions = self._positions(np.array([job_key], dtype=np.uint64))[0]
+        return bool((self._bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8) & 1).all())
+
+    def __enter__(self) -> 'SeenJobsFilter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def contains_many(self, job_keys: Iterable[int]) -> np.ndarray:
+        """
+        Tests several job keys at once.
+
+        Args:
+            job_keys (Iterable[int]): The integer job keys.
+
+        Returns:
+            np.ndarray: A boolean array, True for the keys that have probably been added.
+        """
+        job_keys = np.fromiter(job_keys, dtype=np.uint64)
+        if not len(job_keys):
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(job_keys)
+        return (self._bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8) & 1).all(axis=1)
+
+    def add(self, job_keys: Iterable[int]) -> None:
+        """
+        Adds job keys to the filter.
+
+        Args:
+            job_keys (Iterable[int]): The integer job keys.
+
+        Returns:
+            None
+        """
+        job_keys = np.unique(np.fromiter(job_keys, dtype=np.uint64))
+        if not len(job_keys):
+            return
+        num_new_keys = int((~self.contains_many(job_keys)).sum())
+
+        positions = self._positions(job_keys).ravel()
+        if len(positions) < len(self._bits) // 8:
+            np.bitwise_or.at(self._bits, positions >> np.uint64(3), np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+        else:
+            # Setting many bits is faster on the unpacked bits of the whole filter
+            bits = np.unpackbits(self._bits, bitorder='little')
+            bits[positions] = 1
+            self._bits[:] = np.packbits(bits, bitorder='little')
+        self._header[COUNT_FIELD] += np.uint64(num_new_keys)
+
+    def sync(self, job_keys: Iterable[int]) -> None:
+        """
+        Adds the job keys of the saved jobs to the filter. A filter holding more keys than its capacity is rebuilt
+        from them with twice the capacity, so the job keys that are no longer saved are dropped.
+
+        Args:
+            job_keys (Iterable[int]): The integer job keys of every saved job.
+
+        Returns:
+            None
+        """
+        job_keys = list(job_keys)
+        self.add(job_keys)
+        if len(self) > self.capacity:
+            self.close()
+            self._create(max(2 * self.capacity, len(job_keys)))
+            self.add(job_keys)
+
+    def flush(self) -> None:
+        """
+        Writes the changes to the file.
+
+        Returns:
+            None
+        """
+        self._header.flush()
+        self._bits.flush()
+
+    def close(self) -> None:
+        """
+        Writes the changes to the file and unmaps it.
+
+        Returns:
+            None
+        """
+        self.flush()
+        del self._header, self._bits
+
+    def _open(self) -> bool:
+        """Maps an existing file with the expected layout, returning whether it could be opened."""
+        if not os.path.isfile(self.path) or os.path.getsize(self.path) < HEADER_SIZE:
+            return False
+
+        header = np.memmap(self.path, dtype=np.uint64, mode='r+', shape=(HEADER_SIZE // 8,))
+        num_bits = int(header[NUM_BITS_FIELD])
+        if int(header[0]) != SEEN_JOBS_MAGIC or os.path.getsize(self.path) != HEADER_SIZE + num_bits // 8:
+            del header
+            return False
+
+        self._header = header
+        self._bits = np.memmap(self.path, dtype=np.uint8, mode='r+', offset=HEADER_SIZE, shape=(num_bits // 8,))
+        self.num_bits = num_bits
+        self.num_hashes = int(header[NUM_HASHES_FIELD])
+        self.capacity = int(header[CAPACITY_FIELD])
+        return True
+
+    def _create(self, capacity: int) -> None:
+        """Creates an empty filter sized for capacity keys, replacing the file."""
+        num_bits = get_num_bits(capacity, self.error_rate)
+        header = np.zeros(HEADER_SIZE // 8, dtype=np.uint64)
+        header[[0, NUM_BITS_FIELD, NUM_HASHES_FIELD, CAPACITY_FIELD]] = [
+            SEEN_JOBS_MAGIC, num_bits, max(1, round(num_bits / capacity * math.log(2))), capacity]
+
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(header.tobytes())
+            temp_file.truncate(HEADER_SIZE + num_bits // 8)
+        os.replace(temp_path, self.path)
+        self._open()
+
+    def _positions(self, job_keys: np.ndarray) -> np.ndarray:
+        """Returns the bit positions of each job key, as rows, with 64-bit arithmetic wrapping around."""
+        first_hashes = mix64(job_keys)
+        second_hashes = mix64(first_hashes ^ job_keys) | np.uint64(1)
+        rounds = np.arange(self.num_hashes, dtype=np.uint64)
+        return (first_hashes[:, np.newaxis] + rounds * second_hashes[:, np.newaxis]) % np.uint64(self.num_bits)
+
+class LazyJobStore(JobStore):
+    """A JobStore that only reads the saved jobs once a job key may have been seen before.
+
+    The store starts with no records. Looking up a job key that the saved job keys rule out never reads the saved
+    jobs, so a run that only finds new jobs keeps just those jobs in memory. A key that is probably saved is read on
+    its own if the saved jobs support lookups by key, as the job log does. Otherwise the saved jobs are read on the
+    first lookup of such a key. They are always read before any iteration, so the store then behaves like the
+    JobStore returned by load_jobs, with the records stored in the meantime merged into the saved ones.
+
+    Attributes:
+        saved_job_keys (Container[int]): The job keys of the saved jobs, such as a SeenJobsFilter.
+        is_loaded (bool): Whether the saved jobs have been read.
+        num_saved_records (int): The number of saved jobs, or 0 until they have been read.
+        _load_jobs (Callable[[], Mapping[int, JobRecord]]): Reads the saved jobs.
+        _get_saved_job (Optional[Callable[[int], Optional[JobRecord]]]): Reads a single saved job, if supported.
+    """
+
+    def __init__(self, saved_job_keys: Container[int], load_jobs: Callable[[], Mapping[int, JobRecord]],
+                 get_saved_job: Optional[Callable[[int], Optional[JobRecord]]]=None):
+        """
+        Initializes an empty LazyJobStore.
+
+        Args:
+            saved_job_keys (Container[int]): The job keys of the saved jobs, or a filter of them without false negatives.
+            load_jobs (Callable[[], Mapping[int, JobRecord]]): Reads the saved jobs.
+            get_saved_job (Optional[Callable[[int], Optional[JobRecord]]], optional): Reads a single saved job, or
+                returns None if it is not saved. Defaults to None, which reads every saved job instead.
+        """
+        super().__init__()
+        self.saved_job_keys = saved_job_keys
+        self.is_loaded = False
+        self.num_saved_records = 0
+        self._load_jobs = load_jobs
+        self._get_saved_job = get_saved_job
+
+    def load(self) -> None:
+        """
+        Reads the saved jobs, unless they have already been read.
+
+        Returns:
+            None
+        """
+        if self.is_loaded:
+            return
+        self.is_loaded = True
+        stored_records = dict(dict.items(self))
+        saved_records = self._load_jobs()
+        self.num_saved_records = len(saved_records)
+        super().update(saved_records)
+        # Only saved jobs read on their own are merged into themselves, unless the output files were written without
+        # updating the saved job keys
+        for job_key, job_record in stored_records.items():
+            utils.merge_job_record(self, job_key, job_record.to_dict())
+
+    def _may_be_saved(self, job_key: int) -> bool:
+        """Reads the saved job if the job key is not stored yet and probably saved, returning whether it is stored."""
+        if dict.__contains__(self, job_key):
+            return True
+        if self.is_loaded or job_key not in self.saved_job_keys:
+            return False
+
+        if self._get_saved_job is None:
+            self.load()
+            return dict.__contains__(self, job_key)
+        job_record = self._get_saved_job(job_key)
+        if job_record is not None:
+            super().__setitem__(job_key, job_record)
+        return job_record is not None
+
+    def __contains__(self, job_key: object) -> bool:
+        return self._may_be_saved(job_key)
+
+    def __getitem__(self, job_key: int) -> JobRecord:
+        self._may_be_saved(job_key)
+        return super().__getitem__(job_key)
+
+    def get(self, job_key: int, default: Any=None) -> Any:
+        return super().__getitem__(job_key) if self._may_be_saved(job_key) else default
+
+    def __len__(self) -> int:
+        self.load()
+        return super().__len__()
+
+    def __iter__(self) -> Iterator[int]:
+        self.load()
+        return super().__iter__()
+
+    def keys(self):
+        self.load()
+        return super().keys()
+
+    def values(self):
+        self.load()
+        return super().values()
+
+    def items(self):
+        self.load()
+        return super().items()
+
+    def sorted_items(self) -> Iterator[Tuple[int, JobRecord]]:
+        self.load()
+        return super().sorted_items()
+
+    def sorted_values(self) -> List[JobRecord]:
+        self.load()
+        return super().sorted_values()
+
+    def copy(self) -> JobStore:
+        self.load()
+        return super().copy()
+
+def get_num_bits(capacity: int, error_rate: float) -> int:
+    """
+    Returns the number of bits of a Bloom filter holding capacity keys with the given false positive rate.
+
+    Args:
+        capacity (int): The number of keys.
+        error_rate (float): The false positive rate, between 0 and 1.
+
+    Returns:
+        int: The number of bits, rounded up to a multiple of 64.
+    """
+    num_bits = -max(capacity, 1) * math.log(error_rate) / math.log(2) ** 2
+    return max(64, math.ceil(num_bits / 64) * 64)
+
+def mix64(values: np.ndarray) -> np.ndarray:
+    """
+    Mixes 64-bit integers with the SplitMix64 finalizer, so that similar job keys have unrelated hashes.
+
+    Args:
+        values (np.ndarray): The uint64 values.
+
+    Returns:
+        np.ndarray: The mixed uint64 values.
+    """
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
@@ -0,0 +1,235 @@
+import os
+import re
+import struct
+import zlib
+from collections import Counter
+from typing import Iterable, Optional, Union
+
+# First byte of compressed text: how the rest of it is stored
+STORED_TAG = 0  # UTF-8 text, when compressing would not make it smaller
+DEFLATE_TAG = 1  # raw deflate stream
+DICTIONARY_TAG = 2  # CRC-32 of the dictionary, then a raw deflate stream primed with the dictionary
+
+# Header of the dictionary file: magic and CRC-32 of the dictionary that follows
+DICTIONARY_HEADER = struct.Struct('<8sI')
+DICTIONARY_MAGIC = b'TXTDICT1'
+
+# Size of trained dictionaries. Deflate only refers back 32 KiB, and priming the compressor costs more the larger the
+# dictionary, so a smaller dictionary holding only the most frequent phrases compresses short texts best
+DICTIONARY_SIZE = 16 * 1024
+
+# Number of texts a dictionary is trained on. Fewer texts do not show which phrases are frequent
+MIN_DICTIONARY_SAMPLES = 100
+MAX_DICTIONARY_SAMPLES = 2000
+
+# Longest phrase, in words, considered for the dictionary
+MAX_PHRASE_WORDS = 4
+
+# Words with their trailing whitespace, so that phrases are exact substrings of the texts
+WORD_REGEX = re.compile(r'\S+\s*')
+
+class TextCodec:
+    """Compresses text with zlib, priming the compressor with a dictionary of the phrases the texts share.
+
+    Job descriptions are short and share much of their wording, so on their own they barely compress, while a
+    dictionary trained on a sample of them lets each one refer back to the common phrases. Compressed text starts with
+    a tag byte, so a codec decompresses text compressed without a dictionary or left uncompressed as well, and text
+    compressed with a dictionary stores the checksum of the dictionary, so it is never decompressed with another one.
+
+    Attributes:
+        dictionary (bytes): The dictionary, or b'' to compress without one.
+        dictionary_id (int): The CRC-32 of the dictionary.
+        level (int): The zlib compression level.
+        _compressor (zlib._Compress): A compressor primed with the dictionary, copied for each text.
+    """
+
+    def __init__(self, dictionary: bytes=b'', level: int=9):
+        """
+        Initializes the TextCodec.
+
+        Args:
+            dictionary (bytes, optional): The dictionary. Defaults to b'', to compress without one.
+            level (int, optional): The zlib compression level. Defaults to 9.
+        """
+        self.dictionary = dictionary
+        self.dictionary_id = zlib.crc32(dictionary)
+        self.level = level
+        if dictionary:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, -15, 8, zlib.Z_DEFAULT_STRATEGY, dictionary)
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+
+    @classmethod
+    def train(cls, samples: Iterable[str], size: int=DICTIONARY_SIZE, level: int=9) -> 'TextCodec':
+        """
+        Creates a TextCodec whose dictionary holds the phrases that save the most bytes across sample texts.
+
+        Each phrase of up to MAX_PHRASE_WORDS words is scored by the bytes it saves, its length times the number of
+        other texts containing it. The best phrases fill the dictionary, the best last, since deflate encodes nearer
+        matches in fewer bits.
+
+        Args:
+            samples (Iterable[str]): The sample texts.
+            size (int, optional): The maximum size of the dictionary, in bytes. Defaults to DICTIONARY_SIZE.
+            level (int, optional): The zlib compression level. Defaults to 9.
+
+        Returns:
+            TextCodec: The codec.
+        """
+        counts = Counter()
+        for sample in samples:
+            words = WORD_REGEX.findall(sample)
+            counts.update({''.join(words[start:start + length]) for length in range(1, MAX_PHRASE_WORDS + 1)
+                           for start in range(len(words) - length + 1)})
+
+        phrases = sorted(((count - 1) * len(phrase.encode('utf-8')), phrase) for phrase, count in counts.items()
+                         if count > 1 and len(phrase) > 3)
+        selected = []
+        # The selected phrases separated by newlines, since a phrase inside a phrase already selected adds nothing
+        selected_text = bytearray()
+        for _, phrase in reversed(phrases):
+            encoded = phrase.encode('utf-8')
+            if len(selected_text) + len(encoded) > size or encoded in selected_text:
+                continue
+            selected.append(encoded)
+            selected_text += encoded + b'\n'
+        return cls(b''.join(reversed(selected)), level)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['TextCodec']:
+        """
+        Loads a TextCodec from a dictionary file written by save.
+
+        Args:
+            path (str): The path of the dictionary file.
+
+        Returns:
+            Optional[TextCodec]: The codec, or None if the file does not exist or is invalid.
+        """
+        try:
+            with open(path, 'rb') as dictionary_file:
+                content = dictionary_file.read()
+        except OSError:
+            return None
+        if len(content) < DICTIONARY_HEADER.size:
+            return None
+
+        magic, dictionary_id = DICTIONARY_HEADER.unpack_from(content)
+        dictionary = content[DICTIONARY_HEADER.size:]
+        if magic != DICTIONARY_MAGIC or zlib.crc32(dictionary) != dictionary_id:
+            return None
+        return cls(dictionary)
+
+    def save(self, path: str) -> 'TextCodec':
+        """
+        Writes the dictionary to a file, unless the file already exists. Text compressed with a dictionary can only be
+        decompressed with it, so a dictionary file is never replaced, even by another process training its own.
+
+        Args:
+            path (str): The path of the dictionary file.
+
+        Returns:
+            TextCodec: This codec, or the codec of the existing dictionary file.
+        """
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(DICTIONARY_HEADER.pack(DICTIONARY_MAGIC, self.dictionary_id) + self.dictionary)
+        try:
+            os.link(temp_path, path)
+        except FileExistsError:
+            return TextCodec.load(path) or self
+        finally:
+            os.remove(temp_path)
+        return self
+
+    def compress(self, text: Union[str, 'CompressedText']) -> bytes:
+        """
+        Compresses a text. Text already compressed with this dictionary is returned as it is.
+
+        Args:
+            text (Union[str, CompressedText]): The text.
+
+        Returns:
+            bytes: The compressed text.
+        """
+        if text.__class__ is CompressedText:
+            if text.codec.dictionary_id == self.dictionary_id:
+                return text.data
+            text = text.decompress()
+
+        data = text.encode('utf-8')
+        compressor = self._compressor.copy()
+        compressed = compressor.compress(data) + compressor.flush()
+        if self.dictionary:
+            if len(compressed) + 4 < len(data):
+                return struct.pack('<BI', DICTIONARY_TAG, self.dictionary_id) + compressed
+        elif len(compressed) < len(data):
+            return bytes([DEFLATE_TAG]) + compressed
+        return bytes([STORED_TAG]) + data
+
+    def decompress(self, data: bytes) -> str:
+        """
+        Decompresses a text compressed by compress.
+
+        Args:
+            data (bytes): The compressed text.
+
+        Returns:
+            str: The text.
+
+        Raises:
+            ValueError: If the text was compressed with another dictionary, or is corrupt.
+        """
+        try:
+            tag = data[0]
+            if tag == STORED_TAG:
+                return data[1:].decode('utf-8')
+            if tag == DEFLATE_TAG:
+                return zlib.decompress(data[1:], -15).decode('utf-8')
+            if tag == DICTIONARY_TAG:
+                if struct.unpack_from('<I', data, 1)[0] != self.dictionary_id or not self.dictionary:
+                    raise ValueError('The text was compressed with another dictionary')
+                return zlib.decompressobj(-15, self.dictionary).decompress(data[5:]).decode('utf-8')
+        except (IndexError, struct.error, zlib.error, UnicodeDecodeError) as e:
+            raise ValueError(f"Corrupt compressed text: {e}") from e
+        raise ValueError(f"Unknown compressed text tag: {tag}")
+
+    def __reduce__(self):
+        # Compressor objects cannot be pickled
+        return (TextCodec, (self.dictionary, self.level))
+
+class CompressedText:
+    """A compressed text and the codec that decompresses it, so that it is only decompressed when it is read.
+
+    Attributes:
+        data (bytes): The compressed text.
+        codec (TextCodec): The codec the text was compressed with.
+    """
+
+    __slots__ = ('data', 'codec')
+
+    def __init__(self, data: bytes, codec: TextCodec):
+        """
+        Initializes the CompressedText.
+
+        Args:
+            data (bytes): The compressed text.
+            codec (TextCodec): The codec the text was compressed with.
+        """
+        self.data = data
+        self.codec = codec
+
+    def decompress(self) -> str:
+        """
+        Decompresses the text. The text is not kept, so it takes no memory once it is no longer used.
+
+        Returns:
+            str: The text.
+        """
+        return self.codec.decompress(self.data)
+
+    def __str__(self) -> str:
+        return self.decompress()
+
+    def __repr__(self) -> str:
+        return f"CompressedText({len(self.data)} bytes)"
@@ -3,16 +3,51 @@ import datetime
 import json
 import os
 import hashlib
+import logging
+import warnings
+from bisect import bisect_right
+from copy import copy
 from functools import reduce
-from typing import List, Dict, Union, cast
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Pattern, Set, Tuple, Union, cast
+from urllib.parse import parse_qs, urlsplit
 
 from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.formatting.rule import CellIsRule
 from openpyxl.formatting.formatting import ConditionalFormattingList
 from openpyxl.styles import Font, PatternFill, NamedStyle
 from openpyxl.worksheet.table import Table, TableStyleInfo
 from openpyxl.worksheet.worksheet import Worksheet
 
+from job_record import METRIC_FIELD_TYPES, JobRecord, JobStore, job_sort_key, parse_posted_date
+
+# Number format of the 'posted_date' cells in the Excel output
+EXCEL_DATE_FORMAT = 'mm/dd/yyyy'
+
+# Patterns of the relative posted dates shown on job cards, matched in order against the lowercased text. Each
+# pattern has the unit of its count, and either a fixed count or a group capturing the count ('a' or 'an' count as 1).
+# Open-ended counts such as '30+ days ago' resolve to their lower bound
+POST_DATE_PATTERNS = [
+    (re.compile(r'\b(?:just posted|just now|today)\b'), datetime.timedelta(days=1), 0),
+    (re.compile(r'\byesterday\b'), datetime.timedelta(days=1), 1),
+    (re.compile(r'\b(\d+|an?)\+? ?(?:minutes?|mins?) ago\b'), datetime.timedelta(minutes=1), None),
+    (re.compile(r'\b(\d+|an?)\+? ?(?:hours?|hrs?) ago\b'), datetime.timedelta(hours=1), None),
+    (re.compile(r'\b(\d+|an?)\+? ?days? ago\b'), datetime.timedelta(days=1), None),
+    (re.compile(r'\b(\d+|an?)\+? ?(?:weeks?|wks?) ago\b'), datetime.timedelta(weeks=1), None),
+    (re.compile(r'\b(\d+|an?)\+? ?months? ago\b'), datetime.timedelta(days=30), None)
+]
+
+# Regular expression to match variations of years of experience
+YEARS_OF_EXPERIENCE_REGEX = re.compile(r'(\d+)\+?[\s\w]* years', re.IGNORECASE)
+
+# Indeed job keys are 16 hexadecimal digits, which fit exactly into a 64-bit integer
+JOB_KEY_REGEX = re.compile(r'[0-9a-f]{1,16}')
+
+# Amounts may be abbreviated in thousands, as in '$120K'
+SALARY_AMOUNT_REGEX = re.compile(r'\$\s?(\d[\d,]*(?:\.\d+)?)\s?([kK]\b)?')
+SALARY_PERIOD_REGEX = re.compile(r'\b(?:an?|per)\s+(hour|day|week|month|year)\b', re.IGNORECASE)
+SALARY_PERIOD_MULTIPLIERS = {'hour': 2080, 'day': 260, 'week': 52, 'month': 12, 'year': 1}
+
 def build_indeed_url(position: str, location: str, experience_level: str, job_type: str, max_days_posted_ago: str) -> str:
     """
     Builds a URL for Indeed job search based on the given parameters.
@@ -67,6 +102,51 @@ def exclude_based_on_title(excluded_keywords: List[str], title_element_text: str
                 return True
     return False
 
+def normalize_title(title: str) -> str:
+    """
+    Lowercases a job title and replaces every run of non-alphanumeric characters with a single space.
+
+    Args:
+        title (str): The job title.
+
+    Returns:
+        str: The normalized job title.
+    """
+    return ' '.join(re.sub(r'[^a-zA-Z0-9]', ' ', title).split()).lower()
+
+def lowercase_title(title: str) -> str:
+    """
+    Lowercases a job title and replaces every run of whitespace with a single space, keeping its punctuation.
+
+    Args:
+        title (str): The job title.
+
+    Returns:
+        str: The lowercased job title.
+    """
+    return ' '.join(title.split()).lower()
+
+def find_matches_by_row(regex: Pattern, texts: List[str], separator: str) -> Iterator[Tuple[int, re.Match]]:
+    """
+    Scans a list of texts with a single regular expression search over their concatenation.
+
+    Args:
+        regex (Pattern): The regular expression to search for.
+        texts (List[str]): The texts to search.
+        separator (str): The string used to join the texts. It must not be part of any possible match.
+
+    Yields:
+        Tuple[int, re.Match]: The index of the text containing the match, and the match itself.
+    """
+    row_offsets = []
+    offset = 0
+    for text in texts:
+        row_offsets.append(offset)
+        offset += len(text) + len(separator)
+
+    for match in regex.finditer(separator.join(texts)):
+        yield bisect_right(row_offsets, match.start()) - 1, match
+
 def get_next_page_url(url: str) -> str:
     """
     Returns the URL for the next page of job listings.
@@ -88,16 +168,34 @@ def get_next_page_url(url: str) -> str:
         current_page = int(url[start_index + len(start_tag):end_index])
         return url[:start_index] + f"{start_tag}{current_page + 10}" + url[end_index:]
 
-def read_jobs_excel(filename: str) -> Dict[str, Dict[str, Union[str, int, float]]]:
+def get_csv_headers(config: Dict) -> List[str]:
+    """
+    Returns the headers of the job details and output columns: the 'csv_settings.csv_headers' setting, followed by
+    'duplicate_of' when near duplicate detection is enabled and the setting does not list it.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+
+    Returns:
+        List[str]: The headers.
+    """
+    headers = list(config['csv_settings']['csv_headers'])
+    if config.get('near_duplicates', {}).get('enabled') and 'duplicate_of' not in headers:
+        headers.append('duplicate_of')
+    return headers
+
+def read_jobs_excel(filename: str) -> Dict[int, JobRecord]:
     """
     Reads job records from an Excel file and returns a dictionary of data.
 
+    Records are keyed by their canonical job key, so rows written with older hash_id formats or links containing
+    tracking parameters are migrated and duplicate rows of the same posting are merged.
+
     Args:
         filename (str): The name of the Excel file containing job records.
 
     Returns:
-        Dict[str, Dict[str, Union[str, int, float]]]: A dictionary where each key is a hash_id and the value is a
-        dictionary of job record fields.
+        Dict[int, JobRecord]: A dictionary where each key is the integer job key and the value is the job record.
     """
     if not os.path.isfile(filename):
         return {}
@@ -105,78 +203,193 @@ def read_jobs_excel(filename: str) -> Dict[str, Dict[str, Union[str, int, float]
     with open('config.json') as config_file:
         config = json.load(config_file)
 
-    data = {}  # hash_id : record
     wb = load_workbook(filename)
-    ws = cast(Worksheet, wb.active)
-    config_headers = config['csv_settings']['csv_headers']
-    current_headers_in_file = [cell for cell in next(ws.iter_rows(min_row=1, max_row=1, values_only=True))]
+    return read_worksheet_job_records(cast(Worksheet, wb.active), get_csv_headers(config))
 
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        record = dict(zip(current_headers_in_file, row))
+def read_worksheet_job_records(worksheet: Worksheet, headers: List[str]) -> Dict[int, JobRecord]:
+    """
+    Reads job records from a Worksheet whose first row holds the headers.
+
+    Args:
+        worksheet (Worksheet): The Worksheet containing job records.
+        headers (List[str]): The headers of the job records.
+
+    Returns:
+        Dict[int, JobRecord]: A dictionary where each key is the integer job key and the value is the job record.
+    """
+    header_row = next(worksheet.iter_rows(min_row=1, max_row=1, values_only=True), None)
+    if header_row is None:
+        return {}
+    current_headers_in_file = [cell for cell in header_row]
+    rows = (dict(zip(current_headers_in_file, row)) for row in worksheet.iter_rows(min_row=2, values_only=True))
+    return build_job_records(rows, headers)
+
+def build_job_records(rows: Iterable[Dict[str, Any]], headers: List[str]) -> Dict[int, JobRecord]:
+    """
+    Builds job records from rows read from an output file.
+
+    Records are keyed by their canonical job key, so rows written with older hash_id formats or links containing
+    tracking parameters are migrated and duplicate rows of the same posting are merged.
+
+    Args:
+        rows (Iterable[Dict[str, Any]]): The rows, keyed by the headers in the file.
+        headers (List[str]): The headers of the job records.
+
+    Returns:
+        Dict[int, JobRecord]: A JobStore where each key is the integer job key and the value is the job record.
+    """
+    data = JobStore()  # job key : record
+
+    for record in rows:
         formatted_record = {}
 
-        for header in config_headers:
+        for header in headers:
             formatted_record[header] = record.get(header, '')
 
-        data[formatted_record['hash_id']] = formatted_record
+        job_link = str(formatted_record.get('job_link') or '')
+        if job_link:
+            formatted_record['job_link'] = parse_indeed_url(job_link)
+            formatted_record['hash_id'] = canonical_job_id(job_link)
+
+        # Metrics are only extracted again for rows written before they were stored
+        for field in METRIC_FIELD_TYPES:
+            if field in record:
+                formatted_record[field] = record[field]
+        if not all(field in record for field in METRIC_FIELD_TYPES):
+            formatted_record.update(extract_job_metrics(str(record.get('description') or ''),
+                                                        str(record.get('salary_preview') or '')))
+
+        job_key = job_key_to_int(str(formatted_record['hash_id']))
+        if job_key in data:
+            # Keep the first row of a duplicated posting, but do not lose whether it was applied to
+            if data[job_key]['applied'] == 'No' and formatted_record.get('applied'):
+                data[job_key]['applied'] = formatted_record['applied']
+            continue
+
+        data[job_key] = JobRecord.from_dict(formatted_record)
     return data
 
-def write_jobs_excel(filename: str, job_records: Dict[str, Dict]) -> None:
+def write_jobs_excel(filename: str, job_records: Dict[int, JobRecord], fieldnames: Optional[List[str]]=None) -> None:
     """
     Writes job records to an Excel file.
 
     Args:
         filename (str): The name of the Excel file where job records will be written.
-        job_records (Dict[str, Dict]): A dictionary of job records, where each key is a hash_id and the value is a
-        dictionary containing the job record fields.
+        job_records (Dict[int, JobRecord]): A dictionary of job records, where each key is the integer job key and the
+        value is the job record.
+        fieldnames (Optional[List[str]], optional): The headers of the written columns. Defaults to the headers in
+            config.json.
 
     Returns:
         None
     """
     print("Updating Excel record data")
 
-    with open('config.json') as config_file:
-        config = json.load(config_file)
+    if fieldnames is None:
+        with open('config.json') as config_file:
+            config = json.load(config_file)
+        fieldnames = get_csv_headers(config)
 
-    # Check if the file exists
-    file_exists = os.path.isfile(filename)
-    fieldnames = config['csv_settings']['csv_headers']
-
-    # Load the existing Worksheet or create a new Worksheet
-    if file_exists:
-        wb = load_workbook(filename)
-        worksheet = cast(Worksheet, wb.active)
-        clear_all_cell_values(worksheet)
-        # Set headers
-        for col, header in enumerate(fieldnames, start=1):
-            worksheet.cell(row=1, column=col).value = header
-    else:
-        wb = Workbook()
-        worksheet = cast(Worksheet, wb.active)
-        worksheet.append(fieldnames)
+    # A new workbook is streamed row by row, while an existing workbook is updated in place to keep any other changes
+    if not os.path.isfile(filename):
+        write_new_jobs_workbook(filename, fieldnames, job_records)
+        print("Done updating Excel records")
+        return
+
+    wb = load_workbook(filename)
+    write_jobs_worksheet(cast(Worksheet, wb.active), fieldnames, job_records)
+    wb.save(filename)
+    print("Done updating Excel records")
+
+def write_jobs_worksheet(worksheet: Worksheet, fieldnames: List[str], job_records: Dict[int, JobRecord],
+                         table_name: str="JobTable") -> None:
+    """
+    Replaces the contents of an existing Worksheet with job records, keeping its table and column formatting.
+
+    Args:
+        worksheet (Worksheet): The Worksheet where job records will be written.
+        fieldnames (List[str]): A list of field names that correspond to the columns in the Worksheet.
+        job_records (Dict[int, JobRecord]): A dictionary of job records, where each key is the integer job key and the
+        value is the job record.
+        table_name (str, optional): The name of the table created if the Worksheet has none. Defaults to "JobTable".
+
+    Returns:
+        None
+    """
+    clear_all_cell_values(worksheet)
+    # Set headers
+    for col, header in enumerate(fieldnames, start=1):
+        worksheet.cell(row=1, column=col).value = header
 
     write_new_cell_data(worksheet, fieldnames, job_records)
     apply_worksheet_conditional_formatting(worksheet)
-    update_or_create_worksheet_table(worksheet, fieldnames)
+    update_or_create_worksheet_table(worksheet, fieldnames, table_name=table_name)
+
+def write_new_jobs_workbook(filename: str, fieldnames: List[str], job_records: Dict[int, JobRecord]) -> None:
+    """
+    Creates a new Excel file of job records using a write-only workbook.
+
+    Rows are streamed to the file as they are appended instead of being kept as cell objects, and the hyperlink style
+    is copied from a single pre-styled cell rather than looked up by name for every link. The table and the
+    conditional formatting are added once all rows have been written.
+
+    Args:
+        filename (str): The name of the Excel file to create.
+        fieldnames (List[str]): A list of field names that correspond to the columns in the Worksheet.
+        job_records (Dict[int, JobRecord]): A dictionary of job records, where each key is the integer job key and the
+        value is the job record.
+
+    Returns:
+        None
+    """
+    wb = Workbook(write_only=True)
+    worksheet = wb.create_sheet()
+    worksheet.append(fieldnames)
+
+    link_column = fieldnames.index('job_link') if 'job_link' in fieldnames else None
+    link_style_cell = WriteOnlyCell(worksheet)
+    link_style_cell.style = 'Hyperlink'
+
+    date_column = fieldnames.index('posted_date') if 'posted_date' in fieldnames else None
+
+    for job_record in sort_job_records(job_records):
+        row = [job_record.get(header, '') for header in fieldnames]
+
+        if date_column is not None and isinstance(row[date_column], datetime.date):
+            date_cell = WriteOnlyCell(worksheet, value=row[date_column])
+            date_cell.number_format = EXCEL_DATE_FORMAT
+            row[date_column] = date_cell
+
+        if link_column is not None and row[link_column]:
+            link_cell = WriteOnlyCell(worksheet, value=row[link_column])
+            link_cell.hyperlink = row[link_column]
+            link_cell._style = copy(link_style_cell._style)
+            row[link_column] = link_cell
+
+        worksheet.append(row)
+
+    max_row = len(job_records) + 1
+    apply_worksheet_conditional_formatting(worksheet, max_row)
+    with warnings.catch_warnings():
+        # The table columns are named from the headers, so the write-only mode warning does not apply
+        warnings.simplefilter('ignore', UserWarning)
+        update_or_create_worksheet_table(worksheet, fieldnames, max_row)
     wb.save(filename)
-    print("Done updating Excel records")
 
-def write_new_cell_data(worksheet: Worksheet, fieldnames: List[str], job_records: Dict[str, Dict]) -> None:
+def write_new_cell_data(worksheet: Worksheet, fieldnames: List[str], job_records: Dict[int, JobRecord]) -> None:
     """
     Writes the sorted job record data to the Worksheet.
 
     Args:
         worksheet (Worksheet): The Worksheet object where job records will be written.
         fieldnames (List[str]): A list of field names that correspond to the columns in the Worksheet.
-        job_records (Dict[str, Dict]): A dictionary of job records, where each key is a hash_id and the value is a
-        dictionary containing the job record fields.
+        job_records (Dict[int, JobRecord]): A dictionary of job records, where each key is the integer job key and the
+        value is the job record.
 
     Returns:
         None
     """
-    # Sort the job records first by 'posted_date' from newest to oldest, then by 'company' in alphabetical order
-    sorted_job_records = sorted(job_records.values(), key=lambda x: x.get('company', ''))
-    sorted_job_records.sort(key=lambda x: x['posted_date'], reverse=True)
+    sorted_job_records = sort_job_records(job_records)
 
     # Write the new data starting from row 2
     row_num = 2
@@ -188,9 +401,30 @@ def write_new_cell_data(worksheet: Worksheet, fieldnames: List[str], job_records
             if header == 'job_link' and cell.value:  # Check if the column is 'job_link' and has a value
                 setattr(cell, "hyperlink", cell.value) # Set the hyperlink
                 cell.style = 'Hyperlink'  # Apply the hyperlink style
+            elif header == 'posted_date' and isinstance(cell.value, datetime.date):
+                cell.number_format = EXCEL_DATE_FORMAT
             col_num += 1
         row_num += 1
 
+def sort_job_records(job_records: Dict[int, JobRecord]) -> List[JobRecord]:
+    """
+    Sorts job records in output order.
+
+    Records of a JobStore are already indexed in output order and are not sorted again.
+
+    Args:
+        job_records (Dict[int, JobRecord]): The job records to sort, keyed by the integer job key.
+
+    Returns:
+        List[JobRecord]: The job records sorted first by 'posted_date' from newest to oldest, then by 'company' in
+        alphabetical order.
+    """
+    if isinstance(job_records, JobStore):
+        return job_records.sorted_values()
+    # Sort keys are unique, so the records themselves are never compared
+    decorated = sorted((job_sort_key(job_key, job_record), job_record) for job_key, job_record in job_records.items())
+    return [job_record for _, job_record in decorated]
+
 def clear_all_cell_values(worksheet: Worksheet) -> None:
     """
     Clears all cell values in the worksheet.
@@ -208,30 +442,40 @@ def clear_all_cell_values(worksheet: Worksheet) -> None:
             if cell.style != 'Normal':
                 cell.style = 'Normal'
 
-def update_or_create_worksheet_table(worksheet: Worksheet, fieldnames: List[str]) -> None:
+def update_or_create_worksheet_table(worksheet: Worksheet, fieldnames: List[str], max_row: Optional[int]=None,
+                                     table_name: str="JobTable") -> None:
     """
     Creates or updates the table reference for the job data in the worksheet.
 
     Args:
         worksheet (Worksheet): The Worksheet object where the job data table will be created or updated.
         fieldnames (List[str]): A list of field names that correspond to the columns in the Worksheet.
+        max_row (Optional[int], optional): The last row of the table. Defaults to the last row of the worksheet, which
+            is unknown for write-only worksheets.
+        table_name (str, optional): The name of the table if it has to be created. Table names must be unique within a
+            workbook. Defaults to "JobTable".
         
     Returns:
         None
     """
+    max_row = max_row or worksheet.max_row
     table_exists = len(worksheet.tables) > 0
     if table_exists:
         table = worksheet.tables[next(iter(worksheet.tables))]
-        table.ref = f"A1:{chr(64 + len(fieldnames))}{worksheet.max_row}"
+        table.ref = f"A1:{chr(64 + len(fieldnames))}{max_row}"
         table.tableStyleInfo.showRowStripes = True 
     else:
-        table = Table(displayName="JobTable", ref=f"A1:{chr(64 + len(fieldnames))}{worksheet.max_row}")
+        table = Table(displayName=table_name, ref=f"A1:{chr(64 + len(fieldnames))}{max_row}")
         style = TableStyleInfo(name="TableStyleMedium9", showFirstColumn=False,
                                showLastColumn=False, showRowStripes=True, showColumnStripes=False)
         table.tableStyleInfo = style
+        # Name the columns from the headers, as the header cells of write-only worksheets cannot be read back
+        table._initialise_columns()
+        for column, header in zip(table.tableColumns, fieldnames):
+            column.name = header
         worksheet.add_table(table)
 
-def apply_worksheet_conditional_formatting(worksheet: Worksheet) -> None:
+def apply_worksheet_conditional_formatting(worksheet: Worksheet, max_row: Optional[int]=None) -> None:
     """
     Applies conditional formatting to column B, used for the 'applied' column in the worksheet.
 
@@ -241,19 +485,23 @@ def apply_worksheet_conditional_formatting(worksheet: Worksheet) -> None:
 
     Args:
         worksheet (Worksheet): The Worksheet object to which conditional formatting will be applied.
+        max_row (Optional[int], optional): The last row to format. Defaults to the last row of the worksheet, which
+            is unknown for write-only worksheets.
         
     Returns:
         None
     """
+    max_row = max_row or worksheet.max_row
+
     # Remove existing conditional formatting rules for the worksheet
     worksheet.conditional_formatting = ConditionalFormattingList()
 
     green_fill = PatternFill(start_color='CCFFCC', end_color='CCFFCC', fill_type='solid')
     red_fill = PatternFill(start_color='FFCCCC', end_color='FFCCCC', fill_type='solid')
     yellow_fill = PatternFill(start_color='FFFF99', end_color='FFFF99', fill_type='solid')
-    worksheet.conditional_formatting.add('B2:B{}'.format(worksheet.max_row), CellIsRule(operator='equal', formula=['"Yes"'], fill=green_fill))
-    worksheet.conditional_formatting.add('B2:B{}'.format(worksheet.max_row), CellIsRule(operator='equal', formula=['"No"'], fill=red_fill))
-    worksheet.conditional_formatting.add('B2:B{}'.format(worksheet.max_row), CellIsRule(operator='equal', formula=['"Skip"'], fill=yellow_fill))
+    worksheet.conditional_formatting.add('B2:B{}'.format(max_row), CellIsRule(operator='equal', formula=['"Yes"'], fill=green_fill))
+    worksheet.conditional_formatting.add('B2:B{}'.format(max_row), CellIsRule(operator='equal', formula=['"No"'], fill=red_fill))
+    worksheet.conditional_formatting.add('B2:B{}'.format(max_row), CellIsRule(operator='equal', formula=['"Skip"'], fill=yellow_fill))
 
 def string_to_hash(input_string: str) -> str:
     """
@@ -268,29 +516,228 @@ def string_to_hash(input_string: str) -> str:
     return hashlib.sha256(input_string.encode()).hexdigest()
 
 def parse_indeed_url(url: str) -> str:
-    """Parses an Indeed URL and returns the base URL."""
-    second_equal_index = url.find('=', url.find('=') + 1)
-    return url if second_equal_index == -1 else url[:second_equal_index]
-
-def parse_post_date(post_date_string: str) -> str:
     """
     Parses an Indeed URL and returns the base URL.
 
+    Job links are reduced to their job key, so that tracking parameters do not produce different links for the
+    same posting.
+
     Args:
         url (str): The Indeed URL to be parsed.
 
     Returns:
         str: The base URL of the Indeed URL.
     """
-    if post_date_string in ["Today", "Just posted"]:
-        return datetime.date.today().strftime("%m/%d/%Y")
-    elif " day ago" in post_date_string:
-        return (datetime.date.today() - datetime.timedelta(days=1)).strftime("%m/%d/%Y")
-    elif " days ago" in post_date_string:
-        days_ago = int(post_date_string.split()[2])
-        return (datetime.date.today() - datetime.timedelta(days=days_ago)).strftime("%m/%d/%Y")
-    else:
-        return datetime.date.today().strftime("%m/%d/%Y")
+    job_key = extract_job_key(url)
+    if job_key and url.startswith('https://www.indeed.com/rc/clk?'):
+        return f'https://www.indeed.com/rc/clk?jk={job_key}'
+
+    second_equal_index = url.find('=', url.find('=') + 1)
+    return url if second_equal_index == -1 else url[:second_equal_index]
+
+def build_job_details(extracted_job: Dict[str, str], headers: List[str], search_criteria: str,
+                      jobs: Dict[int, JobRecord], date_normalizer: Optional['PostDateNormalizer']=None) -> Tuple[int, Dict[str, str]]:
+    """
+    Builds the job details of a job card whose raw text values have already been extracted.
+
+    The posted date, applied status and near duplicate flag of a previously stored record of the same job are kept,
+    and the numeric years of experience and salary metrics are extracted from the description and salary preview.
+
+    Args:
+        extracted_job (Dict[str, str]): The raw text values of the job card, keyed by header.
+        headers (List[str]): The headers of the job details to build.
+        search_criteria (str): The search criteria that returned the job.
+        jobs (Dict[int, JobRecord]): The stored job records, keyed by the integer job key.
+        date_normalizer (Optional[PostDateNormalizer], optional): The normalizer of the run, which resolves the
+            posted date. Defaults to None, which resolves it against the current time.
+
+    Returns:
+        Tuple[int, Dict[str, str]]: The integer job key, and the job details keyed by header.
+    """
+    job_details = {}
+    job_details['job_link'] = parse_indeed_url(extracted_job['job_link'])
+    job_details['hash_id'] = canonical_job_id(job_details['job_link'])
+    job_key = job_key_to_int(job_details['hash_id'])
+    existing_record = jobs.get(job_key)
+    # The metrics are always extracted, so filters can rely on them even if they are not output columns
+    job_details.update(extract_job_metrics(str(extracted_job.get('description') or ''),
+                                           str(extracted_job.get('salary_preview') or '')))
+
+    for header in headers:
+        if header in job_details:
+            continue
+        elif header == 'posted_date':
+            if existing_record:
+                job_details[header] = existing_record[header]
+            elif date_normalizer:
+                job_details[header] = date_normalizer.parse(extracted_job[header])
+            else:
+                job_details[header] = parse_post_date(extracted_job[header])
+        elif header == 'applied':
+            job_details[header] = str(existing_record[header]) if existing_record else 'No'
+        elif header == 'duplicate_of':
+            job_details[header] = existing_record[header] if existing_record else ''
+        elif header == 'search_criteria':
+            job_details[header] = search_criteria
+        else:
+            job_details[header] = extracted_job.get(header, '')
+
+    return job_key, job_details
+
+def reject_enriched_job(jobs: Dict[int, JobRecord], job_key: int, new_job_keys: Set[int]) -> None:
+    """
+    Rejects a job whose full description fails the filters. A job first stored during the current run is removed,
+    while a saved job is kept and, if it has not been applied to yet, marked as "Skip".
+
+    Args:
+        jobs (Dict[int, JobRecord]): Dictionary of job listings, keyed by the integer job key. Updated in place.
+        job_key (int): The integer job key of the rejected job.
+        new_job_keys (Set[int]): The job keys of the jobs first stored during the current run. Updated in place.
+
+    Returns:
+        None
+    """
+    if job_key in new_job_keys:
+        new_job_keys.discard(job_key)
+        del jobs[job_key]
+    elif jobs[job_key].applied == 'No':
+        jobs[job_key].applied = 'Skip'
+
+def merge_job_record(jobs: Dict[int, JobRecord], job_key: int, job_details: Dict[str, str]) -> None:
+    """
+    Stores job details built without the stored records, keeping the posted date, applied status, search criteria and
+    near duplicate flag of a previously stored record of the same job.
+
+    Args:
+        jobs (Dict[int, JobRecord]): The stored job records, keyed by the integer job key. Updated in place.
+        job_key (int): The integer job key of the job.
+        job_details (Dict[str, str]): The job details, keyed by header.
+
+    Returns:
+        None
+    """
+    existing_record = jobs.get(job_key)
+    if existing_record:
+        for header in ('posted_date', 'applied', 'search_criteria', 'duplicate_of'):
+            if header in job_details:
+                job_details[header] = existing_record[header]
+    jobs[job_key] = JobRecord.from_dict(job_details)
+
+def extract_job_key(url: str) -> Optional[str]:
+    """
+    Extracts the Indeed job key, the 'jk' query parameter, from a job link.
+
+    Args:
+        url (str): The Indeed job link.
+
+    Returns:
+        Optional[str]: The lowercased job key, or None if the link does not contain one.
+    """
+    job_keys = parse_qs(urlsplit(url).query).get('jk')
+    return job_keys[0].strip().lower() if job_keys and job_keys[0].strip() else None
+
+def canonical_job_id(job_link: str) -> str:
+    """
+    Returns the identifier stored in the 'hash_id' column for a job link.
+
+    Args:
+        job_link (str): The Indeed job link.
+
+    Returns:
+        str: The job key of the link, or the SHA-256 hash of the link if it does not contain a job key.
+    """
+    return extract_job_key(job_link) or string_to_hash(job_link)
+
+def job_key_to_int(job_id: str) -> int:
+    """
+    Converts a job identifier to a 64-bit integer used to index and deduplicate job records.
+
+    Args:
+        job_id (str): The job key, or the SHA-256 hash for links without a job key.
+
+    Returns:
+        int: The job key parsed as a hexadecimal integer, or the first 64 bits of the SHA-256 hash of any other identifier.
+    """
+    if JOB_KEY_REGEX.fullmatch(job_id):
+        return int(job_id, 16)
+    return int.from_bytes(hashlib.sha256(job_id.encode()).digest()[:8], 'big')
+
+class PostDateNormalizer:
+    """Resolves the relative posted dates shown on job cards against a single reference time.
+
+    A normalizer is created once per run, so every card of the run is resolved against the same reference instead of
+    reading the clock for each card, and each distinct text is only matched once.
+
+    Attributes:
+        reference (datetime.datetime): The time relative dates are resolved against.
+        unrecognized (Set[str]): The texts that matched no pattern and were resolved to the reference date.
+        _cache (Dict[str, datetime.date]): The resolved date of each text seen so far.
+    """
+
+    def __init__(self, reference: Optional[datetime.datetime]=None):
+        """
+        Initializes the PostDateNormalizer.
+
+        Args:
+            reference (Optional[datetime.datetime], optional): The time relative dates are resolved against. Defaults
+                to the current time.
+        """
+        self.reference = reference or datetime.datetime.now()
+        self.unrecognized = set()
+        self._cache = {}
+
+    def parse(self, post_date_string: Optional[str]) -> Optional[datetime.date]:
+        """
+        Resolves the posted date text of a job card.
+
+        Args:
+            post_date_string (Optional[str]): The posted date text, such as "Just posted", "Posted 3 hours ago",
+                "Active 5 days ago" or "30+ days ago".
+
+        Returns:
+            Optional[datetime.date]: The date the job was posted, or None if the text is None. Texts that match no
+            pattern resolve to the reference date.
+        """
+        if post_date_string is None:
+            return None
+        if post_date_string not in self._cache:
+            self._cache[post_date_string] = self._resolve(post_date_string)
+        return self._cache[post_date_string]
+
+    def _resolve(self, post_date_string: str) -> datetime.date:
+        text = ' '.join(post_date_string.lower().split())
+        for pattern, unit, fixed_count in POST_DATE_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                if fixed_count is not None:
+                    count = fixed_count
+                else:
+                    count = 1 if match.group(1) in ('a', 'an') else int(match.group(1))
+                return (self.reference - unit * count).date()
+
+        posted_date = parse_posted_date(post_date_string)
+        if posted_date is not None:
+            return posted_date
+
+        self.unrecognized.add(post_date_string)
+        logging.getLogger(__name__).warning(f"Unrecognized posted date {post_date_string!r}, using the reference date")
+        return self.reference.date()
+
+def parse_post_date(post_date_string: str, reference: Optional[datetime.datetime]=None) -> datetime.date:
+    """
+    Parses the relative posted date shown on a job card.
+
+    Use a PostDateNormalizer to parse the cards of a whole run against the same reference time.
+
+    Args:
+        post_date_string (str): The posted date text of the job card, such as "Today" or "3 days ago".
+        reference (Optional[datetime.datetime], optional): The time relative dates are resolved against. Defaults to
+            the current time.
+
+    Returns:
+        datetime.date: The date the job was posted.
+    """
+    return PostDateNormalizer(reference).parse(post_date_string)
 
 def is_valid_indeed_job_link_structure(url: str) -> bool:
     """
@@ -304,6 +751,103 @@ def is_valid_indeed_job_link_structure(url: str) -> bool:
     """
     return url.startswith('https://www.indeed.com/rc/clk?jk=')
 
+def parse_optional_int(value: Union[str, int]) -> Optional[int]:
+    """
+    Converts an optional numerical configuration field, such as 'user_years_of_experience', to an integer.
+
+    Args:
+        value (Union[str, int]): The value of the field in the configuration file.
+
+    Returns:
+        Optional[int]: The integer value, or None if the field is empty.
+    """
+    return int(value) if str(value).strip() else None
+
+def parse_annual_salary_range(salary_preview: str) -> Optional[Tuple[float, float]]:
+    """
+    Parses a salary preview such as "$50 - $60 an hour" or "From $90,000 a year" into an annual salary range.
+
+    Args:
+        salary_preview (str): The salary preview text of the job.
+
+    Returns:
+        Optional[Tuple[float, float]]: The minimum and maximum annual salary, or None if no salary is mentioned.
+    """
+    amounts = [float(amount.replace(',', '')) * (1000 if thousands else 1)
+               for amount, thousands in SALARY_AMOUNT_REGEX.findall(salary_preview)]
+    if not amounts:
+        return None
+
+    period = SALARY_PERIOD_REGEX.search(salary_preview)
+    multiplier = SALARY_PERIOD_MULTIPLIERS[period.group(1).lower()] if period else 1
+    return (min(amounts) * multiplier, max(amounts) * multiplier)
+
+def extract_years_of_experience(description: str) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Extracts the range of years of experience mentioned in a job description.
+
+    Args:
+        description (str): The job description.
+
+    Returns:
+        Tuple[Optional[int], Optional[int]]: The fewest and most years mentioned, or None and None if none are.
+    """
+    years = [int(match) for match in YEARS_OF_EXPERIENCE_REGEX.findall(description)]
+    if not years:
+        return None, None
+    return min(years), max(years)
+
+def extract_job_metrics(description: str, salary_preview: str) -> Dict[str, Any]:
+    """
+    Extracts the numeric metrics of a job, which are stored with the job so filters do not scan the text again.
+
+    Args:
+        description (str): The job description.
+        salary_preview (str): The salary preview text of the job.
+
+    Returns:
+        Dict[str, Any]: The values of the fields in METRIC_FIELD_TYPES, with '' for metrics that are not mentioned.
+    """
+    min_years, max_years = extract_years_of_experience(description)
+    salary_range = parse_annual_salary_range(salary_preview) or ('', '')
+    return {
+        'min_years_of_experience': '' if min_years is None else min_years,
+        'max_years_of_experience': '' if max_years is None else max_years,
+        'min_annual_salary': salary_range[0],
+        'max_annual_salary': salary_range[1]
+    }
+
+def get_min_years_of_experience(job: Mapping[str, str]) -> Optional[int]:
+    """
+    Returns the fewest years of experience mentioned by a job, from its stored metric if it has one.
+
+    Args:
+        job (Mapping[str, str]): The job record, keyed by header.
+
+    Returns:
+        Optional[int]: The fewest years of experience, or None if none are mentioned.
+    """
+    if 'min_years_of_experience' in job:
+        min_years = job.get('min_years_of_experience', '')
+        return None if min_years == '' else int(min_years)
+    return extract_years_of_experience(str(job.get('description', '')))[0]
+
+def get_max_annual_salary(job: Mapping[str, str]) -> Optional[float]:
+    """
+    Returns the top of the annual salary range of a job, from its stored metric if it has one.
+
+    Args:
+        job (Mapping[str, str]): The job record, keyed by header.
+
+    Returns:
+        Optional[float]: The top of the annual salary range, or None if no salary is shown.
+    """
+    if 'max_annual_salary' in job:
+        max_annual_salary = job.get('max_annual_salary', '')
+        return None if max_annual_salary == '' else float(max_annual_salary)
+    salary_range = parse_annual_salary_range(str(job.get('salary_preview', '')))
+    return salary_range[1] if salary_range else None
+
 def description_has_valid_years_of_experience(description: str) -> bool:
     """
     Checks if the user's specified maximum years of experience meets the minimum years of experience mentioned in the job description.
@@ -314,9 +858,7 @@ def description_has_valid_years_of_experience(description: str) -> bool:
     Returns:
         bool: True if the job description meets the years of experience criteria, False otherwise.
     """
-    # Regular expression to match variations of years of experience
-    regex = r'(\d+)\+?[\s\w]* years'
-    matches = re.findall(regex, description, re.IGNORECASE)
+    matches = YEARS_OF_EXPERIENCE_REGEX.findall(description)
 
     if matches:
         years = list(map(int, matches))
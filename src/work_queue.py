@@ -0,0 +1,481 @@
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+from random import randint
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import utils
+from archive import JobArchive
+from coordinator import build_search_urls, create_fetchers, is_results_page
+from exporters import load_jobs, save_jobs
+from fetchers import Fetcher, is_usable_page
+from filters import JobFilter
+from job_cards import evaluate_job_cards, parse_job_cards
+from job_record import format_posted_date
+from near_duplicates import NearDuplicateIndex
+
+# SQLite journal modes of the queue, selected in 'work_queue.journal_mode'. The rollback journal ('delete') works on
+# network filesystems, so the queue can be shared between hosts. Write-ahead logging ('wal') lets workers read while
+# another one writes, but needs memory shared by every process, so it only works when all of them run on one host
+JOURNAL_MODES = ['delete', 'wal']
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    search_criteria TEXT NOT NULL,
+    url TEXT NOT NULL UNIQUE,
+    page_number INTEGER NOT NULL,
+    previous_page_signature TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    rejected TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (status, lease_expires_at);
+CREATE TABLE IF NOT EXISTS results (
+    hash_id TEXT PRIMARY KEY,
+    task_id INTEGER NOT NULL,
+    job_details TEXT NOT NULL
+);
+"""
+
+# Task statuses, in the order a task moves through them
+TASK_STATUSES = ['pending', 'leased', 'done', 'failed']
+
+class QueueTask(NamedTuple):
+    """A leased result page to crawl.
+
+    Attributes:
+        id (int): The identifier of the task.
+        search_criteria (str): The search criteria stored with the jobs of the page.
+        url (str): The URL of the result page.
+        page_number (int): The number of the page within its search, starting at 0.
+        previous_page_signature (Optional[str]): The signature of the previous page of the search, used to detect the
+            last page, which Indeed serves again when requesting the page after it.
+        attempts (int): The number of times the task has been leased, including this lease.
+    """
+    id: int
+    search_criteria: str
+    url: str
+    page_number: int
+    previous_page_signature: Optional[str]
+    attempts: int
+
+class WorkQueue:
+    """A queue of result pages to crawl, shared by worker processes through a SQLite database.
+
+    Workers lease one page at a time. A lease expires after lease_seconds, after which the page is handed to another
+    worker, so pages of crashed or disconnected workers are crawled again. Results are pushed back along with the
+    next page of the search in a single transaction, and are stored by job key, so a page crawled twice never
+    duplicates jobs. Pages are therefore crawled at least once.
+
+    Attributes:
+        path (str): The path of the SQLite database.
+        lease_seconds (float): The number of seconds a leased task is reserved for its worker.
+        max_attempts (int): The number of leases after which a task is marked as failed.
+        journal_mode (str): One of JOURNAL_MODES.
+        connection (sqlite3.Connection): The connection to the database.
+        _lock (threading.Lock): The lock serializing the use of the connection.
+    """
+
+    def __init__(self, path: str, lease_seconds: float=300, max_attempts: int=3, journal_mode: str='delete'):
+        """
+        Initializes the WorkQueue, creating the database if needed.
+
+        Args:
+            path (str): The path of the SQLite database.
+            lease_seconds (float, optional): The number of seconds a leased task is reserved for its worker. Defaults to 300.
+            max_attempts (int, optional): The number of leases after which a task is marked as failed. Defaults to 3.
+            journal_mode (str, optional): One of JOURNAL_MODES. Defaults to 'delete', which also works when the
+                database is shared between hosts.
+        """
+        if journal_mode not in JOURNAL_MODES:
+            raise ValueError(f"Unknown journal_mode: {journal_mode!r}")
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.journal_mode = journal_mode
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        self.connection.execute(f'PRAGMA journal_mode={journal_mode.upper()}')
+        self.connection.executescript(QUEUE_SCHEMA)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'WorkQueue':
+        """
+        Creates a WorkQueue from the 'work_queue' settings of the configuration file.
+
+        Args:
+            config (Dict): The configuration dictionary loaded from config.json.
+
+        Returns:
+            WorkQueue: The work queue.
+        """
+        settings = config.get('work_queue', {})
+        return cls(settings.get('path') or 'work_queue.sqlite3',
+                   float(settings.get('lease_seconds') or 300),
+                   int(settings.get('max_attempts') or 3),
+                   settings.get('journal_mode') or 'delete')
+
+    def enqueue(self, search_criteria: str, url: str, page_number: int=0, previous_page_signature: Optional[str]=None) -> bool:
+        """
+        Adds a result page to the queue, unless the page has already been queued.
+
+        Args:
+            search_criteria (str): The search criteria stored with the jobs of the page.
+            url (str): The URL of the result page.
+            page_number (int, optional): The number of the page within its search. Defaults to 0.
+            previous_page_signature (Optional[str], optional): The signature of the previous page of the search. Defaults to None.
+
+        Returns:
+            bool: True if the page was added, False if it was already queued.
+        """
+        with self._lock:
+            return self._insert_task(search_criteria, url, page_number, previous_page_signature)
+
+    def lease(self, worker_id: str) -> Optional[QueueTask]:
+        """
+        Leases the oldest pending task, or a task whose lease has expired.
+
+        Tasks whose lease expired after their last attempt are marked as failed instead.
+
+        Args:
+            worker_id (str): The identifier of the worker.
+
+        Returns:
+            Optional[QueueTask]: The leased task, or None if no task is available.
+        """
+        now = time.time()
+        with self._lock, self._transaction():
+            self.connection.execute(
+                "UPDATE tasks SET status = 'failed', lease_owner = NULL, updated_at = ? "
+                "WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= ?", (now, now, self.max_attempts))
+            row = self.connection.execute(
+                "SELECT id, search_criteria, url, page_number, previous_page_signature, attempts FROM tasks "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires_at < ?) ORDER BY id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                return None
+
+            self.connection.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?", (worker_id, now + self.lease_seconds, now, row[0]))
+            return QueueTask(*row[:5], attempts=row[5] + 1)
+
+    def complete(self, task: QueueTask, jobs: Dict[str, Dict[str, str]], num_rejected_job_cards: Dict[str, int],
+                 next_page: Optional[Tuple[str, str]]=None) -> None:
+        """
+        Pushes the results of a task back, marks the task as done and queues the next page of its search.
+
+        Results are accepted even if the lease has expired in the meantime, since storing the same jobs twice is harmless.
+
+        Args:
+            task (QueueTask): The completed task.
+            jobs (Dict[str, Dict[str, str]]): The accepted job details, keyed by the job key in the 'hash_id' column.
+            num_rejected_job_cards (Dict[str, int]): The number of job cards rejected by each filter rule.
+            next_page (Optional[Tuple[str, str]], optional): The URL of the next page of the search and the signature
+                of the completed page, or None if the completed page was the last one. Defaults to None.
+
+        Returns:
+            None
+        """
+        with self._lock, self._transaction():
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO results (hash_id, task_id, job_details) VALUES (?, ?, ?)",
+                [(hash_id, task.id, json.dumps(job_details, default=format_posted_date)) for hash_id, job_details in jobs.items()])
+            self.connection.execute(
+                "UPDATE tasks SET status = 'done', lease_owner = NULL, rejected = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(num_rejected_job_cards), time.time(), task.id))
+            if next_page:
+                self._insert_task(task.search_criteria, next_page[0], task.page_number + 1, next_page[1])
+
+    def release(self, task: QueueTask, worker_id: str) -> None:
+        """
+        Returns a task that could not be completed to the queue, or marks it as failed after its last attempt.
+
+        Args:
+            task (QueueTask): The task to release.
+            worker_id (str): The identifier of the worker holding the lease.
+
+        Returns:
+            None
+        """
+        status = 'failed' if task.attempts >= self.max_attempts else 'pending'
+        with self._lock:
+            self.connection.execute(
+                "UPDATE tasks SET status = ?, lease_owner = NULL, updated_at = ? WHERE id = ? AND lease_owner = ?",
+                (status, time.time(), task.id, worker_id))
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Returns the number of tasks in each status.
+
+        Returns:
+            Dict[str, int]: The number of tasks, keyed by status.
+        """
+        with self._lock:
+            rows = self.connection.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        counts = {status: 0 for status in TASK_STATUSES}
+        counts.update(rows)
+        return counts
+
+    def num_rejected_job_cards(self) -> Dict[str, int]:
+        """
+        Returns the number of job cards rejected by each filter rule over all completed tasks.
+
+        Returns:
+            Dict[str, int]: The number of rejected job cards, keyed by filter rule.
+        """
+        with self._lock:
+            rows = self.connection.execute("SELECT rejected FROM tasks WHERE rejected IS NOT NULL").fetchall()
+
+        totals = {}
+        for (rejected,) in rows:
+            for reason, count in json.loads(rejected).items():
+                totals[reason] = totals.get(reason, 0) + count
+        return totals
+
+    def iter_results(self) -> Iterator[Tuple[str, Dict[str, str]]]:
+        """
+        Iterates over the accepted jobs pushed back by the workers, in the order they were first stored.
+
+        Yields:
+            Tuple[str, Dict[str, str]]: The job key in the 'hash_id' column and the job details.
+        """
+        with self._lock:
+            rows = self.connection.execute("SELECT hash_id, job_details FROM results ORDER BY rowid").fetchall()
+        for hash_id, job_details in rows:
+            yield hash_id, json.loads(job_details)
+
+    def close(self) -> None:
+        """
+        Closes the connection to the database.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.connection.close()
+
+    def _insert_task(self, search_criteria: str, url: str, page_number: int, previous_page_signature: Optional[str]) -> bool:
+        cursor = self.connection.execute(
+            "INSERT OR IGNORE INTO tasks (search_criteria, url, page_number, previous_page_signature, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)", (search_criteria, url, page_number, previous_page_signature, time.time()))
+        return cursor.rowcount == 1
+
+    def _transaction(self) -> 'sqlite3.Connection':
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers can never lease the same task
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+class QueueWorker:
+    """Leases result pages from a WorkQueue, crawls them and pushes the accepted jobs back.
+
+    Several workers, on one or more hosts, can share the same queue.
+
+    Attributes:
+        queue (WorkQueue): The shared work queue.
+        fetcher (Fetcher): Fetches the result pages.
+        job_filter (JobFilter): The compiled filter rules applied to every extracted job.
+        csv_headers (List[str]): Headers of the job details.
+        crawl_delay (int): Minimum number of seconds between two pages crawled by this worker.
+        max_pages (int): Maximum number of result pages crawled per search, or 0 to crawl every page.
+        worker_id (str): The identifier of the worker, recorded with its leases.
+        stop_event (threading.Event): Set to stop the worker, interrupting any wait.
+        poll_interval (float): Number of seconds to wait before polling again when every remaining task is leased.
+        num_pages_crawled (int): Number of pages crawled by this worker.
+        date_normalizer (utils.PostDateNormalizer): Resolves the posted dates of the pages against the worker start time.
+        logger (logging.Logger): Logger for the worker.
+    """
+
+    def __init__(self, queue: WorkQueue, fetcher: Fetcher, job_filter: JobFilter, csv_headers: List[str],
+                 crawl_delay: int=0, max_pages: int=0, worker_id: Optional[str]=None,
+                 stop_event: Optional[threading.Event]=None, poll_interval: float=5):
+        """
+        Initializes the QueueWorker.
+
+        Args:
+            queue (WorkQueue): The shared work queue.
+            fetcher (Fetcher): Fetches the result pages.
+            job_filter (JobFilter): The compiled filter rules applied to every extracted job.
+            csv_headers (List[str]): Headers of the job details.
+            crawl_delay (int, optional): Minimum number of seconds between two pages crawled by this worker. Defaults to 0.
+            max_pages (int, optional): Maximum number of result pages crawled per search, or 0 to crawl every page. Defaults to 0.
+            worker_id (Optional[str], optional): The identifier of the worker. Defaults to the host name and process id.
+            stop_event (Optional[threading.Event], optional): Set to stop the worker. Defaults to a new event.
+            poll_interval (float, optional): Number of seconds to wait before polling again when every remaining task
+                is leased. Defaults to 5.
+        """
+        self.queue = queue
+        self.fetcher = fetcher
+        self.job_filter = job_filter
+        self.csv_headers = csv_headers
+        self.crawl_delay = crawl_delay
+        self.max_pages = max_pages
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.stop_event = stop_event or threading.Event()
+        self.poll_interval = poll_interval
+        self.num_pages_crawled = 0
+        self.date_normalizer = utils.PostDateNormalizer()
+        self.logger = logging.getLogger(__name__)
+
+    def run(self) -> None:
+        """
+        Crawls leased pages until the queue has no pending or leased tasks left, or the worker is stopped.
+
+        Returns:
+            None
+        """
+        while not self.stop_event.is_set():
+            task = self.queue.lease(self.worker_id)
+
+            if task is None:
+                if self.queue.counts()['leased'] == 0:
+                    return
+                # Other workers may still queue the next pages of their searches, or abandon their leases
+                self.stop_event.wait(self.poll_interval)
+                continue
+
+            self.process_task(task)
+            self.stop_event.wait(randint(self.crawl_delay, math.floor(self.crawl_delay * 1.5)))
+
+    def process_task(self, task: QueueTask) -> bool:
+        """
+        Crawls a leased result page and pushes its accepted jobs back to the queue.
+
+        Args:
+            task (QueueTask): The leased task.
+
+        Returns:
+            bool: True if the task was completed, False if it was released back to the queue.
+        """
+        html = self.fetcher.fetch(task.url)
+        if not is_usable_page(html, is_results_page):
+            self.logger.warning(f"Could not fetch the result page, releasing it (attempt {task.attempts}): {task.url}")
+            self.queue.release(task, self.worker_id)
+            return False
+
+        job_cards = parse_job_cards(html, task.url)
+        accepted_jobs = {}
+        num_rejected_job_cards = {}
+        for _, job_details, reason in evaluate_job_cards(job_cards, self.job_filter, self.csv_headers, task.search_criteria,
+                                                         date_normalizer=self.date_normalizer):
+            if reason is None:
+                accepted_jobs[utils.canonical_job_id(job_details['job_link'])] = job_details
+            else:
+                num_rejected_job_cards[reason] = num_rejected_job_cards.get(reason, 0) + 1
+
+        signature = page_signature(job_cards)
+        next_page = None
+        # The last page is served again when requesting the page after it
+        if signature != task.previous_page_signature and (self.max_pages == 0 or task.page_number + 1 < self.max_pages):
+            next_page = (utils.get_next_page_url(task.url), signature)
+
+        self.queue.complete(task, accepted_jobs, num_rejected_job_cards, next_page)
+        self.num_pages_crawled += 1
+        return True
+
+def page_signature(job_cards: List[Dict[str, Optional[str]]]) -> str:
+    """
+    Returns a signature of the job cards of a result page, identical for pages listing the same jobs.
+
+    Args:
+        job_cards (List[Dict[str, Optional[str]]]): The parsed job cards, keyed by header.
+
+    Returns:
+        str: The SHA-256 hash of the sorted job links.
+    """
+    job_links = sorted(job_card['job_link'] or '' for job_card in job_cards)
+    return hashlib.sha256('\n'.join(job_links).encode('utf-8')).hexdigest()
+
+def merge_results(config: Dict, queue: WorkQueue) -> int:
+    """
+    Merges the jobs pushed back by the workers into the saved jobs, flagging or skipping the new jobs that are near
+    duplicates of saved jobs, and skipping the archived jobs.
+
+    Args:
+        config (Dict): The configuration dictionary loaded from config.json.
+        queue (WorkQueue): The work queue holding the results.
+
+    Returns:
+        int: The number of new jobs.
+    """
+    jobs = load_jobs(config)
+    initial_num_records = len(jobs)
+    near_duplicates = NearDuplicateIndex.from_config(config)
+    if near_duplicates is not None:
+        near_duplicates.sync(jobs)
+    archive = JobArchive.from_config(config)
+
+    for hash_id, job_details in queue.iter_results():
+        job_key = utils.job_key_to_int(hash_id)
+        if archive is not None and job_key in archive:
+            continue
+        if near_duplicates is not None and not near_duplicates.check(job_key, job_details, jobs):
+            continue
+        utils.merge_job_record(jobs, job_key, job_details)
+
+    save_jobs(config, jobs)
+    return len(jobs) - initial_num_records
+
+def main(argv: Optional[List[str]]=None) -> None:
+    """
+    Runs the work queue from the command line.
+
+    Commands:
+        enqueue: Queues the first page of every search in the 'searches' setting, or of 'indeed_criteria' if empty.
+        work: Crawls leased pages until the queue is drained. Run one per process or host.
+        status: Prints the number of tasks in each status and the number of rejected job cards.
+        merge: Merges the accepted jobs into the output files.
+
+    Args:
+        argv (Optional[List[str]], optional): The command line arguments. Defaults to sys.argv.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description='Crawl Indeed searches with workers sharing a SQLite work queue.')
+    parser.add_argument('command', choices=['enqueue', 'work', 'status', 'merge'])
+    parser.add_argument('--config', default='config.json', help='Path of the configuration file.')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.config) as config_file:
+        config = json.load(config_file)
+    queue = WorkQueue.from_config(config)
+
+    try:
+        if args.command == 'enqueue':
+            search_urls = build_search_urls(config) or build_search_urls({**config, 'searches': [config['indeed_criteria']]})
+            num_added = sum(queue.enqueue(search_criteria, url) for search_criteria, url in search_urls.items())
+            print(f"Queued {num_added} new searches")
+        elif args.command == 'work':
+            fetcher, _ = create_fetchers()
+            worker = QueueWorker(queue, fetcher, JobFilter.from_config(config), utils.get_csv_headers(config),
+                                 config['crawl_delay'], config['num_pages_to_scrape'])
+            try:
+                worker.run()
+            except KeyboardInterrupt:
+                pass  # Leased tasks are handed to another worker once their lease expires
+            finally:
+                fetcher.close()
+            print(f"Number of pages crawled by {worker.worker_id}: {worker.num_pages_crawled}")
+        elif args.command == 'status':
+            print(f"Tasks: {queue.counts()}")
+            print(f"Number of filtered job cards: {queue.num_rejected_job_cards()}")
+        elif args.command == 'merge':
+            print(f"Number of new records: {merge_results(config, queue)}")
+    finally:
+        queue.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import datetime
+import os
+import tempfile
+import unittest
+from archive import *
+from exporters import load_jobs, save_jobs
+from job_log import JobLog
+from job_record import JobRecord
+
+
+class TestJobArchive(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temp_dir.name, 'archive')
+        self.jobs = {
+            0xa1: JobRecord(title='Data Engineer', posted_date=datetime.date(2024, 1, 5), applied='No', hash_id='a1'),
+            0xb2: JobRecord(title='Backend Developer', posted_date=datetime.date(2024, 1, 5), applied='Yes', hash_id='b2'),
+            0xc3: JobRecord(title='Analyst', posted_date=datetime.date(2024, 5, 20), applied='No', hash_id='c3'),
+            0xffffffffffffffff: JobRecord(title='Tester', applied='No', hash_id='ffffffffffffffff')
+        }
+        self.config = {'csv_settings': {'excel_output_path': os.path.join(self.temp_dir.name, 'jobs.xlsx'),
+                                        'csv_headers': ['title', 'posted_date', 'applied', 'hash_id'], 'output_formats': ['csv']},
+                       'retention': {'max_age_days': 90, 'archive_directory': self.directory}}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_find_expired_jobs(self):
+        self.assertEqual(find_expired_jobs(self.jobs, 90, datetime.date(2024, 6, 1)), [0xa1])
+        self.assertEqual(find_expired_jobs(self.jobs, 1, datetime.date(2024, 6, 1)), [0xa1, 0xc3])
+
+    def test_archive(self):
+        self.assertIsNone(JobArchive.from_config(self.config))
+        archive = JobArchive(self.directory)
+        self.assertIsNone(archive.archive({}))
+        archive.archive({0xffffffffffffffff: self.jobs[0xffffffffffffffff]})
+        archive.archive({0xa1: self.jobs[0xa1]})
+
+        archive = JobArchive.from_config(self.config)
+        self.assertEqual(len(archive), 2)
+        self.assertEqual(archive.keys(), [0xa1, 0xffffffffffffffff])
+        self.assertIn(0xa1, archive)
+        self.assertNotIn(0xb2, archive)
+        self.assertNotIn(-1, archive)
+        self.assertEqual(dict(archive.iter_jobs()), {job_key: self.jobs[job_key] for job_key in archive.keys()})
+
+    def test_compact_jobs(self):
+        self.config['job_log'] = {'enabled': True, 'path': os.path.join(self.temp_dir.name, 'jobs.log')}
+        save_jobs(self.config, self.jobs)
+        self.assertEqual(compact_jobs(self.config, datetime.date(2024, 6, 1)), 1)
+
+        self.assertEqual(sorted(load_jobs(self.config)), [0xb2, 0xc3, 0xffffffffffffffff])
+        with JobLog.from_config(self.config) as job_log:
+            self.assertNotIn(0xa1, job_log)
+        self.assertEqual(JobArchive.from_config(self.config).keys(), [0xa1])
+
+    def test_compact_jobs_without_max_age(self):
+        self.config['retention']['max_age_days'] = ''
+        save_jobs(self.config, self.jobs)
+        self.assertEqual(compact_jobs(self.config, datetime.date(2024, 6, 1)), 0)
+        self.assertEqual(len(load_jobs(self.config)), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
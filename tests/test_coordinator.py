@@ -0,0 +1,129 @@
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from coordinator import *
+from enrichment import JobDetailCache, RateLimiter
+from fetchers import Fetcher
+from filters import JobFilter
+from job_cards import parse_job_cards
+
+
+def results_page(job_keys):
+    cards = ''.join(f'''
+    <div class="job_seen_beacon">
+      <h2 class="jobTitle"><a href="/rc/clk?jk={job_key}">Software Engineer {job_key}</a></h2>
+      <span data-testid="company-name">Acme</span>
+      <div data-testid="text-location">Remote</div>
+      <table><tr class="underShelfFooter"><td>Python <span data-testid="myJobsStateDate">Posted 1 day ago</span></td></tr></table>
+    </div>''' for job_key in job_keys)
+    return f'<html><body>{cards}</body></html>'
+
+
+class PagedFetcher(Fetcher):
+    """Serves two result pages per search, then repeats the last page like Indeed does."""
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.requested_urls = []
+        self.lock = threading.Lock()
+
+    def fetch(self, url):
+        with self.lock:
+            self.requested_urls.append(url)
+        time.sleep(self.delay)
+        prefix = 'a' if 'q=a' in url else 'b'
+        page = 1 if '&start=' in url else 0
+        return results_page([f'{prefix}{page}{index}' for index in range(3)])
+
+
+class TestCrawlCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.search_urls = {'a': 'https://www.indeed.com/jobs?q=a', 'b': 'https://www.indeed.com/jobs?q=b'}
+        self.headers = ['posted_date', 'applied', 'title', 'company', 'job_link', 'search_criteria', 'hash_id']
+
+    def create_coordinator(self, fetcher, **kwargs):
+        return CrawlCoordinator(fetcher, JobFilter(max_years_of_experience=3), {}, self.headers, RateLimiter(0), **kwargs)
+
+    def test_crawls_searches_until_last_page(self):
+        coordinator = self.create_coordinator(PagedFetcher())
+        asyncio.run(coordinator.run(self.search_urls))
+
+        self.assertEqual(coordinator.pages_crawled, {'a': 2, 'b': 2})
+        self.assertEqual(len(coordinator.jobs), 12)
+        self.assertEqual({record.search_criteria for record in coordinator.jobs.values()}, {'a', 'b'})
+
+    def test_max_pages(self):
+        coordinator = self.create_coordinator(PagedFetcher(), max_pages=1)
+        asyncio.run(coordinator.run(self.search_urls))
+        self.assertEqual(coordinator.pages_crawled, {'a': 1, 'b': 1})
+
+    def test_searches_run_concurrently(self):
+        fetcher = PagedFetcher(delay=0.2)
+        coordinator = self.create_coordinator(fetcher, max_pages=1)
+
+        start = time.monotonic()
+        asyncio.run(coordinator.run(self.search_urls))
+        self.assertLess(time.monotonic() - start, 0.35)
+
+    def test_page_timeout(self):
+        coordinator = self.create_coordinator(PagedFetcher(delay=0.5), page_timeout=0.05)
+        asyncio.run(coordinator.run(self.search_urls))
+
+        self.assertEqual(coordinator.num_timeouts, 2)
+        self.assertEqual(coordinator.jobs, {})
+
+    def test_enrichment_keeps_saved_jobs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            detail_cache = JobDetailCache(directory)
+            for job_id in ['a00', 'a01']:
+                detail_cache.put(job_id, '10+ years of Python')
+            coordinator = self.create_coordinator(PagedFetcher(), detail_cache=detail_cache)
+            coordinator.jobs[0xa00] = JobRecord(title='Software Engineer a00', applied='No', hash_id='a00')
+
+            job_keys = coordinator.process_job_cards(parse_job_cards(results_page(['a00', 'a01']), self.search_urls['a']), 'a')
+            asyncio.run(coordinator.enrich_jobs(job_keys))
+
+        # Saved jobs rejected by their full description are flagged, new ones are dropped
+        self.assertEqual(list(coordinator.jobs), [0xa00])
+        self.assertEqual(coordinator.jobs[0xa00].applied, 'Skip')
+        self.assertEqual(coordinator.num_rejected_job_cards['full_description'], 2)
+
+    def test_replay_reads_only_cached_pages(self):
+        with tempfile.TemporaryDirectory() as directory:
+            page_cache = PageCache(directory, ttl_seconds=1e-9)
+            page_cache.put(self.search_urls['a'], results_page(['a00', 'a01']))
+            fetcher = PagedFetcher()
+            coordinator = self.create_coordinator(fetcher, page_cache=page_cache, replay_from_cache=True)
+            asyncio.run(coordinator.run(self.search_urls))
+
+        # The expired snapshot is replayed, and pages missing from the cache are skipped
+        self.assertEqual(fetcher.requested_urls, [])
+        self.assertEqual(coordinator.pages_crawled, {'a': 1, 'b': 0})
+        self.assertEqual(len(coordinator.jobs), 2)
+
+    def test_cancel_interrupts_crawl_delay(self):
+        coordinator = self.create_coordinator(PagedFetcher(), crawl_delay=30)
+        threading.Timer(0.2, coordinator.cancel).start()
+
+        start = time.monotonic()
+        asyncio.run(coordinator.run(self.search_urls))
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(coordinator.pages_crawled, {'a': 1, 'b': 1})
+
+
+class TestBuildSearchUrls(unittest.TestCase):
+    def test_build_search_urls(self):
+        config = {
+            'indeed_criteria': {'position': '', 'location': '', 'experience_level': '', 'job_type': '', 'max_days_posted_ago': ''},
+            'searches': [{'position': 'software engineer', 'location': 'Austin'}, {'position': 'data engineer'}]
+        }
+        self.assertEqual(build_search_urls(config), {
+            'software engineer|Austin|||': 'https://www.indeed.com/jobs?q=software+engineer&l=Austin',
+            'data engineer||||': 'https://www.indeed.com/jobs?q=data+engineer'
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
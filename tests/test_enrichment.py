@@ -0,0 +1,114 @@
+import os
+import tempfile
+import threading
+import unittest
+from enrichment import *
+from job_record import JobRecord
+
+
+DETAIL_PAGE = '''
+<html><body>
+<h1>Software Engineer</h1>
+<div id="jobDescriptionText" class="jobsearch-JobComponent-description">
+  <p>We are hiring.</p>
+  <ul><li>5+ years of experience<br>with Python</li></ul>
+  <div>Remote</div>
+</div>
+<div>Footer</div>
+</body></html>
+'''
+
+
+class TestJobDescriptionExtraction(unittest.TestCase):
+    def test_extract_job_description_text(self):
+        self.assertEqual(extract_job_description_text(DETAIL_PAGE), "We are hiring.\n5+ years of experience\nwith Python\nRemote")
+
+    def test_extract_job_description_text_missing(self):
+        self.assertIsNone(extract_job_description_text("<html><body>Blocked</body></html>"))
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_reserve_spaces_slots(self):
+        rate_limiter = RateLimiter(requests_per_second=10)
+        delays = [rate_limiter.reserve() for _ in range(3)]
+        self.assertAlmostEqual(delays[0], 0, places=2)
+        self.assertAlmostEqual(delays[2] - delays[1], 0.1, places=2)
+
+    def test_unlimited(self):
+        rate_limiter = RateLimiter(requests_per_second=0)
+        self.assertEqual([rate_limiter.reserve() for _ in range(3)], [0, 0, 0])
+
+
+class TestJobEnricher(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.fetched_urls = []
+        self.lock = threading.Lock()
+        self.enricher = JobEnricher(JobDetailCache(self.temp_dir.name), RateLimiter(0), max_workers=2, fetch=self.fetch)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def fetch(self, url):
+        with self.lock:
+            self.fetched_urls.append(url)
+        return DETAIL_PAGE if url.endswith('aa') else None
+
+    def test_each_job_fetched_once(self):
+        job_links = [('00aa', 'https://www.indeed.com/rc/clk?jk=00aa'), ('00bb', 'https://www.indeed.com/rc/clk?jk=00bb')]
+        descriptions = self.enricher.get_full_descriptions(job_links)
+        self.assertEqual(list(descriptions), ['00aa'])
+
+        descriptions = self.enricher.get_full_descriptions(job_links)
+        self.assertIn('5+ years of experience', descriptions['00aa'])
+        # Failed fetches are retried, cached descriptions are not
+        self.assertEqual(sorted(self.fetched_urls), sorted([job_links[0][1], job_links[1][1], job_links[1][1]]))
+
+
+    def test_reject_by_full_descriptions(self):
+        jobs = {0xaa: JobRecord(applied='No', hash_id='00aa'), 0xbb: JobRecord(applied='No', hash_id='00bb'),
+                0xcc: JobRecord(applied='Yes', hash_id='00cc'), 0xdd: JobRecord(applied='No', hash_id='00dd')}
+        descriptions = {'00aa': '10+ years', '00bb': '10+ years', '00cc': '10+ years', '00dd': '1 year'}
+        new_job_keys = {0xaa}
+        num_rejected = reject_by_full_descriptions(jobs, list(jobs), descriptions, lambda description: '10+' not in description,
+                                                   new_job_keys)
+
+        self.assertEqual(num_rejected, 2)
+        self.assertEqual({job_key: job_record.applied for job_key, job_record in jobs.items()},
+                         {0xbb: 'Skip', 0xcc: 'Yes', 0xdd: 'No'})
+
+
+class TestJobDetailCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.descriptions = {f"{number:04x}": f"Job {number}: We are hiring.\n5+ years of experience\nwith Python"
+                             for number in range(MIN_DICTIONARY_SAMPLES + 1)}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_put_and_get(self):
+        cache = JobDetailCache(self.temp_dir.name)
+        for job_id, description in self.descriptions.items():
+            cache.put(job_id, description)
+        self.assertTrue(cache.codec.dictionary)
+
+        # Descriptions compressed before and after the dictionary was trained, and stored uncompressed, are read
+        os.makedirs(os.path.join(self.temp_dir.name, 'ff'))
+        with open(os.path.join(self.temp_dir.name, 'ff', 'ffaa.txt'), 'w', encoding='utf-8') as detail_file:
+            detail_file.write('Uncompressed')
+        cache = JobDetailCache(self.temp_dir.name)
+        self.assertEqual({job_id: cache.get(job_id) for job_id in self.descriptions}, self.descriptions)
+        self.assertEqual(cache.get('ffaa'), 'Uncompressed')
+        self.assertIsNone(cache.get('ffbb'))
+
+    def test_dictionary_trained_by_another_cache(self):
+        cache = JobDetailCache(self.temp_dir.name)
+        other_cache = JobDetailCache(self.temp_dir.name)
+        for job_id, description in self.descriptions.items():
+            other_cache.put(job_id, description)
+        self.assertEqual(cache.get('0064'), self.descriptions['0064'])
+
+
+if __name__ == '__main__':
+    unittest.main()
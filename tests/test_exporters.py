@@ -0,0 +1,85 @@
+import csv
+import datetime
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+from exporters import *
+from job_record import JobRecord
+
+
+class TestExporters(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.headers = ['posted_date', 'applied', 'title', 'company', 'job_link', 'hash_id']
+        self.jobs = {
+            0xa1: JobRecord(posted_date='01/02/2024', applied='No', title='Engineer, "Backend"', company='Beta',
+                            job_link='https://www.indeed.com/rc/clk?jk=a1', hash_id='a1'),
+            0xb2: JobRecord(posted_date='01/03/2024', applied='Yes', title='Data Engineer', company='Acme',
+                            job_link='https://www.indeed.com/rc/clk?jk=b2', hash_id='b2')
+        }
+        self.config = {'csv_settings': {'excel_output_path': os.path.join(self.temp_dir.name, 'jobs.xlsx'),
+                                        'csv_headers': self.headers, 'output_formats': ['csv', 'jsonl']}}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_csv_export(self):
+        path = os.path.join(self.temp_dir.name, 'jobs.csv')
+        self.assertEqual(export_jobs('csv', path, self.headers, self.jobs), 2)
+
+        with open(path, encoding='utf-8', newline='') as csv_file:
+            rows = list(csv.reader(csv_file))
+        self.assertEqual(rows[0], self.headers)
+        self.assertEqual([row[2] for row in rows[1:]], ['Data Engineer', 'Engineer, "Backend"'])
+
+    def test_jsonl_export(self):
+        path = os.path.join(self.temp_dir.name, 'jobs.jsonl')
+        export_jobs('jsonl', path, self.headers, self.jobs)
+
+        with open(path, encoding='utf-8') as jsonl_file:
+            rows = [json.loads(line) for line in jsonl_file]
+        self.assertEqual(rows[1], self.jobs[0xa1].to_dict(self.headers, as_text=True))
+
+    def test_failed_export_keeps_previous_file(self):
+        path = os.path.join(self.temp_dir.name, 'jobs.csv')
+        export_jobs('csv', path, self.headers, self.jobs)
+
+        with self.assertRaises(RuntimeError):
+            with CsvExporter(path, self.headers) as exporter:
+                raise RuntimeError()
+        self.assertEqual(os.listdir(self.temp_dir.name), ['jobs.csv'])
+
+    def test_save_and_load_jobs(self):
+        save_jobs(self.config, self.jobs)
+
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ['jobs.csv', 'jobs.jsonl'])
+        self.assertEqual(load_jobs(self.config), self.jobs)
+        self.assertEqual(load_jobs({'csv_settings': {**self.config['csv_settings'], 'output_formats': ['jsonl']}}), self.jobs)
+
+    def test_unknown_output_format(self):
+        with self.assertRaises(ValueError):
+            get_output_formats({'csv_settings': {'output_formats': ['xml']}})
+
+
+@unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow is not installed')
+class TestColumnarExporters(unittest.TestCase):
+    setUp = TestExporters.setUp
+    tearDown = TestExporters.tearDown
+
+    def test_build_job_table(self):
+        table = build_job_table(self.headers, self.jobs)
+        self.assertEqual(str(table.schema.field('posted_date').type), 'date32[day]')
+        self.assertEqual(str(table.schema.field('company').type), 'dictionary<values=string, indices=int32, ordered=0>')
+        self.assertEqual(table.column('posted_date').to_pylist(), [datetime.date(2024, 1, 3), datetime.date(2024, 1, 2)])
+
+    def test_save_and_load_columnar_jobs(self):
+        for output_format in COLUMNAR_FORMATS:
+            config = {'csv_settings': {**self.config['csv_settings'], 'output_formats': [output_format]}}
+            save_jobs(config, self.jobs)
+            self.assertEqual(load_jobs(config), self.jobs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import gzip
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from fetchers import *
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.client_ports.add(self.client_address[1])
+        self.server.cookies.append(self.headers.get('Cookie'))
+
+        if self.path == '/redirect':
+            self.send_body(302, b'', {'Location': '/jobs'})
+        elif self.path == '/jobs':
+            self.send_body(200, gzip.compress(b'<div class="job_seen_beacon">Job</div>'),
+                           {'Content-Encoding': 'gzip', 'Set-Cookie': 'session=abc; Path=/'})
+        elif self.path == '/blocked':
+            self.send_body(200, b'<title>Just a moment...</title>')
+        else:
+            self.send_body(404, b'Not found')
+
+    def send_body(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StaticFetcher(Fetcher):
+    def __init__(self, html):
+        self.html = html
+        self.fetched_urls = []
+
+    def fetch(self, url):
+        self.fetched_urls.append(url)
+        return self.html
+
+
+class TestHttpFetcher(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.server.client_ports = set()
+        self.server.cookies = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.fetcher = HttpFetcher(timeout=5)
+
+    def tearDown(self):
+        self.fetcher.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_fetch_follows_redirect_and_decompresses(self):
+        self.assertEqual(self.fetcher.fetch(self.base_url + '/redirect'), '<div class="job_seen_beacon">Job</div>')
+
+    def test_fetch_reuses_connection_and_sends_cookies(self):
+        self.fetcher.fetch(self.base_url + '/jobs')
+        self.fetcher.fetch(self.base_url + '/jobs')
+        self.assertEqual(len(self.server.client_ports), 1)
+        self.assertEqual(self.server.cookies, [None, 'session=abc'])
+
+    def test_fetch_error_status(self):
+        self.assertIsNone(self.fetcher.fetch(self.base_url + '/missing'))
+
+    def test_fallback_when_blocked(self):
+        browser = StaticFetcher('<div class="job_seen_beacon">Rendered</div>')
+        fetcher = FallbackFetcher(self.fetcher, browser)
+        self.assertEqual(fetcher.fetch(self.base_url + '/blocked'), '<div class="job_seen_beacon">Rendered</div>')
+        self.assertEqual(fetcher.fetch(self.base_url + '/jobs'), '<div class="job_seen_beacon">Job</div>')
+        self.assertEqual(fetcher.num_fallbacks, 1)
+
+    def test_fallback_when_incomplete(self):
+        browser = StaticFetcher('<div>Rendered</div>')
+        fetcher = FallbackFetcher(self.fetcher, browser, is_complete=lambda html: 'Rendered' in html)
+        self.assertEqual(fetcher.fetch(self.base_url + '/jobs'), '<div>Rendered</div>')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import datetime
+import unittest
+from filters import *
+from job_record import JOB_RECORD_FIELDS
+from utils import build_job_records
+
+
+class TestJobFilter(unittest.TestCase):
+    def setUp(self):
+        self.job = {
+            'title': 'Software Engineer',
+            'company': 'Acme',
+            'location': 'Austin, TX',
+            'description': '2+ years of experience with Python',
+            'salary_preview': '$100,000 - $120,000 a year',
+            'posted_date': '01/10/2024'
+        }
+
+    # ---------------------------------------------------------
+    # Tests for excluded keywords and years of experience
+    # ---------------------------------------------------------
+    def test_excluded_keyword_in_title(self):
+        job_filter = JobFilter(excluded_keywords=['senior', 'machine learning'], max_years_of_experience=3)
+        self.assertEqual(job_filter.rejection_reason({**self.job, 'title': 'Senior: Software Engineer'}), 'excluded_title')
+        self.assertEqual(job_filter.rejection_reason({**self.job, 'title': 'Machine-Learning Engineer'}), 'excluded_title')
+
+    def test_excluded_keyword_with_punctuation(self):
+        job_filter = JobFilter(excluded_keywords=['c++', 'c#'], max_years_of_experience=3)
+        self.assertEqual(job_filter.rejection_reason({**self.job, 'title': 'Engineer (C++)'}), 'excluded_title')
+        self.assertEqual(job_filter.rejection_reason({**self.job, 'title': 'C#/.NET Developer'}), 'excluded_title')
+        for title in ['C Engineer', 'Objective-C Developer', 'F# Developer']:
+            self.assertTrue(job_filter.accepts({**self.job, 'title': title}))
+
+    def test_excluded_keyword_does_not_match_partial_word(self):
+        job_filter = JobFilter(excluded_keywords=['ml'], max_years_of_experience=3)
+        self.assertTrue(job_filter.accepts({**self.job, 'title': 'HTML Developer'}))
+
+    def test_years_of_experience_above_maximum(self):
+        job_filter = JobFilter(max_years_of_experience=1)
+        self.assertEqual(job_filter.rejection_reason(self.job), 'years_of_experience')
+
+    def test_years_of_experience_without_maximum(self):
+        self.assertEqual(JobFilter().rejection_reason(self.job), 'years_of_experience')
+        self.assertTrue(JobFilter().accepts({**self.job, 'description': 'Python'}))
+
+    # ---------------------------------------------------------
+    # Tests for filter rules
+    # ---------------------------------------------------------
+    def test_company_blocklist(self):
+        job_filter = JobFilter(max_years_of_experience=3, company_blocklist=['ACME '])
+        self.assertEqual(job_filter.rejection_reason(self.job), 'blocked_company')
+
+    def test_location_include_and_exclude(self):
+        self.assertEqual(JobFilter(max_years_of_experience=3, location_include=['remote']).rejection_reason(self.job), 'location')
+        self.assertEqual(JobFilter(max_years_of_experience=3, location_exclude=['tx']).rejection_reason(self.job), 'location')
+        self.assertTrue(JobFilter(max_years_of_experience=3, location_include=['austin', 'remote']).accepts(self.job))
+
+    def test_min_salary(self):
+        self.assertEqual(JobFilter(max_years_of_experience=3, min_salary=130000).rejection_reason(self.job), 'salary')
+        self.assertTrue(JobFilter(max_years_of_experience=3, min_salary=110000).accepts(self.job))
+        self.assertTrue(JobFilter(max_years_of_experience=3, min_salary=130000).accepts({**self.job, 'salary_preview': 'N/A'}))
+        self.assertTrue(JobFilter(max_years_of_experience=3, min_salary=130000).has_valid_salary('$120K - $150K a year'))
+
+    def test_title_include_patterns(self):
+        job_filter = JobFilter(max_years_of_experience=3, title_include_patterns=[r'\bpython\b', 'backend'])
+        self.assertEqual(job_filter.rejection_reason(self.job), 'title_include')
+        self.assertTrue(job_filter.accepts({**self.job, 'title': 'Backend Engineer'}))
+
+    def test_max_posting_age(self):
+        job_filter = JobFilter(max_years_of_experience=3, max_posting_age_days=7, reference_date=datetime.date(2024, 1, 15))
+        self.assertTrue(job_filter.accepts(self.job))
+        self.assertEqual(job_filter.rejection_reason({**self.job, 'posted_date': '12/31/2023'}), 'posting_age')
+
+    def test_from_config(self):
+        config = {
+            'excluded_keywords': ['senior'],
+            'indeed_criteria': {'user_years_of_experience': '3'},
+            'filter_rules': {'company_blocklist': ['acme'], 'min_salary': ''}
+        }
+        job_filter = JobFilter.from_config(config)
+        self.assertEqual(job_filter.max_years_of_experience, 3)
+        self.assertIsNone(job_filter.min_salary)
+        self.assertEqual(job_filter.rejection_reason(self.job), 'blocked_company')
+
+
+class TestRefilterJobs(unittest.TestCase):
+    def setUp(self):
+        self.job_filter = JobFilter(excluded_keywords=['senior'], max_years_of_experience=3)
+        self.jobs = {
+            'a': {'title': 'Senior Engineer', 'description': '', 'applied': 'No'},
+            'b': {'title': 'Engineer', 'description': 'Requires 5+ years of Python', 'applied': 'Yes'},
+            'c': {'title': 'Engineer', 'description': '2 years of experience', 'applied': 'No'},
+            'd': {'title': 'Engineer', 'description': '10 years', 'applied': 'No'}
+        }
+
+    def test_find_rejected_jobs_matches_rejection_reason(self):
+        expected = {key: self.job_filter.rejection_reason(job) for key, job in self.jobs.items() if not self.job_filter.accepts(job)}
+        self.assertEqual(self.job_filter.find_rejected_jobs(self.jobs), expected)
+        self.assertEqual(expected, {'a': 'excluded_title', 'b': 'years_of_experience', 'd': 'years_of_experience'})
+
+    def test_stored_metrics_are_used_instead_of_text(self):
+        job_filter = JobFilter(max_years_of_experience=3, min_salary=90000)
+        # Rows written before the metrics were stored have them extracted once when loaded
+        rows = [{**job, 'job_link': f'https://www.indeed.com/rc/clk?jk={key}'} for key, job in self.jobs.items()]
+        records = build_job_records(rows, list(JOB_RECORD_FIELDS))
+        self.assertEqual(sorted(record.min_years_of_experience for record in records.values() if record.min_years_of_experience != ''), [2, 5, 10])
+
+        for record in records.values():
+            record.description = ''
+        underpaid_record = next(record for record in records.values() if record.min_years_of_experience == 2)
+        underpaid_record.max_annual_salary = 80000.0
+        self.assertEqual(sorted(job_filter.find_rejected_jobs(records).values()),
+                         ['salary', 'years_of_experience', 'years_of_experience'])
+        self.assertEqual(job_filter.rejection_reason(underpaid_record), 'salary')
+
+    def test_find_rejected_jobs_does_not_span_descriptions(self):
+        jobs = {'a': {'title': '', 'description': 'Level 4'}, 'b': {'title': '', 'description': 'years required'}}
+        self.assertEqual(self.job_filter.find_rejected_jobs(jobs), {})
+
+    def test_refilter_jobs_report(self):
+        rejected = refilter_jobs(self.jobs, self.job_filter, 'report')
+        self.assertEqual(set(rejected), {'a', 'b', 'd'})
+        self.assertEqual(len(self.jobs), 4)
+
+    def test_refilter_jobs_flag(self):
+        refilter_jobs(self.jobs, self.job_filter, 'flag')
+        self.assertEqual([job['applied'] for job in self.jobs.values()], ['Skip', 'Yes', 'No', 'Skip'])
+
+    def test_refilter_jobs_remove_keeps_applied(self):
+        refilter_jobs(self.jobs, self.job_filter, 'remove')
+        self.assertEqual(set(self.jobs), {'b', 'c'})
+
+
+if __name__ == '__main__':
+    unittest.main()
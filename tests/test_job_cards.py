@@ -0,0 +1,52 @@
+import unittest
+from job_cards import *
+
+
+RESULTS_PAGE = '''
+<html><body><ul>
+<li><div class="cardOutline"><div class="job_seen_beacon">
+  <table><tbody><tr><td>
+    <h2 class="jobTitle css-1"><a href="/rc/clk?jk=bb8de57de0baae55&amp;bb=abc"><span title="Software Engineer">Software Engineer</span></a></h2>
+    <span data-testid="company-name">Acme</span>
+    <div data-testid="text-location">Austin, TX</div>
+    <div class="salary-snippet-container css-2"><div data-testid="attribute_snippet_testid">$100,000 - $120,000 a year</div></div>
+  </td></tr></tbody></table>
+  <table><tbody><tr class="underShelfFooter"><td><ul><li>2+ years of Python<br>experience</li><li>Remote</li></ul>
+    <span data-testid="myJobsStateDate">Posted 3 days ago</span>
+  </td></tr></tbody></table>
+</div></div></li>
+<li><div class="job_seen_beacon">
+  <h2 class="jobTitle"><a href="https://www.indeed.com/rc/clk?jk=00000000000000aa">Data Engineer</a></h2>
+  <span data-testid="company-name">Initech</span>
+  <p>Unclosed paragraph
+</div></li>
+</ul></body></html>
+'''
+
+
+class TestParseJobCards(unittest.TestCase):
+    def setUp(self):
+        self.job_cards = parse_job_cards(RESULTS_PAGE, "https://www.indeed.com/jobs?q=software")
+
+    def test_parse_all_cards(self):
+        self.assertEqual(len(self.job_cards), 2)
+
+    def test_parse_card_fields(self):
+        self.assertEqual(self.job_cards[0], {
+            'job_link': 'https://www.indeed.com/rc/clk?jk=bb8de57de0baae55&bb=abc',
+            'description': '2+ years of Python experience Remote Posted 3 days ago',
+            'title': 'Software Engineer',
+            'company': 'Acme',
+            'location': 'Austin, TX',
+            'posted_date': 'Posted 3 days ago',
+            'salary_preview': '$100,000 - $120,000 a year'
+        })
+
+    def test_missing_fields(self):
+        self.assertEqual(self.job_cards[1]['title'], 'Data Engineer')
+        self.assertIsNone(self.job_cards[1]['location'])
+        self.assertEqual(self.job_cards[1]['salary_preview'], 'N/A')
+
+
+if __name__ == '__main__':
+    unittest.main()
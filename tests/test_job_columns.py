@@ -0,0 +1,83 @@
+import datetime
+import random
+import re
+import unittest
+import numpy as np
+from job_columns import *
+from filters import JobFilter
+from job_record import JobRecord
+from utils import extract_job_metrics
+
+
+class TestJobColumns(unittest.TestCase):
+    def setUp(self):
+        self.jobs = {
+            0xa1: JobRecord(posted_date='01/02/2024', applied='Yes', title='Senior Engineer', company='Beta',
+                            location='Austin, TX', min_years_of_experience=7, max_years_of_experience=10,
+                            min_annual_salary=150000, max_annual_salary=180000),
+            0xb2: JobRecord(posted_date='01/20/2024', applied='No', title='Data Engineer', company='Acme',
+                            location='Remote', min_years_of_experience='', max_years_of_experience='',
+                            min_annual_salary='', max_annual_salary=''),
+            0xc3: {'posted_date': '', 'title': 'Developer (C++)', 'company': ' acme ', 'location': 'Remote',
+                   'description': 'Requires 3 years of C++ and 5+ years of Python', 'salary_preview': '$40 an hour'}
+        }
+        self.columns = JobColumns.from_jobs(self.jobs)
+
+    def test_from_jobs(self):
+        self.assertEqual(self.columns.job_keys, [0xa1, 0xb2, 0xc3])
+        self.assertEqual(self.columns.posted_ordinals.tolist(), [datetime.date(2024, 1, 2).toordinal(),
+                                                                 datetime.date(2024, 1, 20).toordinal(), 0])
+        np.testing.assert_array_equal(self.columns.min_years_of_experience, [7, np.nan, 3])
+        np.testing.assert_array_equal(self.columns.max_years_of_experience, [10, np.nan, 5])
+        np.testing.assert_array_equal(self.columns.max_annual_salary, [180000, np.nan, 83200])
+        self.assertEqual(self.columns.categories['location'], ['Austin, TX', 'Remote'])
+        self.assertEqual(self.columns.codes['location'].tolist(), [0, 1, 1])
+
+    def test_predicates(self):
+        columns = self.columns
+        self.assertEqual(columns.accepts_years_of_experience(5).tolist(), [False, True, True])
+        self.assertEqual(columns.accepts_years_of_experience(None).tolist(), [False, True, False])
+        self.assertEqual(columns.accepts_salary(100000).tolist(), [True, True, False])
+        self.assertEqual(columns.posted_between(datetime.date(2024, 1, 10)).tolist(), [False, True, False])
+        self.assertEqual(columns.posted_between(end=datetime.date(2024, 1, 10), include_undated=True).tolist(),
+                         [True, False, True])
+        self.assertEqual(columns.company_in(['ACME']).tolist(), [False, True, True])
+        self.assertEqual(columns.location_matches(re.compile('remote', re.IGNORECASE)).tolist(), [False, True, True])
+        self.assertEqual(columns.title_matches(re.compile('^d')).tolist(), [False, False, False])
+        self.assertEqual(columns.title_matches(re.compile(r'\bd'), normalized=True).tolist(), [False, True, True])
+        flags = columns.keyword_flags(['Engineer', 'data engineer', 'c'])
+        self.assertEqual({keyword: mask.tolist() for keyword, mask in flags.items()},
+                         {'Engineer': [True, False, False], 'data engineer': [False, True, False],
+                          'c': [False, False, True]})
+        self.assertEqual(columns.select(columns.company_in(['acme']) & columns.accepts_salary(100000)), [0xb2])
+
+    def test_find_rejected_jobs_matches_rejection_reason(self):
+        rng = random.Random(0)
+        titles = ['Senior Engineer', 'Data Engineer', 'Developer (C++)', 'Sr. Analyst', 'Intern', 'QA Tester', 'C Engineer']
+        jobs = {}
+        for job_key in range(500):
+            job = {'posted_date': rng.choice(['', '01/02/2024', '03/01/2024', '2 days ago']),
+                   'title': rng.choice(titles), 'company': rng.choice(['Acme', 'Beta', 'Gamma Inc']),
+                   'location': rng.choice(['Austin, TX', 'Remote', 'Dallas, TX']),
+                   'description': f"{rng.randint(0, 9)} years of experience" if rng.random() < 0.5 else '',
+                   'salary_preview': rng.choice(['', '$40 an hour', '$90,000 - $120,000 a year'])}
+            if rng.random() < 0.5:
+                job = JobRecord(**job, **extract_job_metrics(job['description'], job['salary_preview']))
+            jobs[job_key] = job
+
+        job_filters = [
+            JobFilter(),
+            JobFilter(excluded_keywords=['senior', 'sr', 'data engineer', 'c++'], max_years_of_experience=4,
+                      company_blocklist=['beta'], location_exclude=['dallas'], min_salary=100000,
+                      title_include_patterns=['engineer|developer', '^Sr'], max_posting_age_days=30,
+                      reference_date=datetime.date(2024, 3, 10)),
+            JobFilter(location_include=['TX'], max_posting_age_days=0, reference_date=datetime.date(2024, 1, 2))
+        ]
+        for job_filter in job_filters:
+            expected = {job_key: job_filter.rejection_reason(job) for job_key, job in jobs.items()}
+            self.assertEqual(job_filter.find_rejected_jobs(jobs),
+                             {job_key: reason for job_key, reason in expected.items() if reason})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import datetime
+import os
+import tempfile
+import unittest
+from openpyxl import load_workbook
+from job_log import *
+from exporters import load_jobs, merge_output_edits, save_jobs
+from partitions import read_partitioned_jobs_excel
+from job_record import JobRecord
+from seen_jobs import LazyJobStore
+from text_compression import CompressedText, TextCodec
+
+
+class TestJobLog(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'jobs.log')
+        self.jobs = {
+            0xa1: JobRecord(title='Data Engineer', company='Acme', posted_date=datetime.date(2024, 5, 1), applied='No',
+                            min_annual_salary=120000.0, description='Pipelines in Python', hash_id='a1'),
+            0xffffffffffffffff: JobRecord(title='Backend Developer', company='Beta Corp', applied='Yes',
+                                          min_years_of_experience=3, hash_id='ffffffffffffffff')
+        }
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_encode_and_decode(self):
+        for job_record in self.jobs.values():
+            self.assertEqual(decode_job_record(encode_job_record(job_record)), job_record)
+        self.assertEqual(decode_job_record(b'{"title":"Tester","unknown":1}'), JobRecord(title='Tester'))
+
+    def test_encode_compressed_description(self):
+        codec = TextCodec.train([f"Job {number}: Pipelines in Python" for number in range(10)])
+        payload = encode_job_record(self.jobs[0xa1], codec)
+        self.assertNotIn(b'Pipelines', payload)
+        job_record = decode_job_record(payload, codec)
+        self.assertIsInstance(job_record.stored_description, CompressedText)
+        self.assertEqual(job_record, self.jobs[0xa1])
+        self.assertEqual(encode_job_record(job_record, codec), payload)
+        self.assertEqual(encode_job_record(job_record), encode_job_record(self.jobs[0xa1]))
+
+    def test_sync_trains_dictionary(self):
+        jobs = {job_key: JobRecord(title='Data Engineer', description=f"Job {job_key}: Pipelines in Python and SQL",
+                                   hash_id=f"{job_key:x}") for job_key in range(1, MIN_DICTIONARY_SAMPLES + 1)}
+        with JobLog(self.path) as job_log:
+            job_log.sync(dict(list(jobs.items())[:10]))
+            self.assertIsNone(job_log.codec)
+            job_log.sync(jobs)
+            self.assertIsNotNone(job_log.codec)
+        log_size = os.path.getsize(self.path)
+
+        with JobLog(self.path) as job_log:
+            read_jobs = job_log.read_jobs()
+            self.assertEqual(read_jobs, jobs)
+            # Descriptions read compressed are written back as they are
+            job_log.sync(read_jobs)
+            self.assertEqual(os.path.getsize(self.path), log_size)
+
+    def test_sync_and_get(self):
+        with JobLog(self.path) as job_log:
+            job_log.sync(self.jobs)
+            self.assertEqual(len(job_log), 2)
+            self.assertEqual(job_log.get(0xa1), self.jobs[0xa1])
+
+        with JobLog(self.path) as job_log:
+            self.assertEqual(len(job_log), 2)
+            self.assertIn(0xffffffffffffffff, job_log)
+            self.assertNotIn(0xb2, job_log)
+            self.assertIsNone(job_log.get(0xb2))
+            self.assertEqual(job_log.read_jobs(), self.jobs)
+
+    def test_sync_appends_changes_only(self):
+        with JobLog(self.path) as job_log:
+            job_log.sync(self.jobs)
+        log_size = os.path.getsize(self.path)
+
+        with JobLog(self.path) as job_log:
+            job_log.sync(self.jobs)
+            self.assertEqual(os.path.getsize(self.path), log_size)
+
+            self.jobs[0xa1].applied = 'Yes'
+            del self.jobs[0xffffffffffffffff]
+            self.jobs[0xc3] = JobRecord(title='Tester', hash_id='c3')
+            job_log.sync(self.jobs)
+            self.assertEqual(sorted(job_log.keys()), [0xa1, 0xc3])
+
+        with JobLog(self.path) as job_log:
+            self.assertEqual(job_log.read_jobs(), self.jobs)
+            self.assertEqual(job_log.get(0xa1).applied, 'Yes')
+
+    def test_unindexed_and_truncated_records(self):
+        job_log = JobLog(self.path)
+        job_log.sync(self.jobs)
+        job_log.append({0xc3: JobRecord(title='Tester', hash_id='c3')})
+        job_log.remove([0xa1, 0xd4])
+        job_log._close_files()  # an interrupted run never writes the index
+
+        with open(self.path, 'ab') as log_file:
+            log_file.write(RECORD_HEADER.pack(0xe5, 100) + b'{"title":')
+        with JobLog(self.path) as job_log:
+            self.assertEqual(sorted(job_log.keys()), [0xc3, 0xffffffffffffffff])
+            self.assertEqual(job_log.get(0xc3).title, 'Tester')
+            job_log.append({0xe5: JobRecord(title='Analyst')})
+
+        with JobLog(self.path) as job_log:
+            self.assertEqual(len(job_log), 3)
+            self.assertEqual(job_log.get(0xe5).title, 'Analyst')
+
+    def test_compact(self):
+        with JobLog(self.path) as job_log:
+            for applied in ['No', 'Yes', 'No']:
+                self.jobs[0xa1].applied = applied
+                job_log.append(self.jobs)
+            job_log.compact()
+            self.assertEqual(job_log.read_jobs(), self.jobs)
+            self.assertEqual(os.path.getsize(self.path), len(LOG_MAGIC) + sum(
+                RECORD_HEADER.size + len(encode_job_record(job_record)) for job_record in self.jobs.values()))
+
+    def test_save_and_load_jobs(self):
+        config = {'csv_settings': {'excel_output_path': os.path.join(self.temp_dir.name, 'jobs.xlsx'),
+                                   'csv_headers': ['title', 'hash_id'], 'output_formats': ['csv']},
+                  'job_log': {'enabled': True, 'path': self.path}}
+        save_jobs(config, self.jobs)
+        # Fields that are not output columns are kept by the job log
+        self.assertEqual(load_jobs(config), self.jobs)
+
+    def test_spreadsheet_edits_are_kept(self):
+        excel_path = os.path.join(self.temp_dir.name, 'jobs.xlsx')
+        config = {'csv_settings': {'excel_output_path': excel_path, 'output_formats': ['excel'],
+                                   'csv_headers': ['posted_date', 'applied', 'title', 'hash_id']},
+                  'job_log': {'enabled': True, 'path': self.path}}
+        save_jobs(config, self.jobs)
+        with JobLog(self.path) as job_log:
+            self.assertEqual(merge_output_edits(config, job_log), 0)
+
+        workbook = load_workbook(excel_path)
+        for row in workbook.active.iter_rows(min_row=2):
+            if row[3].value == 'a1':
+                row[1].value = 'Yes'
+        workbook.save(excel_path)
+        modified_time = os.path.getmtime(self.path) + 1
+        os.utime(excel_path, (modified_time, modified_time))
+
+        jobs = load_jobs(config)
+        self.assertEqual(jobs[0xa1].applied, 'Yes')
+        # Fields that are not output columns are kept
+        self.assertEqual(jobs[0xa1].min_annual_salary, 120000.0)
+        save_jobs(config, jobs)
+        self.assertEqual(read_partitioned_jobs_excel(config)[0xa1].applied, 'Yes')
+        self.assertEqual(load_jobs(config)[0xa1].applied, 'Yes')
+
+    def test_lazy_job_store_reads_single_jobs(self):
+        with JobLog(self.path) as job_log:
+            job_log.sync(self.jobs)
+            jobs = LazyJobStore(job_log, self.fail, job_log.get)
+            self.assertEqual(jobs.get(0xa1), self.jobs[0xa1])
+            self.assertNotIn(0xb2, jobs)
+            self.assertFalse(jobs.is_loaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import datetime
+import pickle
+import unittest
+from job_record import *
+
+
+class TestJobRecord(unittest.TestCase):
+    def setUp(self):
+        self.details = {
+            'posted_date': '01/10/2024',
+            'applied': 'No',
+            'title': 'Software Engineer',
+            'company': 'Acme',
+            'location': 'Austin, TX',
+            'job_link': 'https://www.indeed.com/rc/clk?jk=bb8de57de0baae55',
+            'search_criteria': ''.join(['software', '|', 'texas'])
+        }
+
+    def test_from_dict_defaults_missing_fields(self):
+        record = JobRecord.from_dict(self.details)
+        self.assertEqual(record.title, 'Software Engineer')
+        self.assertEqual(record['description'], '')
+        self.assertEqual(record.get('unknown_header', ''), '')
+
+    def test_record_has_no_instance_dict(self):
+        self.assertFalse(hasattr(JobRecord.from_dict(self.details), '__dict__'))
+
+    def test_repeated_values_are_interned(self):
+        first = JobRecord.from_dict(self.details)
+        second = JobRecord.from_dict({**self.details, 'search_criteria': ''.join(['software', '|', 'texas'])})
+        self.assertIs(first.search_criteria, second.search_criteria)
+
+    def test_set_item(self):
+        record = JobRecord.from_dict(self.details)
+        record['applied'] = 'Skip'
+        self.assertEqual(record.applied, 'Skip')
+        with self.assertRaises(KeyError):
+            record['unknown_header'] = 'value'
+
+    def test_to_dict_and_pickle_round_trip(self):
+        record = JobRecord.from_dict(self.details)
+        self.assertEqual(JobRecord.from_dict(record.to_dict()), record)
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+
+    def test_posted_date_is_stored_as_date(self):
+        record = JobRecord.from_dict(self.details)
+        self.assertEqual(record.posted_date, datetime.date(2024, 1, 10))
+        self.assertEqual(record.to_dict(['posted_date'], as_text=True), {'posted_date': '01/10/2024'})
+        self.assertEqual(JobRecord(posted_date=datetime.datetime(2024, 1, 10, 12)).posted_date, datetime.date(2024, 1, 10))
+        self.assertEqual(JobRecord(posted_date='2024-01-10').posted_date, datetime.date(2024, 1, 10))
+        self.assertEqual(JobRecord(posted_date='unknown').posted_date, 'unknown')
+
+
+    def test_metrics_are_stored_as_numbers(self):
+        record = JobRecord(min_years_of_experience='3', max_annual_salary='120000.0', min_annual_salary='N/A')
+        self.assertEqual((record.min_years_of_experience, record.max_annual_salary, record.min_annual_salary), (3, 120000.0, ''))
+
+
+class TestJobStore(unittest.TestCase):
+    def setUp(self):
+        self.store = JobStore({
+            1: JobRecord(posted_date='12/30/2023', company='Acme'),
+            2: JobRecord(posted_date='01/02/2024', company='Beta'),
+            3: JobRecord(posted_date='01/02/2024', company='Acme'),
+            4: JobRecord(posted_date='', company='Acme')
+        })
+
+    def sorted_keys(self):
+        return [job_key for job_key, _ in self.store.sorted_items()]
+
+    def test_sorted_across_years(self):
+        self.assertEqual(self.sorted_keys(), [3, 2, 1, 4])
+
+    def test_index_is_maintained(self):
+        self.store[5] = JobRecord(posted_date='01/01/2024', company='Acme')
+        self.store[3] = JobRecord(posted_date='12/01/2023', company='Acme')
+        del self.store[2]
+        self.assertEqual(self.store.pop(4).company, 'Acme')
+        self.assertEqual(self.sorted_keys(), [5, 1, 3])
+
+        self.store[1].company = 'Zeta'
+        self.store[1].posted_date = datetime.date(2024, 2, 1)
+        self.store.reindex(1)
+        self.assertEqual(self.sorted_keys(), [1, 5, 3])
+
+    def test_pickle_round_trip(self):
+        store = pickle.loads(pickle.dumps(self.store))
+        self.assertIsInstance(store, JobStore)
+        self.assertEqual(store, self.store)
+        self.assertEqual([job_key for job_key, _ in store.sorted_items()], self.sorted_keys())
+
+
+if __name__ == '__main__':
+    unittest.main()
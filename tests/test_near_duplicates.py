@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from near_duplicates import *
+from job_record import JobRecord
+
+DESCRIPTION = ('We are looking for a data engineer to design, build and maintain batch and streaming pipelines in Python '
+               'and SQL. You will work with analysts and product teams to model data in our warehouse, monitor data '
+               'quality and own the reliability of our ingestion jobs. Experience with Airflow, Spark and cloud '
+               'storage is a plus. Hybrid schedule with two days per week in the office and a yearly learning budget.')
+
+
+class TestNearDuplicateIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = NearDuplicateIndex()
+        self.jobs = {
+            0xa1: JobRecord(title='Data Engineer', company='Acme', description=DESCRIPTION, hash_id='a1'),
+            0xb2: JobRecord(title='Backend Developer', company='Beta Corp', hash_id='b2',
+                            description='Build REST services in Go and maintain our Postgres databases on call.')
+        }
+        self.index.add(self.jobs)
+        self.repost = {'title': 'Data Engineer', 'company': 'Acme', 'hash_id': 'c3',
+                       'description': DESCRIPTION.replace('a yearly learning budget', 'a learning budget') + ' Apply today!'}
+
+    def test_find_duplicate(self):
+        job_key, similarity = self.index.find_duplicate(self.repost)
+        self.assertEqual(job_key, 0xa1)
+        self.assertGreaterEqual(similarity, 0.7)
+        self.assertIsNone(self.index.find_duplicate(self.jobs[0xa1], exclude=0xa1))
+        self.assertIsNone(self.index.find_duplicate({'title': 'Nurse', 'company': 'Clinic', 'description': 'Night shifts'}))
+        self.assertIsNone(self.index.find_duplicate({}))
+
+    def test_check_flags_duplicates(self):
+        self.assertTrue(self.index.check(0xc3, self.repost, self.jobs))
+        self.assertEqual(self.repost['duplicate_of'], 'a1')
+        self.assertIn(0xc3, self.index)
+
+        job_details = {'title': 'Data Engineer', 'company': 'Acme', 'description': DESCRIPTION}
+        self.assertTrue(self.index.check(0xa1, job_details, self.jobs))
+        self.assertNotIn('duplicate_of', job_details)
+
+    def test_check_skips_duplicates(self):
+        self.index.action = 'skip'
+        self.assertFalse(self.index.check(0xc3, self.repost, self.jobs))
+        self.assertNotIn(0xc3, self.index)
+
+        # Duplicates of indexed jobs that are no longer stored are kept
+        del self.jobs[0xa1]
+        self.assertTrue(self.index.check(0xc3, self.repost, self.jobs))
+
+    def test_sync_and_remove(self):
+        self.index.sync({0xb2: self.jobs[0xb2], 0xc3: self.repost})
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.find_duplicate(self.jobs[0xa1])[0], 0xc3)
+
+        self.index.remove([0xc3, 0xd4])
+        self.assertNotIn(0xc3, self.index)
+        self.assertIsNone(self.index.find_duplicate(self.jobs[0xa1]))
+
+    def test_signature_ignores_other_jobs_of_batch(self):
+        job, short_job = self.jobs[0xa1], {'title': 'Nurse'}
+        signature, short_signature = self.index.compute_signatures([job])[0], self.index.compute_signatures([short_job])[0]
+        self.assertTrue((self.index.compute_signatures([job, self.jobs[0xb2]])[0] == signature).all())
+        self.assertTrue((self.index.compute_signatures([short_job, job]) == [short_signature, signature]).all())
+
+    def test_add_many_jobs(self):
+        jobs = {job_key: {'title': f'Engineer {job_key}', 'company': f'Company {job_key}',
+                          'description': f'Role number {job_key} with duties {job_key * 7} and {job_key * 13}'}
+                for job_key in range(1000, 4000)}
+        self.index.add(jobs)
+        self.assertEqual(len(self.index), 3002)
+        self.assertEqual(self.index.find_duplicate(jobs[1234])[0], 1234)
+        self.assertEqual(self.index.find_duplicate(self.repost)[0], 0xa1)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'near_duplicates.npz')
+            self.index.save(path)
+
+            loaded_index = NearDuplicateIndex(path=path)
+            loaded_index.load()
+            self.assertEqual(len(loaded_index), 2)
+            self.assertEqual(loaded_index.find_duplicate(self.repost)[0], 0xa1)
+
+            other_index = NearDuplicateIndex(seed=2, path=path)
+            other_index.load()
+            self.assertEqual(len(other_index), 0)
+
+    def test_from_config(self):
+        self.assertIsNone(NearDuplicateIndex.from_config({'near_duplicates': {'enabled': False}}))
+        index = NearDuplicateIndex.from_config({'near_duplicates': {'enabled': True, 'action': 'skip', 'threshold': 0.8, 'path': ''}})
+        self.assertEqual((index.action, index.threshold, index.path), ('skip', 0.8, 'near_duplicates.npz'))
+        with self.assertRaises(ValueError):
+            NearDuplicateIndex(action='merge')
+
+
+if __name__ == '__main__':
+    unittest.main()
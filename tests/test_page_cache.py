@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from page_cache import *
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = PageCache(self.temp_dir.name, ttl_seconds=60)
+        self.url = "https://www.indeed.com/jobs?q=software+engineer&start=10"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_missing_page(self):
+        self.assertIsNone(self.cache.get(self.url))
+
+    def test_put_and_get(self):
+        self.cache.put(self.url, "<html>jobs</html>")
+        self.assertEqual(self.cache.get(self.url), "<html>jobs</html>")
+
+    def test_identical_pages_share_content(self):
+        first_path = self.cache.put(self.url, "<html>jobs</html>")
+        second_path = self.cache.put(self.url + "0", "<html>jobs</html>")
+        self.assertEqual(first_path, second_path)
+        self.assertEqual(len(os.listdir(os.path.join(self.temp_dir.name, 'blobs'))), 1)
+
+    def test_expired_page(self):
+        self.cache.put(self.url, "<html>jobs</html>")
+        self.cache.ttl_seconds = -1
+        self.assertIsNone(self.cache.get(self.url))
+        self.assertEqual(self.cache.get(self.url, ignore_ttl=True), "<html>jobs</html>")
+
+    def test_from_config_disabled(self):
+        self.assertIsNone(PageCache.from_config({'page_cache': {'enabled': False, 'replay': False}}))
+
+    def test_strip_scripts(self):
+        html = '<div>a</div><script type="text/javascript">var x = "<div>";</script><div>b</div>'
+        self.assertEqual(strip_scripts(html), '<div>a</div><div>b</div>')
+
+
+if __name__ == '__main__':
+    unittest.main()
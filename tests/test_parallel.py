@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+from parallel import *
+from filters import JobFilter
+from job_record import JobRecord
+from page_cache import PageCache
+
+
+def results_page(job_keys, title='Software Engineer'):
+    return ''.join(f'''
+    <div class="job_seen_beacon">
+      <h2 class="jobTitle"><a href="/rc/clk?jk={job_key}">{title} {job_key}</a></h2>
+      <span data-testid="company-name">Acme</span>
+      <div data-testid="text-location">Remote</div>
+      <table><tr class="underShelfFooter"><td>Python <span data-testid="myJobsStateDate">Posted 1 day ago</span></td></tr></table>
+    </div>''' for job_key in job_keys)
+
+
+class TestParallelFiltering(unittest.TestCase):
+    def setUp(self):
+        self.job_filter = JobFilter(excluded_keywords=['senior'], max_years_of_experience=3)
+        self.jobs = {
+            index: {'title': 'Senior Engineer' if index % 3 == 0 else 'Engineer',
+                    'description': '5+ years' if index % 5 == 0 else 'Python'}
+            for index in range(50)
+        }
+
+    def test_iter_chunks(self):
+        self.assertEqual(list(iter_chunks(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+    def test_find_rejected_jobs_parallel_matches_serial(self):
+        expected = self.job_filter.find_rejected_jobs(self.jobs)
+        self.assertEqual(find_rejected_jobs_parallel(self.job_filter, self.jobs, max_workers=1, chunk_size=7), expected)
+        self.assertEqual(find_rejected_jobs_parallel(self.job_filter, self.jobs, max_workers=2, chunk_size=7), expected)
+
+
+class TestReparseCachedPages(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.page_cache = PageCache(self.temp_dir.name)
+        self.page_cache.put('https://www.indeed.com/jobs?q=a', results_page(['a1', 'a2']))
+        self.page_cache.put('https://www.indeed.com/jobs?q=b', results_page(['b1'], title='Senior Engineer'))
+        self.headers = ['posted_date', 'applied', 'title', 'job_link', 'search_criteria', 'hash_id']
+        self.job_filter = JobFilter(excluded_keywords=['senior'], max_years_of_experience=3)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_reparse_cached_pages(self):
+        jobs = {0xa1: JobRecord(posted_date='01/01/2024', applied='Yes', search_criteria='old', hash_id='a1')}
+
+        accepted, rejected = reparse_cached_pages(self.page_cache, self.job_filter, jobs, self.headers, 'new', max_workers=2, chunk_size=1)
+
+        self.assertEqual(accepted, {0xa1, 0xa2})
+        self.assertEqual(rejected, {'excluded_title': 1})
+        self.assertEqual((jobs[0xa1].applied, jobs[0xa1].search_criteria, jobs[0xa1].title), ('Yes', 'old', 'Software Engineer a1'))
+        self.assertEqual((jobs[0xa2].applied, jobs[0xa2].search_criteria), ('No', 'new'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from openpyxl import load_workbook
+from exporters import load_jobs, save_jobs
+from partitions import *
+from job_record import JobRecord
+
+
+class TestPartitions(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.headers = ['posted_date', 'applied', 'title', 'company', 'job_link', 'search_criteria', 'hash_id']
+        self.jobs = {
+            0xa1: JobRecord(posted_date='01/02/2024', applied='Yes', title='Engineer', company='Beta',
+                            job_link='https://www.indeed.com/rc/clk?jk=a1', search_criteria='python|Austin', hash_id='a1'),
+            0xb2: JobRecord(posted_date='01/20/2024', applied='No', title='Data Engineer', company='Acme',
+                            job_link='https://www.indeed.com/rc/clk?jk=b2', search_criteria='data', hash_id='b2'),
+            0xc3: JobRecord(posted_date='02/03/2024', applied='', title='Developer', company='Acme',
+                            job_link='https://www.indeed.com/rc/clk?jk=c3', search_criteria='data', hash_id='c3')
+        }
+        self.path = os.path.join(self.temp_dir.name, 'jobs.xlsx')
+        self.config = {'csv_settings': {'excel_output_path': self.path, 'csv_headers': self.headers,
+                                        'output_formats': ['excel'], 'partition_by': 'month'}}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def read_summary(self):
+        return {partition.key: partition for partition in read_output_summary(self.path)}
+
+    def test_partition_job_records(self):
+        self.assertEqual({key: set(records) for key, records in partition_job_records(self.jobs, 'month').items()},
+                         {'2024-01': {0xa1, 0xb2}, '2024-02': {0xc3}})
+        self.assertEqual(list(partition_job_records(self.jobs, 'search_criteria')), ['data', 'python|Austin'])
+
+    def test_files_only_rewrite_changed_partitions(self):
+        save_jobs(self.config, self.jobs)
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ['jobs.xlsx', 'jobs_2024-01.xlsx', 'jobs_2024-02.xlsx'])
+        self.assertEqual(load_workbook(self.path).sheetnames, ['Summary'])
+        self.assertEqual(load_jobs(self.config), self.jobs)
+
+        self.jobs[0xd4] = JobRecord(posted_date='02/05/2024', applied='', title='Tester', company='Beta',
+                                    job_link='https://www.indeed.com/rc/clk?jk=d4', search_criteria='data', hash_id='d4')
+        self.assertEqual(write_partitioned_jobs_excel(self.config, self.jobs), ['2024-02'])
+        self.assertEqual(self.read_summary()['2024-02'].location, 'jobs_2024-02.xlsx')
+        self.assertEqual(load_jobs(self.config), self.jobs)
+
+    def test_removes_empty_partitions(self):
+        save_jobs(self.config, self.jobs)
+        del self.jobs[0xc3]
+        save_jobs(self.config, self.jobs)
+
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ['jobs.xlsx', 'jobs_2024-01.xlsx'])
+        self.assertEqual(list(self.read_summary()), ['2024-01'])
+
+    def test_sheets(self):
+        self.config['csv_settings'].update(partition_by='search_criteria', partition_output='sheets')
+        save_jobs(self.config, self.jobs)
+
+        workbook = load_workbook(self.path)
+        self.assertEqual(workbook.sheetnames, ['Summary', 'data', 'python_Austin'])
+        self.assertEqual(len({table.displayName for sheet in workbook.worksheets for table in sheet.tables.values()}), 2)
+        self.assertEqual([cell.value for cell in workbook['Summary'][2]][:6], ['data', 'data', 2, 0, 1, 0])
+        self.assertEqual(load_jobs(self.config), self.jobs)
+
+        self.jobs[0xa1].applied = 'Skip'
+        self.assertEqual(write_partitioned_jobs_excel(self.config, self.jobs), ['python|Austin'])
+        self.assertEqual(load_jobs(self.config), self.jobs)
+
+    def test_switching_partitioning(self):
+        self.config['csv_settings']['partition_by'] = ''
+        save_jobs(self.config, self.jobs)
+        self.config['csv_settings']['partition_by'] = 'month'
+        self.assertEqual(load_jobs(self.config), self.jobs)
+
+        save_jobs(self.config, self.jobs)
+        self.config['csv_settings']['partition_by'] = ''
+        self.assertEqual(load_jobs(self.config), self.jobs)
+        save_jobs(self.config, self.jobs)
+
+        self.assertEqual(os.listdir(self.temp_dir.name), ['jobs.xlsx'])
+        self.assertEqual(load_jobs(self.config), self.jobs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import json
+import shutil
+import subprocess
+import unittest
+from scraper import *
+from job_cards import evaluate_job_cards, parse_job_cards
+
+
+def job_card_html(job_key, title, description):
+    return f'''
+<li><div class="job_seen_beacon">
+  <h2 class="jobTitle"><a href="/rc/clk?jk={job_key}">{title}</a></h2>
+  <span data-testid="company-name">Acme</span>
+  <div data-testid="text-location">Austin, TX</div>
+  <table><tbody><tr class="underShelfFooter"><td>{description}
+    <span data-testid="myJobsStateDate">Posted 3 days ago</span>
+  </td></tr></tbody></table>
+</div></li>'''
+
+RESULTS_PAGE = '<html><body><ul>' + ''.join([
+    job_card_html('00000000000000a1', 'Software Engineer', '2+ years of Python'),
+    job_card_html('00000000000000a2', 'Sr. Software Engineer', 'Python'),
+    job_card_html('00000000000000a3', 'Machine-Learning Engineer', 'Python'),
+    job_card_html('00000000000000a4', 'Seniority Analyst', 'Python'),
+    job_card_html('00000000000000a5', 'Learning Machine Engineer', 'Python'),
+    job_card_html('00000000000000a6', 'Data Engineer', '5+ years of SQL'),
+    job_card_html('00000000000000a7', 'Engineer (C++)', 'Python'),
+    job_card_html('00000000000000a8', 'C# Developer', 'Python'),
+]) + '</ul></body></html>'
+
+# Runs FILTER_JOB_CARDS_SCRIPT in Node.js on job cards parsed in Python, each answering the selectors of the script
+NODE_HARNESS = '''
+const [cards, args] = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const fields = {
+    'tr.underShelfFooter': 'description',
+    'h2.jobTitle': 'title',
+    'span[data-testid="company-name"]': 'company',
+    'div[data-testid="text-location"]': 'location',
+    '[class*="salary-snippet-container"] div[data-testid="attribute_snippet_testid"]': 'salary_preview',
+    'span[data-testid="myJobsStateDate"]': 'posted_date',
+};
+function element(card, selector) {
+    if (selector === 'a') return card.job_link === null ? null : {href: card.job_link};
+    const value = card[fields[selector]];
+    return value === null || value === 'N/A' ? null : {innerText: value};
+}
+const document = {querySelectorAll: () => cards.map(card => ({querySelector: selector => element(card, selector)}))};
+const result = (function() { %s }).apply(null, args);
+process.stdout.write(JSON.stringify(result));
+'''
+
+
+@unittest.skipUnless(shutil.which('node'), 'Node.js is required to run the page script')
+class TestFilterJobCardsScript(unittest.TestCase):
+    def run_script(self, job_cards, job_filter):
+        result = subprocess.run(['node', '-e', NODE_HARNESS % FILTER_JOB_CARDS_SCRIPT],
+                                input=json.dumps([job_cards, get_filter_script_arguments(job_filter)]),
+                                capture_output=True, text=True, check=True)
+        return json.loads(result.stdout)
+
+    def test_script_agrees_with_job_filter(self):
+        job_cards = parse_job_cards(RESULTS_PAGE, 'https://www.indeed.com/jobs?q=engineer')
+        for job_filter in [JobFilter(['Sr', 'machine learning', 'c++'], max_years_of_experience=3), JobFilter()]:
+            results = evaluate_job_cards(job_cards, job_filter, ['title', 'description'], '')
+            rejected = {}
+            for _, _, reason in results:
+                if reason is not None:
+                    rejected[reason] = rejected.get(reason, 0) + 1
+
+            script_result = self.run_script(job_cards, job_filter)
+            self.assertEqual([job['title'] for job in script_result['jobs']],
+                             [job_details['title'] for _, job_details, reason in results if reason is None])
+            self.assertEqual({reason: count for reason, count in script_result['rejected'].items() if count}, rejected)
+
+        self.assertEqual(len(script_result['jobs']), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from search_index import *
+from exporters import save_jobs
+from job_record import JobRecord
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'search_index.sqlite3')
+        self.index = SearchIndex(self.path)
+        self.jobs = {
+            0xa1: JobRecord(title='Data Engineer', company='Acme', job_link='https://www.indeed.com/rc/clk?jk=a1',
+                            description='Build streaming pipelines in Python and SQL'),
+            0xffffffffffffffff: JobRecord(title='Backend Developer', company='Beta Corp',
+                                          job_link='https://www.indeed.com/rc/clk?jk=ffffffffffffffff',
+                                          description='Python services, pipelines optional')
+        }
+
+    def tearDown(self):
+        self.index.close()
+        self.temp_dir.cleanup()
+
+    def search_keys(self, query):
+        return [result.job_key for result in self.index.search(query)]
+
+    def test_build_match_query(self):
+        self.assertEqual(build_match_query('python  "streaming pipelines" eng*'), '"python" "streaming pipelines" "eng"*')
+        self.assertEqual(build_match_query('c++ OR NOT "unclosed'), '"c++" "OR" "NOT" "unclosed"')
+        self.assertEqual(build_match_query(' * "" '), '')
+
+    def test_search(self):
+        self.index.add(self.jobs)
+        self.assertEqual(sorted(self.search_keys('python pipelines')), sorted(self.jobs))
+        self.assertEqual(self.search_keys('"streaming pipelines"'), [0xa1])
+        self.assertEqual(self.search_keys('"pipelines in" beta'), [])
+        self.assertEqual(self.search_keys('dev*'), [0xffffffffffffffff])
+        self.assertEqual(self.search_keys('beta'), [0xffffffffffffffff])
+        self.assertEqual(self.search_keys(''), [])
+
+        result = self.index.search('streaming')[0]
+        self.assertEqual((result.title, result.company, result.job_link), ('Data Engineer', 'Acme', self.jobs[0xa1].job_link))
+        self.assertIn('[streaming]', result.snippet)
+
+    def test_add_replaces_and_sync(self):
+        self.index.add(self.jobs)
+        self.jobs[0xa1].title = 'Analytics Engineer'
+        self.index.add({0xa1: self.jobs[0xa1]})
+        self.assertEqual(self.search_keys('analytics'), [0xa1])
+        self.assertEqual(self.search_keys('data'), [])
+
+        self.jobs[0xc3] = JobRecord(title='Tester', company='Gamma', description='Manual testing')
+        del self.jobs[0xffffffffffffffff]
+        self.index.sync(self.jobs)
+        self.assertEqual(self.index.job_keys(), {0xa1, 0xc3})
+
+    def test_sync_reindexes_changed_jobs(self):
+        self.index.sync(self.jobs)
+        self.jobs[0xa1].description = 'Full description: batch pipelines in Scala'
+        self.index.sync(self.jobs)
+        self.assertEqual(self.search_keys('scala'), [0xa1])
+        self.assertEqual(self.search_keys('streaming'), [])
+
+    def test_index_without_checksums_is_rebuilt(self):
+        self.index.close()
+        connection = sqlite3.connect(self.path)
+        connection.execute("DROP TABLE jobs")
+        connection.execute("CREATE VIRTUAL TABLE jobs USING fts5(title, company, description, job_link UNINDEXED)")
+        connection.execute("INSERT INTO jobs (rowid, title) VALUES (161, 'Data Engineer')")
+        connection.commit()
+        connection.close()
+
+        self.index = SearchIndex(self.path)
+        self.assertEqual(self.index.job_keys(), set())
+        self.index.sync(self.jobs)
+        self.assertEqual(self.search_keys('streaming'), [0xa1])
+
+    def test_save_jobs_syncs_index(self):
+        config = {'csv_settings': {'excel_output_path': os.path.join(self.temp_dir.name, 'jobs.xlsx'),
+                                   'csv_headers': ['title', 'company', 'job_link', 'description', 'hash_id'],
+                                   'output_formats': ['csv']},
+                  'search_index': {'enabled': True, 'path': self.path}}
+        save_jobs(config, self.jobs)
+        self.assertEqual(set(self.search_keys('python')), set(self.jobs))
+
+
+if __name__ == '__main__':
+    unittest.main()
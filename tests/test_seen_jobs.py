@@ -0,0 +1,108 @@
+import datetime
+import os
+import tempfile
+import unittest
+from seen_jobs import *
+from exporters import save_jobs
+from job_record import JobRecord
+
+
+class TestSeenJobsFilter(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'seen_jobs.bloom')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_add_and_contains(self):
+        with SeenJobsFilter(self.path, capacity=1000) as seen_jobs:
+            seen_jobs.add([0xa1, 0xffffffffffffffff, 0xa1])
+            self.assertEqual(len(seen_jobs), 2)
+            self.assertIn(0xa1, seen_jobs)
+            self.assertIn(0xffffffffffffffff, seen_jobs)
+            self.assertNotIn(0xb2, seen_jobs)
+            self.assertEqual(seen_jobs.contains_many([0xb2, 0xa1]).tolist(), [False, True])
+
+            # Large batches set their bits on the unpacked filter
+            seen_jobs.add(range(1, 1001))
+            self.assertTrue(seen_jobs.contains_many(range(1, 1001)).all())
+            self.assertLess(seen_jobs.contains_many(range(10 ** 6, 10 ** 6 + 10000)).mean(), 0.03)
+
+    def test_persisted(self):
+        with SeenJobsFilter(self.path, capacity=1000) as seen_jobs:
+            seen_jobs.add([0xa1])
+
+        with SeenJobsFilter(self.path, capacity=50) as seen_jobs:
+            self.assertEqual((seen_jobs.capacity, len(seen_jobs)), (1000, 1))
+            self.assertIn(0xa1, seen_jobs)
+
+        with open(self.path, 'r+b') as seen_jobs_file:
+            seen_jobs_file.write(b'corrupt!')
+        with SeenJobsFilter(self.path, capacity=50) as seen_jobs:
+            self.assertEqual((seen_jobs.capacity, len(seen_jobs)), (50, 0))
+
+    def test_sync_grows_filter(self):
+        with SeenJobsFilter(self.path, capacity=100) as seen_jobs:
+            seen_jobs.sync(range(80))
+            self.assertEqual(seen_jobs.capacity, 100)
+            seen_jobs.sync(range(50, 150))
+            self.assertEqual((seen_jobs.capacity, len(seen_jobs)), (200, 100))
+            self.assertTrue(seen_jobs.contains_many(range(50, 150)).all())
+
+    def test_from_config(self):
+        self.assertIsNone(SeenJobsFilter.from_config({'seen_jobs': {'enabled': False}}))
+        with SeenJobsFilter.from_config({'seen_jobs': {'enabled': True, 'path': self.path, 'capacity': 10}}) as seen_jobs:
+            self.assertEqual((seen_jobs.capacity, seen_jobs.error_rate), (10, 0.01))
+
+    def test_save_jobs_syncs_filter(self):
+        config = {'csv_settings': {'excel_output_path': os.path.join(self.temp_dir.name, 'jobs.xlsx'),
+                                   'csv_headers': ['title', 'job_link', 'hash_id'], 'output_formats': ['csv']},
+                  'seen_jobs': {'enabled': True, 'path': self.path}}
+        save_jobs(config, {0xa1: JobRecord(title='Data Engineer', job_link='https://www.indeed.com/rc/clk?jk=a1', hash_id='a1')})
+        with SeenJobsFilter(self.path) as seen_jobs:
+            self.assertIn(0xa1, seen_jobs)
+
+
+class TestLazyJobStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.seen_jobs = SeenJobsFilter(os.path.join(self.temp_dir.name, 'seen_jobs.bloom'), capacity=1000)
+        self.seen_jobs.add([0xa1])
+        self.num_loads = 0
+        self.jobs = LazyJobStore(self.seen_jobs, self.load_jobs)
+
+    def tearDown(self):
+        self.seen_jobs.close()
+        self.temp_dir.cleanup()
+
+    def load_jobs(self):
+        self.num_loads += 1
+        return {0xa1: JobRecord(title='Data Engineer', applied='Yes', posted_date=datetime.date(2024, 5, 1), hash_id='a1')}
+
+    def test_new_jobs_do_not_load(self):
+        self.assertNotIn(0xb2, self.jobs)
+        self.assertIsNone(self.jobs.get(0xb2))
+        self.jobs[0xb2] = JobRecord(title='Backend Developer', hash_id='b2')
+        self.assertEqual(self.jobs[0xb2].title, 'Backend Developer')
+        self.assertEqual(self.num_loads, 0)
+
+        self.assertEqual(len(self.jobs), 2)
+        self.assertEqual(self.jobs.num_saved_records, 1)
+        self.assertEqual([record.hash_id for record in self.jobs.sorted_values()], ['a1', 'b2'])
+        self.assertEqual(self.num_loads, 1)
+
+    def test_probable_hit_loads(self):
+        self.assertEqual(self.jobs.get(0xa1).applied, 'Yes')
+        self.assertIn(0xa1, self.jobs)
+        self.assertEqual(self.num_loads, 1)
+
+    def test_load_keeps_saved_values(self):
+        # Only possible if the output files were written without updating the filter
+        self.jobs[0xa1] = JobRecord(title='Data Engineer II', applied='No', hash_id='a1')
+        self.jobs.load()
+        self.assertEqual((self.jobs[0xa1].title, self.jobs[0xa1].applied), ('Data Engineer II', 'Yes'))
+
+
+if __name__ == '__main__':
+    unittest.main()
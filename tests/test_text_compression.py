@@ -0,0 +1,60 @@
+import os
+import pickle
+import tempfile
+import unittest
+from text_compression import *
+
+
+SAMPLES = [f"Job {number}: We are looking for a Data Engineer with {number % 7 + 1}+ years of experience in Python and SQL."
+           for number in range(200)]
+
+
+class TestTextCodec(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.codec = TextCodec.train(SAMPLES)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_train(self):
+        self.assertLessEqual(len(self.codec.dictionary), DICTIONARY_SIZE)
+        self.assertIn(b'years of experience in ', self.codec.dictionary)
+        # Phrases of a single text are left out
+        self.assertNotIn(b'Job 17:', self.codec.dictionary)
+
+    def test_compress_and_decompress(self):
+        for text in SAMPLES[:10] + ['', 'Über', 'x' * 1000]:
+            self.assertEqual(self.codec.decompress(self.codec.compress(text)), text)
+        compressed = self.codec.compress(SAMPLES[0])
+        self.assertEqual(compressed[0], DICTIONARY_TAG)
+        self.assertLess(len(compressed), len(TextCodec().compress(SAMPLES[0])))
+        self.assertEqual(self.codec.compress('ab'), bytes([STORED_TAG]) + b'ab')
+
+    def test_other_dictionary(self):
+        compressed = self.codec.compress(SAMPLES[0])
+        with self.assertRaises(ValueError):
+            TextCodec().decompress(compressed)
+        with self.assertRaises(ValueError):
+            TextCodec.train(SAMPLES[:50]).decompress(compressed)
+        self.assertEqual(self.codec.decompress(TextCodec().compress('x' * 1000)), 'x' * 1000)
+
+    def test_save_and_load(self):
+        path = os.path.join(self.temp_dir.name, 'descriptions.zdict')
+        self.assertIsNone(TextCodec.load(path))
+        self.assertIs(self.codec.save(path), self.codec)
+        # An existing dictionary is never replaced
+        self.assertEqual(TextCodec.train(SAMPLES[:50]).save(path).dictionary_id, self.codec.dictionary_id)
+        self.assertEqual(TextCodec.load(path).dictionary, self.codec.dictionary)
+        self.assertEqual(os.listdir(self.temp_dir.name), ['descriptions.zdict'])
+
+    def test_compressed_text(self):
+        compressed = CompressedText(self.codec.compress(SAMPLES[1]), self.codec)
+        self.assertEqual(str(compressed), SAMPLES[1])
+        self.assertIs(self.codec.compress(compressed), compressed.data)
+        self.assertEqual(TextCodec().decompress(TextCodec().compress(compressed)), SAMPLES[1])
+        self.assertEqual(pickle.loads(pickle.dumps(compressed)).decompress(), SAMPLES[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from utils import *
 
@@ -37,6 +39,49 @@ class TestDataFilteringFunctions(unittest.TestCase):
         title = "civil eng"
         self.assertFalse(exclude_based_on_title(['machine learning', 'project engineer', 'civil engineer'], title))
 
+    # ---------------------------------------------------------
+    # Tests for parse_optional_int function
+    # ---------------------------------------------------------
+    def test_parse_optional_int_number(self):
+        self.assertEqual(parse_optional_int("3"), 3)
+
+    def test_parse_optional_int_empty(self):
+        self.assertIsNone(parse_optional_int(""))
+
+    # ---------------------------------------------------------
+    # Tests for parse_annual_salary_range function
+    # ---------------------------------------------------------
+    def test_parse_annual_salary_range_yearly(self):
+        self.assertEqual(parse_annual_salary_range("$120,000 - $150,000 a year"), (120000, 150000))
+
+    def test_parse_annual_salary_range_thousands(self):
+        self.assertEqual(parse_annual_salary_range("$120K - $150K a year"), (120000, 150000))
+        self.assertEqual(parse_annual_salary_range("$85.5k a year"), (85500, 85500))
+
+    def test_parse_annual_salary_range_hourly(self):
+        self.assertEqual(parse_annual_salary_range("From $50 an hour"), (104000, 104000))
+
+    def test_extract_job_metrics(self):
+        self.assertEqual(extract_job_metrics('2+ years of Python, 5 years of SQL', '$50 - $60 an hour'), {
+            'min_years_of_experience': 2, 'max_years_of_experience': 5,
+            'min_annual_salary': 104000.0, 'max_annual_salary': 124800.0
+        })
+        self.assertEqual(set(extract_job_metrics('No experience needed', 'N/A').values()), {''})
+
+    def test_parse_annual_salary_range_missing(self):
+        self.assertIsNone(parse_annual_salary_range("N/A"))
+
+    # ---------------------------------------------------------
+    # Tests for get_csv_headers function
+    # ---------------------------------------------------------
+    def test_get_csv_headers(self):
+        config = {'csv_settings': {'csv_headers': ['title', 'hash_id']}}
+        self.assertEqual(get_csv_headers(config), ['title', 'hash_id'])
+        config['near_duplicates'] = {'enabled': True}
+        self.assertEqual(get_csv_headers(config), ['title', 'hash_id', 'duplicate_of'])
+        config['csv_settings']['csv_headers'] = ['duplicate_of', 'title']
+        self.assertEqual(get_csv_headers(config), ['duplicate_of', 'title'])
+
 class TestURLFunctions(unittest.TestCase):
     # ---------------------------------------------------------
     # Tests for build_indeed_url function
@@ -73,6 +118,84 @@ class TestURLFunctions(unittest.TestCase):
         url1 = "https://www.indeed.com/cmp/Waymo?campaignid=mobvjcmp&from=mobviewjob&tk=1hpkige022ms6000&fromjk=922da2ee875dab33"
         self.assertFalse(is_valid_indeed_job_link_structure(url1))
 
+    # ---------------------------------------------------------
+    # Tests for job key functions
+    # ---------------------------------------------------------
+    def test_parse_indeed_url_drops_tracking_parameters(self):
+        url1 = "https://www.indeed.com/rc/clk?jk=bb8de57de0baae55&bb=lBZtAEzJGHQbxkjBHBwD&xkcb=SoBf67M3D0pDJ4AdkD0LbzkdCdPP&vjs=3"
+        url2 = "https://www.indeed.com/rc/clk?from=serp&jk=BB8DE57DE0BAAE55&fccid=2d499a4c1fa5dde0"
+        self.assertEqual(parse_indeed_url(url1), "https://www.indeed.com/rc/clk?jk=bb8de57de0baae55")
+        self.assertEqual(parse_indeed_url(url2), parse_indeed_url(url1))
+
+    def test_extract_job_key_from_legacy_link(self):
+        self.assertEqual(extract_job_key("https://www.indeed.com/rc/clk?jk=bb8de57de0baae55&bb"), "bb8de57de0baae55")
+        self.assertIsNone(extract_job_key("https://www.indeed.com/cmp/Waymo"))
+
+    def test_job_key_to_int(self):
+        self.assertEqual(job_key_to_int("bb8de57de0baae55"), 0xbb8de57de0baae55)
+        self.assertLess(job_key_to_int(string_to_hash("https://www.indeed.com/cmp/Waymo")), 2 ** 64)
+
+    def test_post_date_normalizer(self):
+        normalizer = PostDateNormalizer(datetime.datetime(2024, 3, 1, 1, 30))
+        expected = {
+            'Just posted': datetime.date(2024, 3, 1),
+            'Posted\nToday': datetime.date(2024, 3, 1),
+            'Posted 3 hours ago': datetime.date(2024, 2, 29),
+            'Posted 1 day ago': datetime.date(2024, 2, 29),
+            'Posted 3 days ago': datetime.date(2024, 2, 27),
+            'EmployerActive 5 days ago': datetime.date(2024, 2, 25),
+            'Posted 30+ days ago': datetime.date(2024, 1, 31),
+            'a week ago': datetime.date(2024, 2, 23),
+            '01/15/2024': datetime.date(2024, 1, 15)
+        }
+        self.assertEqual({text: normalizer.parse(text) for text in expected}, expected)
+        self.assertEqual(normalizer.unrecognized, set())
+
+    def test_post_date_normalizer_unrecognized(self):
+        normalizer = PostDateNormalizer(datetime.datetime(2024, 3, 1))
+        with self.assertLogs('utils', 'WARNING'):
+            self.assertEqual(normalizer.parse('Hiring ongoing'), datetime.date(2024, 3, 1))
+        self.assertEqual(normalizer.unrecognized, {'Hiring ongoing'})
+        self.assertIsNone(normalizer.parse(None))
+
+    def test_sort_job_records_across_years(self):
+        job_records = {1: JobRecord(posted_date='12/31/2023', company='Acme'), 2: JobRecord(posted_date='01/01/2024', company='Beta'),
+                       3: JobRecord(posted_date='01/01/2024', company='Acme')}
+        expected = [job_records[3], job_records[2], job_records[1]]
+        self.assertEqual(sort_job_records(job_records), expected)
+        self.assertEqual(sort_job_records(JobStore(job_records)), expected)
+
+class TestExcelFunctions(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.temp_dir.name, 'jobs.xlsx')
+        self.fieldnames = ['posted_date', 'applied', 'title', 'company', 'job_link', 'hash_id']
+        self.job_records = {
+            job_key_to_int(job_key): JobRecord(posted_date='01/02/2024', applied='Yes', title='Engineer', company=company,
+                                               job_link=f'https://www.indeed.com/rc/clk?jk={job_key}', hash_id=job_key)
+            for job_key, company in [('bb8de57de0baae55', 'Beta'), ('aa8de57de0baae55', 'Alpha')]
+        }
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_write_new_jobs_workbook(self):
+        write_new_jobs_workbook(self.filename, self.fieldnames, self.job_records)
+        worksheet = load_workbook(self.filename).active
+
+        self.assertEqual([cell.value for cell in worksheet[1]], self.fieldnames)
+        self.assertEqual(worksheet['D2'].value, 'Alpha')
+        self.assertEqual(worksheet['A2'].value, datetime.datetime(2024, 1, 2))
+        self.assertEqual(worksheet['A2'].number_format, EXCEL_DATE_FORMAT)
+        self.assertEqual(worksheet['E2'].hyperlink.target, 'https://www.indeed.com/rc/clk?jk=aa8de57de0baae55')
+        self.assertEqual(worksheet['E2'].style, 'Hyperlink')
+        self.assertEqual(worksheet.tables['JobTable'].ref, 'A1:F3')
+        self.assertEqual([str(cell_range.sqref) for cell_range in worksheet.conditional_formatting], ['B2:B3'])
+
+        job_records = read_jobs_excel(self.filename)
+        self.assertEqual(set(job_records), set(self.job_records))
+        self.assertEqual(job_records[job_key_to_int('bb8de57de0baae55')].company, 'Beta')
+
 
 
 if __name__ == '__main__':
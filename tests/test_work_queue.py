@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from work_queue import *
+from fetchers import Fetcher
+from filters import JobFilter
+
+
+def results_page(job_keys, title='Software Engineer'):
+    cards = ''.join(f'''
+    <div class="job_seen_beacon">
+      <h2 class="jobTitle"><a href="/rc/clk?jk={job_key}">{title} {job_key}</a></h2>
+      <span data-testid="company-name">Acme</span>
+      <div data-testid="text-location">Remote</div>
+      <table><tr class="underShelfFooter"><td>Python <span data-testid="myJobsStateDate">Posted 1 day ago</span></td></tr></table>
+    </div>''' for job_key in job_keys)
+    return f'<html><body>{cards}</body></html>'
+
+
+class PagedFetcher(Fetcher):
+    """Serves two result pages, then repeats the last page like Indeed does."""
+
+    def fetch(self, url):
+        if '&start=' in url:
+            return results_page(['b1', 'b2'], title='Senior Engineer' if 'start=20' in url else 'Software Engineer')
+        return results_page(['a1', 'a2'])
+
+
+class TestWorkQueue(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.queue = WorkQueue(os.path.join(self.temp_dir.name, 'queue.sqlite3'), lease_seconds=60, max_attempts=2)
+        self.url = 'https://www.indeed.com/jobs?q=software'
+
+    def tearDown(self):
+        self.queue.close()
+        self.temp_dir.cleanup()
+
+    def test_enqueue_ignores_duplicates(self):
+        self.assertTrue(self.queue.enqueue('software', self.url))
+        self.assertFalse(self.queue.enqueue('software', self.url))
+        self.assertEqual(self.queue.counts()['pending'], 1)
+
+    def test_journal_mode(self):
+        self.assertEqual(self.queue.connection.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+        self.queue.close()
+        self.queue = WorkQueue(self.queue.path, journal_mode='wal')
+        self.assertEqual(self.queue.connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        with self.assertRaises(ValueError):
+            WorkQueue(self.queue.path, journal_mode='memory')
+
+    def test_leased_task_is_not_leased_twice(self):
+        self.queue.enqueue('software', self.url)
+        self.assertEqual(self.queue.lease('worker-1').url, self.url)
+        self.assertIsNone(self.queue.lease('worker-2'))
+
+    def test_expired_lease_is_handed_to_another_worker(self):
+        self.queue.enqueue('software', self.url)
+        self.queue.lease_seconds = -1
+        self.queue.lease('worker-1')
+
+        task = self.queue.lease('worker-2')
+        self.assertEqual(task.attempts, 2)
+
+        # The task is marked as failed once its last lease expires
+        self.assertIsNone(self.queue.lease('worker-3'))
+        self.assertEqual(self.queue.counts()['failed'], 1)
+
+    def test_release_after_last_attempt_fails_task(self):
+        self.queue.enqueue('software', self.url)
+        self.queue.release(self.queue.lease('worker-1'), 'worker-1')
+        self.assertEqual(self.queue.counts()['pending'], 1)
+        self.queue.release(self.queue.lease('worker-1'), 'worker-1')
+        self.assertEqual(self.queue.counts()['failed'], 1)
+
+    def test_complete_is_idempotent(self):
+        self.queue.enqueue('software', self.url)
+        task = self.queue.lease('worker-1')
+        self.queue.complete(task, {'a1': {'title': 'Engineer'}}, {'excluded_title': 1})
+        self.queue.complete(task, {'a1': {'title': 'Engineer'}}, {'excluded_title': 1})
+
+        self.assertEqual(list(self.queue.iter_results()), [('a1', {'title': 'Engineer'})])
+        self.assertEqual(self.queue.counts()['done'], 1)
+
+    def test_worker_crawls_until_last_page(self):
+        self.queue.enqueue('software', self.url)
+        worker = QueueWorker(self.queue, PagedFetcher(), JobFilter(excluded_keywords=['senior'], max_years_of_experience=3),
+                             ['applied', 'title', 'job_link', 'search_criteria', 'hash_id'])
+        worker.run()
+
+        self.assertEqual(worker.num_pages_crawled, 3)
+        self.assertEqual(self.queue.counts(), {'pending': 0, 'leased': 0, 'done': 3, 'failed': 0})
+        self.assertEqual([hash_id for hash_id, _ in self.queue.iter_results()], ['a1', 'a2', 'b1', 'b2'])
+        self.assertEqual(self.queue.num_rejected_job_cards(), {'excluded_title': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()